@@ -0,0 +1,50 @@
+"""Compare per-call JSON-RPC latency with and without connection pooling.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_mopidy_pool --calls 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from mopidy_yt_cast_receiver.mopidy import MopidyClient
+
+from .common import latency_summary
+from .stub_mopidy import StubMopidyServer
+
+
+def _measure(client: MopidyClient, calls: int) -> dict:
+    samples = []
+    payload = client._rpc_payload("core.playback.get_state", {})
+    for _ in range(calls):
+        started = time.perf_counter()
+        client._post(payload)
+        samples.append(time.perf_counter() - started)
+    return {**latency_summary(samples), "connections_opened": client._transport.opened}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    stub = StubMopidyServer().start()
+    try:
+        results = {}
+        for label, pool_size in (("unpooled", 0), ("pooled", 4)):
+            client = MopidyClient(stub.rpc_url, pool_size=pool_size)
+            try:
+                results[label] = _measure(client, args.calls)
+            finally:
+                client.close()
+    finally:
+        stub.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
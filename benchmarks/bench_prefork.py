@@ -0,0 +1,107 @@
+"""Measure DIAL requests per second as the number of pre-forked worker processes grows.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_prefork --processes 0,1,2,4 --clients 8 --seconds 3
+
+``0`` is the single-process server. Clients run in their own processes so the
+load generator does not share a GIL with the server. The default path is the
+app status that YouTube polls; ``--path /launches`` measures requests that
+every worker has to forward to the coordinator.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from http.client import HTTPConnection
+from typing import List
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.prefork import PreforkServer
+from mopidy_yt_cast_receiver.server import ServerOptions
+
+from .common import latency_summary
+from .stub_mopidy import StubMopidyServer
+
+
+def _client(port: int, path: str, seconds: float, results) -> None:
+    samples: List[float] = []
+    conn = HTTPConnection("127.0.0.1", port, timeout=10)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            conn.getresponse().read()
+        except OSError:
+            conn.close()
+            conn = HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        samples.append(time.perf_counter() - started)
+    conn.close()
+    results.put(samples)
+
+
+def _run(processes: int, args: argparse.Namespace, rpc_url: str) -> dict:
+    options = ServerOptions(workers=args.http_workers, queue_size=args.clients * 2)
+    service = DialService(
+        host="127.0.0.1",
+        port=0,
+        ssdp_port=0,
+        mopidy_rpc_url=rpc_url,
+        server_options=options,
+        state_reconcile_interval=0,
+    )
+    runner = PreforkServer(service, workers=processes, server_options=options) if processes else service
+    runner.start()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    try:
+        # Warm the workers (and their connections to the coordinator) before measuring.
+        warmup = HTTPConnection("127.0.0.1", service.port, timeout=10)
+        for _ in range(20):
+            warmup.request("GET", args.path)
+            warmup.getresponse().read()
+        warmup.close()
+
+        clients = [
+            context.Process(target=_client, args=(service.port, args.path, args.seconds, results))
+            for _ in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        samples = [sample for _ in clients for sample in results.get()]
+        for client in clients:
+            client.join()
+    finally:
+        runner.stop()
+    return {
+        "processes": processes,
+        "requests_per_second": round(len(samples) / args.seconds, 1),
+        **latency_summary(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", default="0,1,2,4", help="Comma-separated worker process counts")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive client processes")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--path", default="/apps/YouTube")
+    parser.add_argument("--http-workers", type=int, default=4, help="Pooled HTTP threads per process")
+    args = parser.parse_args()
+
+    stub = StubMopidyServer().start()
+    try:
+        rows = [_run(int(count), args, stub.rpc_url) for count in args.processes.split(",")]
+    finally:
+        stub.stop()
+    print(json.dumps({"cpus": os.cpu_count(), "path": args.path, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
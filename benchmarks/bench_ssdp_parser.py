@@ -0,0 +1,57 @@
+"""Measure SSDP datagrams handled per second on one core.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_ssdp_parser --seconds 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from mopidy_yt_cast_receiver.ssdp import DIAL_ST, SSDPServer, parse_search
+
+_PACKETS = [
+    (
+        "M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\n"
+        f'MAN: "ssdp:discover"\r\nMX: 1\r\nST: {st}\r\n\r\n'
+    ).encode()
+    for st in (DIAL_ST, "ssdp:all", "upnp:rootdevice", "urn:schemas-upnp-org:device:MediaRenderer:1")
+] + [
+    b"NOTIFY * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nNT: upnp:rootdevice\r\nNTS: ssdp:alive\r\n\r\n",
+]
+
+
+def _run(label: str, handle, seconds: float) -> dict:
+    buffer = bytearray(2048)
+    views = []
+    for packet in _PACKETS:
+        buffer[: len(packet)] = packet
+        views.append((bytes(buffer), len(packet)))
+    handled = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for data, length in views:
+            handle(data, length)
+        handled += len(views)
+    return {"benchmark": label, "packets": handled, "packets_per_second": handled / seconds}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    ssdp = SSDPServer(location="http://127.0.0.1:8009/ssdp/device-desc.xml", friendly_name="bench", udn="bench")
+    results = [
+        _run("parse_search", parse_search, args.seconds),
+        # No source address, so rate limiting and duplicate suppression stay out of the measurement.
+        _run("handle_datagram", lambda data, length: ssdp.handle_datagram(data, None, length), args.seconds),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Measure receiver start-up: time until it answers and time until the first cast plays.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup --runs 5
+
+Each run starts ``python -m mopidy_yt_cast_receiver`` in a fresh process
+against the stub Mopidy, polls the device description until it answers,
+casts one video and polls ``/metrics`` until ``first_cast_seconds`` appears.
+Times are taken from just before the process is spawned, so they include
+interpreter and import start-up; ``reported_first_cast`` is the receiver's
+own figure, counted from once its modules are imported. The first run uses
+an empty ``--state-dir`` (a cold start); the rest reuse it (warm restarts),
+and the report checks that the UDN stayed the same across them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from http.client import HTTPConnection
+from typing import Dict, List
+
+from .common import latency_summary
+from .stub_mopidy import StubMopidyServer
+
+_UDN = re.compile(rb"<UDN>uuid:([^<]+)</UDN>")
+_FIRST_CAST = re.compile(rb"^yt_cast_receiver_first_cast_seconds (\S+)$", re.MULTILINE)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(port: int, method: str, path: str, body: str = "") -> tuple[int, bytes] | None:
+    conn = HTTPConnection("127.0.0.1", port, timeout=2)
+    try:
+        headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+        conn.request(method, path, body=body or None, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+    except OSError:
+        return None
+    finally:
+        conn.close()
+
+
+def _poll(check, timeout: float, interval: float = 0.002):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        result = check()
+        if result is not None:
+            return result
+        time.sleep(interval)
+    raise TimeoutError("receiver did not get there in time")
+
+
+def _run(state_dir: str, rpc_url: str, args: argparse.Namespace) -> Dict[str, object]:
+    port = _free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "mopidy_yt_cast_receiver",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--ssdp-port",
+        "0",
+        "--rpc-url",
+        rpc_url,
+        "--state-dir",
+        state_dir,
+        "--state-reconcile-interval",
+        "0",
+    ]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+
+        def described():
+            reply = _get(port, "GET", "/ssdp/device-desc.xml")
+            return reply if reply and reply[0] == 200 else None
+
+        reply = _poll(described, args.timeout)
+        ready = time.perf_counter() - started
+        udn = _UDN.search(reply[1]).group(1).decode()
+        status = _get(port, "POST", "/apps/YouTube", "v=abc")
+        if status is None or status[0] != 201:
+            raise RuntimeError(f"launch failed: {status}")
+
+        def first_cast():
+            metrics = _get(port, "GET", "/metrics")
+            match = _FIRST_CAST.search(metrics[1]) if metrics else None
+            return float(match.group(1)) if match else None
+
+        reported = _poll(first_cast, args.timeout)
+        first_cast_seconds = time.perf_counter() - started
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.wait(timeout=10)
+    return {"udn": udn, "ready": ready, "first_cast": first_cast_seconds, "reported_first_cast": reported}
+
+
+def _summary(runs: List[Dict[str, object]]) -> Dict[str, object]:
+    return {
+        "runs": len(runs),
+        "ready": latency_summary([run["ready"] for run in runs]),
+        "first_cast": latency_summary([run["first_cast"] for run in runs]),
+        "reported_first_cast": latency_summary([run["reported_first_cast"] for run in runs]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Starts in total; the first is cold")
+    parser.add_argument("--mopidy-latency", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=20.0, help="Seconds to wait for each milestone")
+    args = parser.parse_args()
+
+    stub = StubMopidyServer(latency=args.mopidy_latency).start()
+    runs: List[Dict[str, object]] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="yt-cast-state-") as state_dir:
+            for _ in range(max(args.runs, 2)):
+                runs.append(_run(state_dir, stub.rpc_url, args))
+            files = sorted(os.listdir(state_dir))
+    finally:
+        stub.stop()
+
+    report = {
+        "cold": _summary(runs[:1]),
+        "warm": _summary(runs[1:]),
+        "udn_stable": len({run["udn"] for run in runs}) == 1,
+        "state_files": files,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["udn_stable"] else 1)
+
+
+if __name__ == "__main__":
+    main()
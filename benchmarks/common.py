@@ -0,0 +1,44 @@
+"""Helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import os
+import resource
+from typing import Dict, List, Sequence
+
+
+def percentile(sorted_samples: Sequence[float], fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(fraction * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as microsecond statistics."""
+
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_us": (sum(ordered) / len(ordered) * 1e6) if ordered else 0.0,
+        "p50_us": percentile(ordered, 0.50) * 1e6,
+        "p99_us": percentile(ordered, 0.99) * 1e6,
+        "max_us": (ordered[-1] * 1e6) if ordered else 0.0,
+    }
+
+
+def rss_kb() -> int:
+    """Current resident set size of this process in KiB."""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+__all__ = ["latency_summary", "peak_rss_kb", "percentile", "rss_kb"]
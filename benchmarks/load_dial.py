@@ -0,0 +1,259 @@
+"""Drive concurrent DIAL and SSDP traffic against a local receiver.
+
+Starts a stub Mopidy, a :class:`DialService` on loopback and a set of
+keep-alive HTTP clients issuing a weighted GET/POST/DELETE mix, plus an
+optional M-SEARCH flood. Results are printed as JSON. Run from the
+repository root::
+
+    python -m benchmarks.load_dial --clients 16 --seconds 5 --ssdp-rate 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import json
+import random
+import socket
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from mopidy_yt_cast_receiver.aio import AsyncDialRuntime
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.server import ServerOptions
+from mopidy_yt_cast_receiver.ssdp import DIAL_ST
+
+from .common import latency_summary, peak_rss_kb, rss_kb
+from .stub_mopidy import StubMopidyServer
+
+_SEARCH = (
+    "M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\n"
+    f'MAN: "ssdp:discover"\r\nMX: 1\r\nST: {DIAL_ST}\r\n\r\n'
+).encode()
+
+
+class _Receiver:
+    """Run the receiver under test with either runtime and expose its ports."""
+
+    def __init__(self, service: DialService, runtime: str) -> None:
+        self.service = service
+        self.runtime = runtime
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._async: AsyncDialRuntime | None = None
+        self._serving: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.runtime == "threads":
+            self.service.start()
+            return
+        self._loop = asyncio.new_event_loop()
+        self._async = AsyncDialRuntime(self.service)
+        started = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._async.start())
+            self._serving = self._loop.create_task(self._async.serve_forever())
+            started.set()
+            try:
+                # Cancelling serve_forever still runs the runtime's shutdown before this returns.
+                self._loop.run_until_complete(self._serving)
+            except asyncio.CancelledError:
+                pass
+
+        self._thread = threading.Thread(target=run, name="load-asyncio", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self) -> None:
+        if self._loop is None:
+            self.service.stop()
+            return
+        self._loop.call_soon_threadsafe(self._serving.cancel)
+        self._thread.join()
+        self._loop.close()
+
+    @property
+    def ssdp_port(self) -> int:
+        if self._async is not None:
+            return self._async._ssdp_protocol._sock.getsockname()[1]
+        return self.service._ssdp._socket.getsockname()[1]
+
+
+def _operations(app_name: str, mix: Dict[str, int]) -> List[Tuple[str, Callable]]:
+    def get_status(conn: http.client.HTTPConnection, state: dict) -> int:
+        conn.request("GET", f"/apps/{app_name}")
+        return _drain(conn)
+
+    def get_descriptor(conn: http.client.HTTPConnection, state: dict) -> int:
+        conn.request("GET", "/ssdp/device-desc.xml")
+        return _drain(conn)
+
+    def post_launch(conn: http.client.HTTPConnection, state: dict) -> int:
+        body = f"v=load{random.randrange(1 << 30):x}"
+        conn.request(
+            "POST",
+            f"/apps/{app_name}",
+            body=body,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        response = conn.getresponse()
+        response.read()
+        location = response.getheader("Location")
+        if location:
+            state["launch"] = location.split("/", 3)[-1]
+        return response.status
+
+    def delete_launch(conn: http.client.HTTPConnection, state: dict) -> int:
+        conn.request("DELETE", "/" + state.pop("launch", f"apps/{app_name}"))
+        return _drain(conn)
+
+    table = {"get": get_status, "descriptor": get_descriptor, "post": post_launch, "delete": delete_launch}
+    return [(name, table[name]) for name, weight in mix.items() for _ in range(weight)]
+
+
+def _drain(conn: http.client.HTTPConnection) -> int:
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def _client(
+    port: int,
+    operations: List[Tuple[str, Callable]],
+    deadline: float,
+    samples: Dict[str, List[float]],
+    statuses: Dict[str, int],
+) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    state: dict = {}
+    while time.perf_counter() < deadline:
+        name, operation = random.choice(operations)
+        started = time.perf_counter()
+        try:
+            status = str(operation(conn, state))
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            status = "error"
+        samples[name].append(time.perf_counter() - started)
+        statuses[status] += 1
+    conn.close()
+
+
+def _ssdp_flood(port: int, rate: float, sources: int, deadline: float, counts: Dict[str, int]) -> None:
+    # Every socket shares the loopback source IP, which the responder rate
+    # limits as one client, so a fast flood mostly exercises the drop path.
+    socks = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(max(1, sources))]
+    interval = 1.0 / rate
+    next_send = time.perf_counter()
+    try:
+        while time.perf_counter() < deadline:
+            for sock in socks:
+                sock.sendto(_SEARCH, ("127.0.0.1", port))
+                counts["sent"] += 1
+            next_send += interval * len(socks)
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        for sock in socks:
+            sock.close()
+
+
+def _sample_process(deadline: float, peaks: Dict[str, int]) -> None:
+    while time.perf_counter() < deadline:
+        peaks["threads"] = max(peaks["threads"], threading.active_count())
+        peaks["rss_kb"] = max(peaks["rss_kb"], rss_kb())
+        time.sleep(0.05)
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    mix: Dict[str, int] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("get", "descriptor", "post", "delete"):
+            raise argparse.ArgumentTypeError(f"unknown operation: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("get=14,descriptor=3,post=2,delete=1"))
+    parser.add_argument("--runtime", choices=("threads", "asyncio"), default="threads")
+    parser.add_argument("--http-workers", type=int, default=0, help="use the pooled server with N workers")
+    parser.add_argument("--ssdp-rate", type=float, default=0.0, help="M-SEARCH datagrams per second")
+    parser.add_argument("--ssdp-sources", type=int, default=4)
+    parser.add_argument("--mopidy-latency", type=float, default=0.002)
+    parser.add_argument("--mopidy-jitter", type=float, default=0.0)
+    parser.add_argument("--mopidy-failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubMopidyServer(
+        latency=args.mopidy_latency, jitter=args.mopidy_jitter, failure_rate=args.mopidy_failure_rate
+    ).start()
+    options = ServerOptions(workers=args.http_workers) if args.http_workers else None
+    service = DialService(
+        host="127.0.0.1", port=0, ssdp_port=0, mopidy_rpc_url=stub.rpc_url, server_options=options
+    )
+    receiver = _Receiver(service, args.runtime)
+    receiver.start()
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, int] = defaultdict(int)
+    ssdp_counts: Dict[str, int] = defaultdict(int)
+    peaks = {"threads": threading.active_count(), "rss_kb": rss_kb()}
+    baseline = dict(peaks)
+    deadline = time.perf_counter() + args.seconds
+    operations = _operations(service.app_name, args.mix)
+
+    workers = [
+        threading.Thread(target=_client, args=(service.port, operations, deadline, samples, statuses))
+        for _ in range(args.clients)
+    ]
+    if args.ssdp_rate > 0:
+        workers.append(
+            threading.Thread(
+                target=_ssdp_flood,
+                args=(receiver.ssdp_port, args.ssdp_rate, args.ssdp_sources, deadline, ssdp_counts),
+            )
+        )
+    workers.append(threading.Thread(target=_sample_process, args=(deadline, peaks)))
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    ssdp_stats = service.ssdp_stats.as_dict() if service.ssdp_stats else {}
+    receiver.stop()
+    stub.stop()
+
+    total = sum(len(values) for values in samples.values())
+    results = {
+        "runtime": args.runtime,
+        "clients": args.clients,
+        "seconds": elapsed,
+        "requests": total,
+        "requests_per_second": total / elapsed,
+        "statuses": dict(statuses),
+        "latency": latency_summary([value for values in samples.values() for value in values]),
+        "operations": {name: latency_summary(values) for name, values in sorted(samples.items())},
+        "ssdp": {"sent": ssdp_counts["sent"], **ssdp_stats},
+        "mopidy": {"calls": stub.call_count, "failures": stub.failure_count},
+        "threads": {"baseline": baseline["threads"], "peak": peaks["threads"], "load_generator": len(workers)},
+        "rss_kb": {"baseline": baseline["rss_kb"], "peak": peaks["rss_kb"], "max_resident": peak_rss_kb()},
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
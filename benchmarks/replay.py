@@ -0,0 +1,221 @@
+"""Replay a capture log against a local receiver and stub Mopidy, and report latency and divergence.
+
+Record traffic with ``--capture PATH`` on a running receiver, then run from
+the repository root::
+
+    python -m benchmarks.replay capture.jsonl --speed 4
+
+The receivers in the log are recreated with the same UDN, friendly name and
+TV code. HTTP requests are sent over loopback at the recorded spacing divided
+by ``--speed`` (``0`` sends them back to back); session and launch IDs issued
+by the original receiver are rewritten to the ones the replayed receiver
+issues. SSDP datagrams are handed to the receiver's responder with their
+original source address, so per-source rate limiting applies as it did.
+
+Divergence is reported as HTTP status and SSDP outcome mismatches and as the
+difference in Mopidy calls per method.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from mopidy_yt_cast_receiver.capture import HTTP, RECEIVER, RPC, SSDP, read_capture
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.receivers import MultiReceiverService
+
+from .common import latency_summary
+from .stub_mopidy import StubMopidyServer
+
+_MAX_EXAMPLES = 10
+
+
+def build_receiver(records: List[Dict[str, Any]], rpc_url: str, reconcile: float) -> DialService | MultiReceiverService:
+    """Recreate the captured receiver (or rooms) on loopback, backed by ``rpc_url``."""
+
+    described = [record for record in records if record["k"] == RECEIVER] or [
+        {"prefix": "", "udn": None, "name": "Replay", "pairing": None}
+    ]
+    services = [
+        DialService(
+            host="127.0.0.1",
+            port=0,
+            ssdp_port=0,
+            friendly_name=record["name"],
+            mopidy_rpc_url=rpc_url,
+            pairing_code=record["pairing"],
+            udn=record["udn"],
+            path_prefix=record["prefix"],
+            state_reconcile_interval=reconcile,
+        )
+        for record in described
+    ]
+    if len(services) == 1 and not services[0].path_prefix:
+        return services[0]
+    return MultiReceiverService(services, host="127.0.0.1", port=0, ssdp_port=0)
+
+
+class _IdMap:
+    """IDs from the original run (sessions, launches) and the ones the replay got instead."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ids: Dict[str, Future] = {}
+
+    def expect(self, location: str) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self._ids[_last_segment(location)] = future
+        return future
+
+    def rewrite(self, text: str, timeout: float = 30.0) -> str:
+        with self._lock:
+            ids = [(old, future) for old, future in self._ids.items() if old in text]
+        for old, future in ids:
+            new = future.result(timeout)
+            if new is not None:
+                text = text.replace(old, new)
+        return text
+
+
+def _last_segment(location: str) -> str:
+    return location.rstrip("/").rsplit("/", 1)[-1]
+
+
+class Replayer:
+    def __init__(self, service: DialService | MultiReceiverService, records: List[Dict[str, Any]], args) -> None:
+        self.service = service
+        self.records = records
+        self.speed = args.speed
+        self._executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="replay")
+        self._ids = _IdMap()
+        self._lock = threading.Lock()
+        self._latencies: List[float] = []
+        self._poll_latencies: List[float] = []
+        self._statuses: List[Tuple[str, str, int, int]] = []
+        self._ssdp: List[Tuple[str, str]] = []
+
+    def run(self) -> float:
+        started = time.perf_counter()
+        pending = []
+        for record in self.records:
+            if self.speed > 0:
+                delay = started + record["t"] / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if record["k"] == HTTP:
+                expected = self._ids.expect(record["l"]) if "l" in record else None
+                pending.append(self._executor.submit(self._send_http, record, expected))
+            elif record["k"] == SSDP:
+                self._send_ssdp(record)
+        for future in pending:
+            future.result()
+        self._executor.shutdown()
+        return time.perf_counter() - started
+
+    def report(self) -> Dict[str, Any]:
+        mismatched = [entry for entry in self._statuses if entry[2] != entry[3]]
+        ssdp_mismatched = sum(recorded != replayed for recorded, replayed in self._ssdp)
+        return {
+            "http": {
+                "requests": len(self._statuses),
+                "status_mismatches": len(mismatched),
+                "latency": latency_summary(self._latencies),
+                "long_polls": latency_summary(self._poll_latencies),
+                "examples": [
+                    {"method": method, "path": path, "recorded": recorded, "replayed": replayed}
+                    for method, path, recorded, replayed in mismatched[:_MAX_EXAMPLES]
+                ],
+            },
+            "ssdp": {
+                "datagrams": len(self._ssdp),
+                "outcome_mismatches": ssdp_mismatched,
+                "recorded": dict(Counter(recorded for recorded, _ in self._ssdp)),
+                "replayed": dict(Counter(replayed for _, replayed in self._ssdp)),
+            },
+        }
+
+    def _send_http(self, record: Dict[str, Any], expected: Future | None) -> None:
+        status, location = 0, None
+        try:
+            target = self._ids.rewrite(record["p"])
+            body = self._ids.rewrite(record.get("b", "")).encode()
+            conn = http.client.HTTPConnection("127.0.0.1", self.service.port, timeout=60)
+            started = time.perf_counter()
+            try:
+                conn.request(record["m"], target, body=body or None, headers=record.get("h", {}))
+                response = conn.getresponse()
+                response.read()
+                status, location = response.status, response.getheader("Location")
+            finally:
+                conn.close()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                (self._poll_latencies if target.split("?")[0].endswith("/events") else self._latencies).append(elapsed)
+        except (OSError, TimeoutError) as exc:
+            print(f"replay: {record['m']} {record['p']} failed: {exc}")
+        finally:
+            if expected is not None:
+                expected.set_result(_last_segment(location) if location else None)
+            with self._lock:
+                self._statuses.append((record["m"], record["p"], record["s"], status))
+
+    def _send_ssdp(self, record: Dict[str, Any]) -> None:
+        addr = tuple(record["a"]) if "a" in record else None
+        # Replies are not sent: the phones that asked are not listening here.
+        _, outcome = self.service.ssdp.classify(record["d"].encode("latin-1"), addr)
+        self._ssdp.append((record["o"], outcome))
+
+
+def _rpc_divergence(records: List[Dict[str, Any]], stub: StubMopidyServer) -> Dict[str, Any]:
+    recorded = Counter(record["m"] for record in records if record["k"] == RPC)
+    replayed = Counter(call.get("method") for call in stub.calls)
+    methods = sorted(set(recorded) | set(replayed))
+    return {
+        "recorded": sum(recorded.values()),
+        "replayed": sum(replayed.values()),
+        "methods": {method: [recorded[method], replayed[method]] for method in methods},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="Capture log written with --capture")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=64, help="HTTP requests in flight at most")
+    parser.add_argument("--mopidy-latency", type=float, default=0.0, help="Seconds the stub Mopidy sleeps per reply")
+    parser.add_argument("--reconcile-interval", type=float, default=0.0, help="Playback reconciliation period")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds to let launches finish before reporting")
+    args = parser.parse_args()
+
+    records = list(read_capture(args.capture))
+    rpc_records = sum(record["k"] == RPC for record in records)
+    stub = StubMopidyServer(latency=args.mopidy_latency, history=rpc_records * 2 + 10_000).start()
+    service = build_receiver(records, stub.rpc_url, args.reconcile_interval)
+    service.start()
+    try:
+        replayer = Replayer(service, records, args)
+        elapsed = replayer.run()
+        time.sleep(args.settle)
+        report = {
+            "records": len(records),
+            "speed": args.speed,
+            "seconds": round(elapsed, 3),
+            **replayer.report(),
+            "mopidy": _rpc_divergence(records, stub),
+        }
+    finally:
+        service.stop()
+        stub.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
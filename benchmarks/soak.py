@@ -0,0 +1,247 @@
+"""Soak-test the receiver with hours of simulated phones and fail on sustained resource growth.
+
+Run from the repository root::
+
+    python -m benchmarks.soak --seconds 7200 --sample-interval 60
+
+A :class:`DialService` runs on loopback against the stub Mopidy. Client
+threads cast, poll the app status, open sessions, long-poll them, send
+transport commands and stop playback, while a sender fires M-SEARCH
+datagrams at the SSDP port. Every ``--sample-interval`` seconds the runner
+records traced Python memory (``tracemalloc``), live threads and open file
+descriptors.
+
+Samples taken during ``--warmup`` (caches and pools filling up) are ignored.
+Growth is the rise of the lowest value in the last quarter of the remaining
+samples over the lowest value in the first quarter; comparing minimums
+ignores transient peaks, so only growth that never comes back down counts.
+The report is printed as JSON and the exit status is 1 when any growth
+exceeds its ``--max-*-growth`` limit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import http.client
+import json
+import random
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.profiling import open_fds
+from mopidy_yt_cast_receiver.ssdp import DIAL_ST
+
+from .stub_mopidy import StubMopidyServer
+
+_SEARCH = f'M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nMAN: "ssdp:discover"\r\nMX: 1\r\nST: {DIAL_ST}\r\n\r\n'
+
+
+@dataclass(slots=True)
+class Sample:
+    elapsed: float
+    traced_kb: float
+    threads: int
+    fds: int
+
+
+def sustained_growth(values: List[float]) -> float:
+    """Rise of the minimum of the last quarter of ``values`` over the minimum of the first quarter."""
+
+    if len(values) < 4:
+        return 0.0
+    quarter = len(values) // 4
+    return min(values[-quarter:]) - min(values[:quarter])
+
+
+class _Traffic:
+    """Client threads acting like phones, plus an M-SEARCH sender."""
+
+    def __init__(self, service: DialService, args: argparse.Namespace) -> None:
+        self.service = service
+        self.args = args
+        self.requests = 0
+        self.errors = 0
+        self.datagrams = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for index in range(self.args.clients):
+            self._threads.append(threading.Thread(target=self._phone, args=(index,), name=f"soak-phone-{index}"))
+        if self.args.ssdp_rate > 0:
+            self._threads.append(threading.Thread(target=self._searches, name="soak-ssdp"))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _phone(self, index: int) -> None:
+        rng = random.Random(index)
+        conn = http.client.HTTPConnection("127.0.0.1", self.service.port, timeout=30)
+        session_id = None
+        while not self._stopping.wait(rng.expovariate(self.args.actions_per_second)):
+            roll = rng.random()
+            if roll < 0.15:
+                # A bounded catalogue keeps resolution cache misses realistic.
+                body = f"v=video{rng.randrange(self.args.catalogue)}"
+                if rng.random() < 0.2:
+                    # Queues of a few hundred tracks exercise the chunked tracklist.add path.
+                    body += "&videoIds=" + ",".join(f"video{rng.randrange(self.args.catalogue)}" for _ in range(250))
+                request = ("POST", "/apps/YouTube", body)
+            elif roll < 0.20:
+                request = ("DELETE", "/apps/YouTube", "")
+            elif roll < 0.25 or session_id is None:
+                if session_id is not None:
+                    self._request(conn, "DELETE", f"/session/{session_id}", "")
+                reply = self._request(conn, "POST", "/session", f"name=phone-{index}")
+                session_id = json.loads(reply)["sessionId"] if reply else None
+                continue
+            elif roll < 0.40:
+                request = ("GET", f"/session/{session_id}/events?timeout=0", "")
+            elif roll < 0.55:
+                command = rng.choice(["pause", "resume", "next", "seek", "volume"])
+                body = f"sessionId={session_id}&position={rng.randrange(300_000)}&volume={rng.randrange(101)}"
+                request = ("POST", f"/control/{command}", body)
+            else:
+                request = ("GET", rng.choice(["/apps/YouTube", "/ssdp/device-desc.xml", "/playback"]), "")
+            self._request(conn, *request)
+        conn.close()
+
+    def _request(self, conn: http.client.HTTPConnection, method: str, path: str, body: str) -> bytes | None:
+        try:
+            headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+            conn.request(method, path, body=body or None, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            payload, ok = None, False
+        with self._lock:
+            self.requests += 1
+            self.errors += not ok
+        return payload if ok else None
+
+    def _searches(self) -> None:
+        senders = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(8)]
+        for sender in senders:
+            sender.setblocking(False)
+        target = ("127.0.0.1", self.service._ssdp._socket.getsockname()[1])
+        datagram = _SEARCH.encode()
+        while not self._stopping.wait(1 / self.args.ssdp_rate):
+            sender = random.choice(senders)
+            try:
+                sender.sendto(datagram, target)
+                while True:
+                    sender.recv(2048)  # drain replies so the socket buffer never fills
+            except (BlockingIOError, OSError):
+                pass
+            self.datagrams += 1
+        for sender in senders:
+            sender.close()
+
+
+def _sample(started: float) -> Sample:
+    gc.collect()
+    return Sample(
+        elapsed=round(time.monotonic() - started, 1),
+        traced_kb=round(tracemalloc.get_traced_memory()[0] / 1024, 1),
+        threads=threading.active_count(),
+        fds=open_fds() or 0,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3600.0, help="Soak duration")
+    parser.add_argument("--warmup", type=float, default=120.0, help="Seconds of samples to ignore at the start")
+    parser.add_argument("--sample-interval", type=float, default=30.0)
+    parser.add_argument("--clients", type=int, default=8, help="Simulated phones")
+    parser.add_argument("--actions-per-second", type=float, default=2.0, help="Mean request rate per phone")
+    parser.add_argument("--ssdp-rate", type=float, default=20.0, help="M-SEARCH datagrams per second")
+    parser.add_argument("--catalogue", type=int, default=2000, help="Distinct video IDs cast")
+    parser.add_argument("--mopidy-latency", type=float, default=0.002)
+    parser.add_argument("--tracemalloc-frames", type=int, default=1, help="Frames kept per allocation")
+    parser.add_argument("--max-memory-growth", type=float, default=1024.0, help="KiB of traced memory")
+    parser.add_argument("--max-thread-growth", type=int, default=0)
+    parser.add_argument("--max-fd-growth", type=int, default=2)
+    parser.add_argument("--top", type=int, default=10, help="Allocation sites with the most growth to report")
+    args = parser.parse_args()
+
+    tracemalloc.start(args.tracemalloc_frames)
+    stub = StubMopidyServer(latency=args.mopidy_latency, history=16).start()
+    service = DialService(
+        host="127.0.0.1",
+        port=0,
+        ssdp_port=0,
+        mopidy_rpc_url=stub.rpc_url,
+        state_reconcile_interval=5.0,
+        launch_dedupe_window=0.5,
+    )
+    service.start()
+    traffic = _Traffic(service, args)
+    started = time.monotonic()
+    traffic.start()
+    samples: List[Sample] = []
+    baseline = None
+    try:
+        while time.monotonic() - started < args.seconds:
+            time.sleep(min(args.sample_interval, max(0.0, args.seconds - (time.monotonic() - started))))
+            samples.append(_sample(started))
+            if baseline is None and samples[-1].elapsed >= args.warmup:
+                baseline = tracemalloc.take_snapshot()
+            print(json.dumps(asdict(samples[-1])), file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        final = tracemalloc.take_snapshot()
+        traffic.stop()
+        service.stop()
+        stub.stop()
+
+    measured = [sample for sample in samples if sample.elapsed >= args.warmup]
+    growth = {
+        "traced_kb": sustained_growth([sample.traced_kb for sample in measured]),
+        "threads": sustained_growth([sample.threads for sample in measured]),
+        "fds": sustained_growth([sample.fds for sample in measured]),
+    }
+    limits = {"traced_kb": args.max_memory_growth, "threads": args.max_thread_growth, "fds": args.max_fd_growth}
+    failures = [
+        f"{name} grew by {growth[name]:g} (limit {limits[name]:g})" for name in growth if growth[name] > limits[name]
+    ]
+    if len(measured) < 4:
+        failures.append(f"only {len(measured)} samples after warmup; run longer or sample more often")
+    top: List[Dict[str, object]] = []
+    if baseline is not None:
+        top = [
+            {"site": str(stat.traceback), "growth_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+            for stat in final.compare_to(baseline, "lineno")[: args.top]
+        ]
+    report = {
+        "seconds": round(time.monotonic() - started, 1),
+        "requests": traffic.requests,
+        "errors": traffic.errors,
+        "datagrams": traffic.datagrams,
+        "launches": service._youtube_app.launch_count,
+        "samples": len(samples),
+        "growth": growth,
+        "failures": failures,
+        "top_allocation_growth": top,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
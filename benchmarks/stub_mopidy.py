@@ -0,0 +1,108 @@
+"""Local stub of Mopidy's HTTP JSON-RPC endpoint for benchmarks."""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The receiver drops pooled connections when it shuts down, idle or mid-call.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubMopidyServer:
+    """Serve ``/mopidy/rpc`` over keep-alive HTTP/1.1 and record recent calls.
+
+    ``latency`` (plus up to ``jitter`` extra seconds) is slept before every
+    reply, and a ``failure_rate`` fraction of calls get a JSON-RPC error.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        history: int = 10_000,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls: Deque[Dict] = deque(maxlen=history)
+        self.call_count = 0
+        self.failure_count = 0
+        self._lock = threading.Lock()
+        self._httpd = _StubHTTPServer((host, port), self._build_handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def rpc_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/mopidy/rpc"
+
+    def start(self) -> "StubMopidyServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def _respond(self, call: Dict) -> Dict:
+        failed = self.failure_rate > 0 and random.random() < self.failure_rate
+        with self._lock:
+            self.calls.append(call)
+            self.call_count += 1
+            self.failure_count += failed
+        if failed:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32000, "message": "injected"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": None}
+
+    def _build_handler(self):
+        stub = self
+
+        class StubHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):  # noqa: A003
+                return
+
+            def do_POST(self):  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"null")
+                delay = stub.latency + (random.uniform(0, stub.jitter) if stub.jitter else 0.0)
+                if delay:
+                    time.sleep(delay)
+                if isinstance(request, list):
+                    reply = [stub._respond(call) for call in request]
+                else:
+                    reply = stub._respond(request)
+                body = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return StubHandler
+
+
+__all__ = ["StubMopidyServer"]
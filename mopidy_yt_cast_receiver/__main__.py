@@ -3,20 +3,39 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import logging
+import os
 import time
 
+from .aio import AsyncDialRuntime
+from .capture import CaptureLog
 from .dial import DialService
+from .prefork import PreforkServer
+from .receivers import MultiReceiverService, load_receivers
+from .resilience import CircuitBreaker, RetryPolicy
+from .resolver import ResolutionCache
+from .server import REJECT, WAIT, ServerOptions
 
 logging.basicConfig(level=logging.INFO)
 LOGGER = logging.getLogger(__name__)
 
+# Start of the receiver once its modules are imported; startup timings count from here.
+_STARTED_AT = time.monotonic()
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="YouTube Music DIAL receiver for Mopidy")
     parser.add_argument("--host", default="0.0.0.0", help="HTTP bind address")
     parser.add_argument("--port", type=int, default=8009, help="HTTP port for DIAL endpoints")
     parser.add_argument("--ssdp-port", type=int, default=1900, help="UDP port used for SSDP responses")
+    parser.add_argument(
+        "--ssdp-interface",
+        action="append",
+        dest="ssdp_interfaces",
+        metavar="ADDRESS",
+        help="IPv4 address of an interface to join the SSDP multicast group on (repeatable)",
+    )
     parser.add_argument(
         "--friendly-name",
         default="Mopidy YouTube Music",
@@ -27,6 +46,90 @@ def main() -> None:
         default="http://127.0.0.1:6680/mopidy/rpc",
         help="Mopidy HTTP JSON-RPC endpoint",
     )
+    parser.add_argument(
+        "--mopidy-transport",
+        choices=("http", "websocket"),
+        default="http",
+        help="Send commands over HTTP POSTs, or over Mopidy's WebSocket which also delivers playback events",
+    )
+    parser.add_argument(
+        "--state-reconcile-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between full playback state syncs with Mopidy (0 disables; events still apply)",
+    )
+    parser.add_argument(
+        "--mopidy-failure-threshold",
+        type=int,
+        default=5,
+        help="Consecutive failed Mopidy calls before launches fail fast with 503",
+    )
+    parser.add_argument(
+        "--mopidy-reset-timeout",
+        type=float,
+        default=5.0,
+        help="Seconds before a trial call (or the core.get_version health probe) may close the circuit",
+    )
+    parser.add_argument(
+        "--mopidy-retries",
+        type=int,
+        default=2,
+        help="Extra attempts, with jittered backoff, for idempotent Mopidy calls",
+    )
+    parser.add_argument(
+        "--resolution-cache-size",
+        type=int,
+        default=512,
+        help="Resolved YouTube tracks kept so repeat casts are not looked up again",
+    )
+    parser.add_argument(
+        "--resolution-cache-ttl",
+        type=float,
+        default=6 * 3600,
+        help="Seconds a resolved track stays cached",
+    )
+    parser.add_argument(
+        "--launch-dedupe-window",
+        type=float,
+        default=2.0,
+        help="Seconds during which an identical repeated launch reuses the previous launch (0 disables)",
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=32,
+        help="Paired phones that may hold a remote session at once",
+    )
+    parser.add_argument(
+        "--session-poll-timeout",
+        type=float,
+        default=25.0,
+        help="Longest time a session long-poll waits for an event before answering empty",
+    )
+    parser.add_argument(
+        "--receivers-config",
+        metavar="PATH",
+        help="TOML file of [[receiver]] tables; serves one virtual receiver per room under /<name>/ "
+        "instead of a single receiver (other Mopidy options apply to every room)",
+    )
+    parser.add_argument(
+        "--capture",
+        metavar="PATH",
+        help="Append inbound DIAL requests, SSDP datagrams and outbound Mopidy calls to this log "
+        "(replay it with python -m benchmarks.replay)",
+    )
+    parser.add_argument(
+        "--state-dir",
+        metavar="DIR",
+        help="Keep the device identity, TV code, recent launches and sessions here so restarts are warm "
+        "(receiver.json, or <name>.json per receiver)",
+    )
+    parser.add_argument(
+        "--debug-token",
+        default=os.environ.get("YT_CAST_DEBUG_TOKEN"),
+        help="Bearer token that unlocks the /debug/profile sampling profiler (default: $YT_CAST_DEBUG_TOKEN; "
+        "disabled when unset)",
+    )
     parser.add_argument(
         "--pairing-code",
         help="Optional fixed TV code; defaults to a random 12-digit value",
@@ -37,26 +140,163 @@ def main() -> None:
         help="Reject launches unless a matching pairingCode parameter is provided",
     )
 
+    parser.add_argument(
+        "--runtime",
+        choices=("threads", "asyncio"),
+        default="threads",
+        help="Serve DIAL, SSDP and Mopidy traffic from threads or from a single asyncio event loop",
+    )
+    parser.add_argument(
+        "--http-workers",
+        type=int,
+        default=0,
+        help="Serve HTTP/1.1 keep-alive from a fixed pool of this many threads (0 = thread per request)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Serve HTTP from this many forked worker processes sharing the port via SO_REUSEPORT "
+        "(0 = serve from the main process; threads runtime only)",
+    )
+    parser.add_argument("--http-backlog", type=int, default=64, help="Listen backlog for the pooled server")
+    parser.add_argument(
+        "--http-queue-size", type=int, default=32, help="Accepted connections waiting for a pooled worker"
+    )
+    parser.add_argument(
+        "--http-idle-timeout", type=float, default=5.0, help="Seconds before idle keep-alive connections close"
+    )
+    parser.add_argument(
+        "--overload-policy",
+        choices=(REJECT, WAIT),
+        default=REJECT,
+        help="When the worker queue is full: answer 503 with Retry-After, or stop accepting",
+    )
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 503")
+
     args = parser.parse_args()
-    service = DialService(
+    if args.processes and args.runtime == "asyncio":
+        parser.error("--processes is only supported with the threads runtime")
+    server_options = None
+    if args.http_workers > 0:
+        server_options = ServerOptions(
+            workers=args.http_workers,
+            backlog=args.http_backlog,
+            queue_size=args.http_queue_size,
+            idle_timeout=args.http_idle_timeout,
+            overload_policy=args.overload_policy,
+            retry_after=args.retry_after,
+        )
+    if args.state_dir:
+        os.makedirs(args.state_dir, exist_ok=True)
+    capture = CaptureLog(args.capture) if args.capture else None
+    try:
+        _run(args, parser, server_options, capture)
+    finally:
+        if capture is not None:
+            capture.close()
+            LOGGER.info("Captured %d records to %s", capture.records, capture.path)
+
+
+def _run(
+    args: argparse.Namespace,
+    parser: argparse.ArgumentParser,
+    server_options: ServerOptions | None,
+    capture: CaptureLog | None,
+) -> None:
+    if args.receivers_config:
+        try:
+            receivers = load_receivers(args.receivers_config)
+        except (OSError, ValueError) as exc:
+            parser.error(f"Invalid receivers config: {exc}")
+        service: DialService | MultiReceiverService = MultiReceiverService(
+            [
+                _build_service(
+                    args, capture=capture, state_path=_state_path(args, receiver.name), **receiver.service_kwargs()
+                )
+                for receiver in receivers
+            ],
+            host=args.host,
+            port=args.port,
+            ssdp_port=args.ssdp_port,
+            ssdp_interfaces=args.ssdp_interfaces,
+            server_options=server_options,
+        )
+    else:
+        service = _build_service(
+            args,
+            friendly_name=args.friendly_name,
+            mopidy_rpc_url=args.rpc_url,
+            pairing_code=args.pairing_code,
+            server_options=server_options,
+            capture=capture,
+            state_path=_state_path(args, "receiver"),
+        )
+    if args.runtime == "asyncio":
+        try:
+            asyncio.run(_serve_async(service, args.http_idle_timeout))
+        except KeyboardInterrupt:
+            LOGGER.info("Stopping receiver...")
+        return
+
+    runner: DialService | MultiReceiverService | PreforkServer = service
+    if args.processes:
+        runner = PreforkServer(service, workers=args.processes, server_options=server_options)
+    runner.start()
+    _log_started(service)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        LOGGER.info("Stopping receiver...")
+    finally:
+        runner.stop()
+
+
+def _build_service(args: argparse.Namespace, **overrides) -> DialService:
+    """DialService configured from the command line; ``overrides`` set per-receiver options."""
+
+    options = dict(
         host=args.host,
         port=args.port,
-        friendly_name=args.friendly_name,
-        mopidy_rpc_url=args.rpc_url,
         ssdp_port=args.ssdp_port,
-        pairing_code=args.pairing_code,
         require_pairing_code=args.require_pairing_code,
+        ssdp_interfaces=args.ssdp_interfaces,
+        mopidy_transport=args.mopidy_transport,
+        state_reconcile_interval=args.state_reconcile_interval,
+        mopidy_breaker=CircuitBreaker(args.mopidy_failure_threshold, args.mopidy_reset_timeout),
+        mopidy_retry=RetryPolicy(attempts=args.mopidy_retries + 1),
+        resolution_cache=ResolutionCache(args.resolution_cache_size, args.resolution_cache_ttl),
+        launch_dedupe_window=args.launch_dedupe_window,
+        max_sessions=args.max_sessions,
+        session_poll_timeout=args.session_poll_timeout,
+        debug_token=args.debug_token,
+        started_at=_STARTED_AT,
     )
-    service.start()
+    options.update(overrides)
+    return DialService(**options)
+
+
+def _state_path(args: argparse.Namespace, name: str) -> str | None:
+    return os.path.join(args.state_dir, f"{name}.json") if args.state_dir else None
+
+
+async def _serve_async(service: DialService | MultiReceiverService, idle_timeout: float) -> None:
+    runtime = AsyncDialRuntime(service, idle_timeout=idle_timeout)
+    await runtime.start()
+    _log_started(service)
+    await runtime.serve_forever()
+
+
+def _log_started(service: DialService | MultiReceiverService) -> None:
     LOGGER.info("DIAL service available at %s", service.application_url)
+    if isinstance(service, MultiReceiverService):
+        for receiver in service.receivers.values():
+            LOGGER.info(
+                "%s at %s, TV code %s", receiver.friendly_name, receiver.application_url, receiver._pairing.formatted
+            )
+        return
     LOGGER.info("TV code for manual pairing: %s", service._pairing.formatted)
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        LOGGER.info("Stopping receiver...")
-    finally:
-        service.stop()
 
 
 if __name__ == "__main__":
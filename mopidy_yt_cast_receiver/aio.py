@@ -0,0 +1,658 @@
+"""Single-threaded asyncio runtime for the DIAL, SSDP and Mopidy traffic."""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import inspect
+import json
+import logging
+import socket
+import time
+from email.parser import BytesParser
+from email.utils import formatdate
+from http import HTTPStatus
+from http.client import HTTPMessage
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import urlsplit
+
+from .capture import CaptureLog
+from .control import ControlCommand, TransportControl
+from .dial import DeferredResponse, DialResponse, DialService
+from .metrics import MetricsRegistry
+from .mopidy import _UNREACHABLE, PLAY_NEXT, REPLACE, QueueRequest, RPCResponse, _JSONRPCCodec, launch_request
+from .playback import PlaybackMirror
+from .resilience import HALF_OPEN, CircuitBreaker, HealthProbe, RetryPolicy, is_idempotent
+from .receivers import MultiReceiverService
+from .resolver import TrackResolver
+from .ssdp import SSDPServer
+
+LOGGER = logging.getLogger(__name__)
+
+_SERVER_HEADER = "Mopidy-YT-Cast-Receiver asyncio"
+_MAX_HEADER_BYTES = 16 * 1024
+
+
+class _AsyncRPCConnection:
+    """One persistent HTTP/1.1 connection to Mopidy driven by asyncio streams."""
+
+    def __init__(self, url: str, timeout: float) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def post(self, body: bytes, *, idempotent: bool = False) -> Tuple[int, bytes]:
+        async with self._lock:
+            reused = self._writer is not None and not self._reader.at_eof()
+            if not reused:
+                self.close()
+            try:
+                try:
+                    await asyncio.wait_for(self._write(body), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # A reused socket may have been closed by Mopidy while idle; nothing went out yet.
+                    self.close()
+                    if not reused:
+                        raise
+                    return await asyncio.wait_for(self._exchange(body), self.timeout)
+                try:
+                    return await asyncio.wait_for(self._read(), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # Mopidy may have run the request before the socket died; only repeat safe calls.
+                    self.close()
+                    if not reused or not idempotent:
+                        raise
+                    return await asyncio.wait_for(self._exchange(body), self.timeout)
+            except BaseException:
+                self.close()
+                raise
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _exchange(self, body: bytes) -> Tuple[int, bytes]:
+        await self._write(body)
+        return await self._read()
+
+    async def _write(self, body: bytes) -> None:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer = self._writer
+        head = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        writer.write(head + body)
+        await writer.drain()
+
+    async def _read(self) -> Tuple[int, bytes]:
+        reader = self._reader
+        status_line, _, header_block = (await reader.readuntil(b"\r\n\r\n")).partition(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = BytesParser(_class=HTTPMessage).parsebytes(header_block)
+        if headers.get("Content-Length") is not None:
+            data = await reader.readexactly(int(headers["Content-Length"]))
+        elif headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = await self._read_chunked(reader)
+        else:
+            data = await reader.read()
+            self.close()
+        if headers.get("Connection", "").lower() == "close":
+            self.close()
+        return status, data
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks: List[bytes] = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+
+class AsyncMopidyClient(_JSONRPCCodec):
+    """Non-blocking counterpart of :class:`MopidyClient` for the event loop."""
+
+    def __init__(
+        self,
+        rpc_url: str,
+        *,
+        timeout: float = 2.0,
+        metrics: MetricsRegistry | None = None,
+        breaker: CircuitBreaker | None = None,
+        retry: RetryPolicy | None = None,
+        resolver: TrackResolver | None = None,
+        capture: CaptureLog | None = None,
+    ) -> None:
+        super().__init__(rpc_url, metrics, breaker, retry, resolver, capture)
+        self._connection = _AsyncRPCConnection(self.rpc_url, timeout)
+        self._queue_lock = asyncio.Lock()
+        self._streams: Set[asyncio.Task] = set()
+
+    async def handle_launch(self, params: Dict[str, str]) -> bool:
+        request = launch_request(params)
+        if request is None:
+            return True
+        return await self.play_queue(request)
+
+    async def play_uri(self, uri: str, title: Optional[str] = None) -> bool:
+        return await self.play_queue(QueueRequest([uri]))
+
+    async def play_queue(self, request: QueueRequest) -> bool:
+        """Same contract as :meth:`MopidyClient.play_queue`; later chunks stream in from a task."""
+
+        position = None
+        if request.mode == PLAY_NEXT:
+            position = self._next_position(await self.call("core.tracklist.index"))
+        async with self._queue_lock:
+            if request.mode == REPLACE:
+                self._queue_generation += 1
+            generation = self._queue_generation
+            calls, add_index, head, tail = self._queue_plan(request, position)
+            if tail:
+                self._prefetch(tail[0])
+            responses = await self.batch(calls)
+        self._remember_added(head, responses[add_index])
+        ok = all(response.ok for response in responses)
+        if ok:
+            next_position = self._advance(position, head, responses[add_index])
+            next_position = await self._skip_to_start(request.skip_to, head, responses[add_index], next_position)
+        if ok and tail:
+            stream = self._stream_chunks(generation, tail, next_position, request.skip_to)
+            task = asyncio.get_running_loop().create_task(stream)
+            self._streams.add(task)
+            task.add_done_callback(self._streams.discard)
+        return ok
+
+    async def call(self, method: str, params: Optional[Dict] = None) -> RPCResponse:
+        response = self._to_response(method, await self._post(self._rpc_payload(method, params or {})))
+        self._count_failures([response])
+        return response
+
+    async def batch(self, calls: Sequence[Tuple[str, Dict]]) -> List[RPCResponse]:
+        payloads = [self._rpc_payload(method, params) for method, params in calls]
+        if not payloads:
+            return []
+
+        responses = None
+        if self._batch_supported:
+            responses = self._correlate(payloads, await self._post(payloads))
+        if responses is None:
+            responses = [self._to_response(p["method"], await self._post(p)) for p in payloads]
+        self._count_failures(responses)
+        return responses
+
+    def close(self) -> None:
+        for task in list(self._streams):
+            task.cancel()
+        self._connection.close()
+
+    async def _stream_chunks(
+        self, generation: int, chunks: List[List[str]], position: Optional[int], skip_to: Optional[str] = None
+    ) -> None:
+        for index, chunk in enumerate(chunks):
+            if index + 1 < len(chunks):
+                self._prefetch(chunks[index + 1])
+            async with self._queue_lock:
+                if generation != self._queue_generation:
+                    return
+                response = await self.call("core.tracklist.add", self._add_params(chunk, position))
+            if not response.ok:
+                LOGGER.warning("Stopped queueing after a failed tracklist.add: %s", response.error)
+                return
+            self._remember_added(chunk, response)
+            position = await self._skip_to_start(skip_to, chunk, response, self._advance(position, chunk, response))
+
+    async def _skip_to_start(
+        self, skip_to: Optional[str], uris: List[str], added: RPCResponse, position: Optional[int]
+    ) -> Optional[int]:
+        tlids = self._entries_to_skip(skip_to, uris, added)
+        if not tlids:
+            return position
+        await self.call("core.tracklist.remove", {"criteria": {"tlid": tlids}})
+        return None if position is None else position - len(tlids)
+
+    async def _post(self, payload: Any) -> Any:
+        data = json.dumps(payload).encode()
+        if not self._admit():
+            return None
+        reply = None
+        for delay in self._attempt_delays(payload):
+            if delay:
+                await asyncio.sleep(delay)
+            reply = await self._send(payload, data)
+            if reply is not None:
+                break
+        self._record(reply)
+        return reply
+
+    async def _send(self, payload: Any, data: bytes) -> Any:
+        started = time.perf_counter()
+        try:
+            status, body = await self._connection.post(data, idempotent=is_idempotent(payload))
+        except (OSError, EOFError, ValueError, IndexError) as exc:
+            LOGGER.debug("Mopidy JSON-RPC request failed: %s", exc)
+            return None
+        finally:
+            self._observe(payload, started)
+        return self._decode(status, body)
+
+
+LaunchTask = Callable[[], Union[bool, Awaitable[bool]]]
+
+
+class AsyncLaunchExecutor:
+    """Event-loop version of :class:`LaunchExecutor` with the same latest-wins slot."""
+
+    def __init__(self) -> None:
+        self._pending: Optional[Tuple[LaunchTask, Callable[[bool], None], Callable[[], None]]] = None
+        self._worker: asyncio.Task | None = None
+
+    def submit(
+        self,
+        task: LaunchTask,
+        on_done: Callable[[bool], None],
+        on_superseded: Callable[[], None],
+    ) -> None:
+        superseded, self._pending = self._pending, (task, on_done, on_superseded)
+        if superseded is not None:
+            superseded[2]()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def wait_idle(self) -> None:
+        while self._worker is not None and not self._worker.done():
+            await asyncio.shield(self._worker)
+
+    def discard_pending(self) -> None:
+        dropped, self._pending = self._pending, None
+        if dropped is not None:
+            dropped[2]()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.discard_pending()
+        if self._worker is not None:
+            self._worker.cancel()
+
+    async def _run(self) -> None:
+        while self._pending is not None:
+            task, on_done, _ = self._pending
+            self._pending = None
+            try:
+                result = task()
+                ok = bool(await result if inspect.isawaitable(result) else result)
+            except Exception:  # noqa: BLE001 - a failed launch must not kill the worker
+                LOGGER.exception("Launch failed")
+                ok = False
+            on_done(ok)
+
+
+class AsyncTransportControl(TransportControl):
+    """Event-loop version of :class:`TransportControl`; ``send`` is a coroutine such as ``AsyncMopidyClient.batch``.
+
+    Commands are coalesced the same way and flushed by a loop task, so
+    ``submit`` must be called on the loop.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[Tuple[str, Dict]]], Awaitable[Sequence[RPCResponse]]],
+        *,
+        metrics: MetricsRegistry | None = None,
+        max_pending: int = 64,
+    ) -> None:
+        super().__init__(send, metrics=metrics, max_pending=max_pending)  # type: ignore[arg-type]
+        self._worker: asyncio.Task | None = None
+
+    async def wait_idle(self) -> None:  # type: ignore[override]
+        while self._worker is not None and not self._worker.done():
+            await asyncio.shield(self._worker)
+
+    def stop(self, timeout: float | None = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping or not self._pending:
+                    return
+                batch: List[ControlCommand] = self._take()
+            try:
+                self._report(batch, await self._send(self._calls(batch)))
+            except Exception:  # noqa: BLE001 - keep serving later commands
+                LOGGER.exception("Sending transport commands failed")
+            finally:
+                self._idle()
+
+
+class _LoopBridge:
+    """Blocking ``call``/``batch`` over an :class:`AsyncMopidyClient`, for the threads the asyncio runtime keeps.
+
+    Must not be called from the loop itself, which would wait on its own work.
+    """
+
+    def __init__(self, client: AsyncMopidyClient, loop: asyncio.AbstractEventLoop, timeout: float = 10.0) -> None:
+        self._client = client
+        self._loop = loop
+        self._timeout = timeout
+
+    @property
+    def available(self) -> bool:
+        return self._client.available
+
+    def call(self, method: str, params: Optional[Dict] = None) -> RPCResponse:
+        return self._wait(self._client.call(method, params), lambda: RPCResponse(method, error=_UNREACHABLE))
+
+    def batch(self, calls: Sequence[Tuple[str, Dict]]) -> List[RPCResponse]:
+        return self._wait(
+            self._client.batch(calls), lambda: [RPCResponse(method, error=_UNREACHABLE) for method, _ in calls]
+        )
+
+    def close(self) -> None:
+        pass
+
+    def _wait(self, coroutine: Awaitable[Any], unreachable: Callable[[], Any]) -> Any:
+        try:
+            future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        except RuntimeError:  # the loop has already closed
+            coroutine.close()
+            return unreachable()
+        try:
+            return future.result(self._timeout)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            future.cancel()
+            return unreachable()
+
+
+async def _follow_playback(mirror: PlaybackMirror, client: AsyncMopidyClient, interval: float) -> None:
+    """The asyncio runtime's reconcile loop: every ``interval`` seconds, or sooner on ``mirror.refresh()``."""
+
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def refresh() -> None:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    mirror.on_refresh(refresh)
+    task = asyncio.current_task()
+    # On Python 3.11 wait_for() drops a cancel that lands as its awaitable finishes, so check for one each round.
+    while not task.cancelling():
+        try:
+            await mirror.reconcile_async(client)
+        except Exception:  # noqa: BLE001 - keep reconciling
+            LOGGER.exception("Reconciling with Mopidy failed")
+        try:
+            await asyncio.wait_for(wake.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+
+
+async def _probe_health(probe: HealthProbe, client: AsyncMopidyClient) -> None:
+    """:class:`HealthProbe` as a loop task, probing through the async client."""
+
+    task = asyncio.current_task()
+    while not task.cancelling():
+        await asyncio.sleep(probe.interval)
+        if probe.breaker.state == HALF_OPEN:
+            try:
+                await client.call("core.get_version")
+            except Exception:  # noqa: BLE001 - the probe must keep running
+                LOGGER.exception("Mopidy health probe failed")
+
+
+class _SSDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, ssdp: SSDPServer, sock: socket.socket) -> None:
+        self._ssdp = ssdp
+        self._sock = sock
+        self._transport: asyncio.DatagramTransport | None = None
+        self._announcer: asyncio.Task | None = None
+
+    def connection_made(self, transport) -> None:  # type: ignore[override]
+        self._transport = transport
+        self._announcer = asyncio.get_running_loop().create_task(self._announce_periodically())
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        reply = self._ssdp.handle_datagram(data, addr)
+        if reply is None:
+            return
+        if reply.delay:
+            asyncio.get_running_loop().call_later(reply.delay, self._send, reply.datagrams, addr)
+        else:
+            self._send(reply.datagrams, addr)
+
+    def close(self) -> None:
+        if self._announcer is not None:
+            self._announcer.cancel()
+        self._ssdp.announce(self._sock, alive=False)
+        if self._transport is not None:
+            self._transport.close()
+
+    def _send(self, datagrams, addr) -> None:
+        if self._transport is not None and not self._transport.is_closing():
+            for datagram in datagrams:
+                self._transport.sendto(datagram, addr)
+
+    async def _announce_periodically(self) -> None:
+        rounds = 0
+        while True:
+            self._ssdp.announce(self._sock)
+            rounds += 1
+            await asyncio.sleep(self._ssdp.next_announce_delay(rounds))
+
+
+class AsyncDialRuntime:
+    """Serve a :class:`DialService` from one event loop instead of threads.
+
+    A :class:`MultiReceiverService` works too; each of its receivers gets its
+    own async Mopidy client. HTTP requests go through ``handle_request``, so
+    routes behave exactly as with the threaded server. Connections are
+    HTTP/1.1 keep-alive and close after ``idle_timeout`` seconds of inactivity.
+
+    Launches, transport control, playback reconciliation and the Mopidy
+    health probe run as loop tasks on the async client. The runtime is not
+    thread-free: the track resolver's prefetch, state snapshots and, with
+    ``--mopidy-transport websocket``, the event stream keep their threads.
+    Over HTTP the resolver's lookups are handed to the loop, so the blocking
+    Mopidy client is closed and only the async client talks to Mopidy.
+    """
+
+    def __init__(self, service: DialService | MultiReceiverService, *, idle_timeout: float = 5.0) -> None:
+        self.service = service
+        self.idle_timeout = idle_timeout
+        self._server: asyncio.Server | None = None
+        self._ssdp_protocol: _SSDPProtocol | None = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._stopped: asyncio.Event | None = None
+        self._shutdown: asyncio.Task | None = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        service = self.service
+        for receiver in self._receivers:
+            mopidy = AsyncMopidyClient(
+                receiver.mopidy_rpc_url,
+                metrics=receiver.metrics,
+                breaker=receiver.mopidy_breaker,
+                retry=receiver.mopidy_retry,
+                resolver=receiver.resolver,
+                capture=receiver.capture,
+            )
+            receiver.use_launch_backend(AsyncLaunchExecutor(), mopidy)
+            self._start_loop_tasks(receiver, mopidy)
+
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_server(
+            self._serve_connection, service.host, service.port, limit=_MAX_HEADER_BYTES
+        )
+        service._bind_port(self._server.sockets[0].getsockname()[1])
+
+        ssdp = service._ssdp = service._create_ssdp()
+        sock = ssdp.open_socket()
+        sock.setblocking(False)
+        loop = asyncio.get_running_loop()
+        _, self._ssdp_protocol = await loop.create_datagram_endpoint(lambda: _SSDPProtocol(ssdp, sock), sock=sock)
+
+    def _start_loop_tasks(self, receiver: DialService, mopidy: AsyncMopidyClient) -> None:
+        """Run what ``start_playback_sync`` runs in threads as tasks on this loop instead."""
+
+        loop = asyncio.get_running_loop()
+        receiver.control = AsyncTransportControl(mopidy.batch, metrics=receiver.metrics)
+        if receiver._mopidy_events is not None:
+            # The WebSocket event stream stays on its own thread; lookups keep using it.
+            receiver._mopidy_events.start()
+        else:
+            blocking, receiver._state_client = receiver._state_client, _LoopBridge(mopidy, loop)
+            blocking.close()
+        coroutines = [_probe_health(receiver._health_probe, mopidy)]
+        if receiver._state_reconcile_interval > 0:
+            coroutines.append(_follow_playback(receiver.playback, mopidy, receiver._state_reconcile_interval))
+        self._tasks.extend(loop.create_task(coroutine) for coroutine in coroutines)
+
+    async def stop(self) -> None:
+        """Shut down, or wait for the shutdown already under way; every caller returns once it is finished."""
+
+        if self._stopped is None:
+            return
+        if self._shutdown is None:
+            self._stopped.set()
+            self._shutdown = asyncio.get_running_loop().create_task(self._close())
+        await asyncio.shield(self._shutdown)
+
+    async def _close(self) -> None:
+        # Answer parked long-polls while their connections are still open.
+        for receiver in self._receivers:
+            receiver.sessions.close()
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._connections):
+            writer.close()
+        if self._ssdp_protocol is not None:
+            self._ssdp_protocol.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        for receiver in self._receivers:
+            receiver.control.stop()
+            receiver.profiler.stop()
+            receiver._launcher.stop()
+            if receiver.state_store is not None:
+                receiver.state_store.close()
+            receiver._mopidy.close()
+        await asyncio.get_running_loop().run_in_executor(None, self.service.stop_playback_sync)
+
+    @property
+    def _receivers(self) -> List[DialService]:
+        if isinstance(self.service, MultiReceiverService):
+            return list(self.service.receivers.values())
+        return [self.service]
+
+    async def serve_forever(self) -> None:
+        """Run until :meth:`stop` is called or the task is cancelled."""
+
+        if self._server is None:
+            await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.stop()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, _, header_block = head.partition(b"\r\n")
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    headers = BytesParser(_class=HTTPMessage).parsebytes(header_block)
+                    length = int(headers.get("Content-Length") or 0)
+                except ValueError:
+                    writer.write(_serialize(_bad_request(), "HTTP/1.0", keep_alive=False))
+                    return
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), self.idle_timeout) if length else b""
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+                response = self.service.handle_request(method, target, headers, body)
+                if isinstance(response, DeferredResponse):
+                    response = await _complete(response)
+                keep_alive = _wants_keep_alive(version, headers.get("Connection", ""))
+                writer.write(_serialize(response, version, keep_alive=keep_alive, head_only=method == "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            return
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+
+async def _complete(deferred: DeferredResponse) -> DialResponse:
+    """Wait on the loop, without a thread, for a response completed from any thread."""
+
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[DialResponse] = loop.create_future()
+
+    def resolve(response: DialResponse) -> None:
+        if not future.done():
+            future.set_result(response)
+
+    deferred.start(lambda response: loop.call_soon_threadsafe(resolve, response))
+    return await future
+
+
+def _wants_keep_alive(version: str, connection: str) -> bool:
+    connection = connection.lower()
+    if version == "HTTP/1.1":
+        return "close" not in connection
+    return "keep-alive" in connection
+
+
+def _bad_request() -> DialResponse:
+    return DialResponse(400, [("Content-Length", "0")])
+
+
+def _serialize(response: DialResponse, version: str, *, keep_alive: bool, head_only: bool = False) -> bytes:
+    lines = [
+        f"{'HTTP/1.1' if version == 'HTTP/1.1' else 'HTTP/1.0'} {response.status} {HTTPStatus(response.status).phrase}",
+        f"Server: {_SERVER_HEADER}",
+        f"Date: {formatdate(usegmt=True)}",
+    ]
+    lines.extend(f"{name}: {value}" for name, value in response.headers)
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head if head_only else head + response.body
+
+
+__all__ = ["AsyncDialRuntime", "AsyncLaunchExecutor", "AsyncMopidyClient", "AsyncTransportControl"]
@@ -0,0 +1,120 @@
+"""Append-only capture of inbound DIAL/SSDP traffic and outbound Mopidy calls, for offline replay."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Record kinds (the ``k`` field of every line).
+START = "start"
+RECEIVER = "receiver"
+HTTP = "http"
+SSDP = "ssdp"
+RPC = "rpc"
+
+# Request headers that change how a request is answered; the rest are not kept.
+_HEADERS = ("Content-Type", "If-None-Match", "Origin", "User-Agent")
+
+
+class CaptureLog:
+    """Write one compact JSON object per line for every captured event.
+
+    ``t`` is the number of seconds since the log was opened, from the
+    monotonic clock, so replay can reproduce the spacing of the original
+    traffic. Lines are appended with a single write each, so a crash loses
+    at most the event being written. Bodies and datagrams longer than
+    ``max_body`` bytes are truncated. The log holds TV pairing codes, which
+    replay needs, so it is readable by its owner only.
+    """
+
+    def __init__(self, path: str, *, max_body: int = 4096) -> None:
+        self.path = path
+        self.max_body = max_body
+        self.records = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        if hasattr(os, "fchmod"):
+            # An existing log may have been created with a wider mode.
+            os.fchmod(fd, 0o600)
+        self._file = os.fdopen(fd, "ab", buffering=0)
+        self._write({"k": START, "version": FORMAT_VERSION, "wall": time.time()})
+
+    def receiver(self, prefix: str, *, udn: str, friendly_name: str, pairing_code: str) -> None:
+        """Describe a receiver so replay can recreate it with the same identity and TV code."""
+
+        self._write(
+            {"k": RECEIVER, "prefix": prefix, "udn": udn, "name": friendly_name, "pairing": pairing_code}
+        )
+
+    def http(
+        self,
+        method: str,
+        target: str,
+        headers: Mapping[str, str],
+        body: bytes,
+        status: int,
+        location: Optional[str] = None,
+    ) -> None:
+        record: Dict[str, Any] = {"k": HTTP, "m": method, "p": target, "s": status}
+        kept = {name: headers[name] for name in _HEADERS if headers.get(name)}
+        if kept:
+            record["h"] = kept
+        if body:
+            record["b"] = body[: self.max_body].decode("utf-8", errors="replace")
+        if location:
+            record["l"] = location
+        self._write(record)
+
+    def ssdp(self, data: bytes, addr: Tuple[str, int] | None, outcome: str) -> None:
+        record: Dict[str, Any] = {"k": SSDP, "d": data[: self.max_body].decode("latin-1"), "o": outcome}
+        if addr is not None:
+            record["a"] = [addr[0], addr[1]]
+        self._write(record)
+
+    def rpc(self, method: str, params: Mapping[str, Any]) -> None:
+        self._write({"k": RPC, "m": method, "a": params})
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        record["t"] = round(time.monotonic() - self._started, 6)
+        line = json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            try:
+                self._file.write(line)
+            except OSError:
+                LOGGER.exception("Failed to write to capture log %s", self.path)
+                return
+            self.records += 1
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a capture log in order, skipping a torn last line."""
+
+    with open(path, "rb") as handle:
+        for number, line in enumerate(handle, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                LOGGER.warning("Skipping unreadable line %d of %s", number, path)
+                continue
+            if record.get("k") == START and record.get("version", FORMAT_VERSION) > FORMAT_VERSION:
+                raise ValueError(f"{path} was written by a newer capture format")
+            yield record
+
+
+__all__ = ["HTTP", "RECEIVER", "RPC", "SSDP", "START", "CaptureLog", "read_capture"]
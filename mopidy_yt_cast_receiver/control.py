@@ -0,0 +1,167 @@
+"""Playback transport commands (pause, seek, volume, ...) sent to Mopidy as coalesced batches."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import MetricsRegistry
+
+LOGGER = logging.getLogger(__name__)
+
+Send = Callable[[Sequence[Tuple[str, Dict]]], Sequence[Any]]
+
+# Command name -> (Mopidy method, request parameter, Mopidy parameter, allowed range).
+_COMMANDS: Dict[str, Tuple[str, Optional[str], Optional[str], Tuple[int, int]]] = {
+    "play": ("core.playback.play", None, None, (0, 0)),
+    "pause": ("core.playback.pause", None, None, (0, 0)),
+    "resume": ("core.playback.resume", None, None, (0, 0)),
+    "stop": ("core.playback.stop", None, None, (0, 0)),
+    "next": ("core.playback.next", None, None, (0, 0)),
+    "previous": ("core.playback.previous", None, None, (0, 0)),
+    "seek": ("core.playback.seek", "position", "time_position", (0, 24 * 3600 * 1000)),
+    "volume": ("core.mixer.set_volume", "volume", "volume", (0, 100)),
+}
+# Only the latest of a run of these matters; skips add up and are never merged.
+_COALESCED = frozenset({"play", "pause", "resume", "stop", "seek", "volume"})
+
+COMMANDS = tuple(_COMMANDS)
+
+
+@dataclass(slots=True)
+class ControlCommand:
+    """One transport command ready to send as a JSON-RPC call."""
+
+    name: str
+    method: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def parse_command(name: str, params: Dict[str, str]) -> ControlCommand:
+    """Build a command from request parameters; raises ``ValueError`` for bad input.
+
+    ``seek`` takes ``position`` in milliseconds and ``volume`` takes
+    ``volume`` from 0 to 100.
+    """
+
+    if name not in _COMMANDS:
+        raise ValueError(f"Unknown command {name!r}")
+    method, param, mopidy_param, (low, high) = _COMMANDS[name]
+    if param is None:
+        return ControlCommand(name, method)
+    try:
+        number = float(params[param])
+    except (KeyError, ValueError):
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError(f"{name} needs a numeric {param!r} parameter")
+    return ControlCommand(name, method, {mopidy_param: max(low, min(int(number), high))})
+
+
+class TransportControl:
+    """Send transport commands from one thread, collapsing rapid-fire input.
+
+    Commands queue while a batch is in flight. A command replaces the queued
+    one before it when both are the same coalescible command, so dragging a
+    volume slider or scrubbing sends only the latest value. Everything queued
+    goes out together as one JSON-RPC batch over ``send`` (the client's
+    persistent connection), in order.
+    """
+
+    def __init__(self, send: Send, *, metrics: MetricsRegistry | None = None, max_pending: int = 64) -> None:
+        self._send = send
+        self.max_pending = max_pending
+        self._pending: List[ControlCommand] = []
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._commands = (
+            metrics.counter("control_commands_total", "Transport commands by outcome.", ("command", "result"))
+            if metrics is not None
+            else None
+        )
+
+    def submit(self, command: ControlCommand) -> Optional[bool]:
+        """Queue ``command``; ``True`` if it replaced a queued one, ``None`` if the queue is full."""
+
+        with self._cond:
+            if self._stopping:
+                return None
+            coalesced = bool(self._pending) and command.name in _COALESCED and self._pending[-1].name == command.name
+            if coalesced:
+                self._pending[-1] = command
+            elif len(self._pending) >= self.max_pending:
+                self._count(command.name, "rejected")
+                return None
+            else:
+                self._pending.append(command)
+            self._ensure_worker()
+            self._cond.notify_all()
+        if coalesced:
+            self._count(command.name, "coalesced")
+        return coalesced
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _ensure_worker(self) -> None:
+        # Called with the condition held.
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="transport-control", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                batch = self._take()
+            try:
+                self._report(batch, self._send(self._calls(batch)))
+            except Exception:  # noqa: BLE001 - keep serving later commands
+                LOGGER.exception("Sending transport commands failed")
+            finally:
+                self._idle()
+
+    def _take(self) -> List[ControlCommand]:
+        # Called with the condition held.
+        batch, self._pending = self._pending, []
+        self._busy = bool(batch)
+        return batch
+
+    @staticmethod
+    def _calls(batch: List[ControlCommand]) -> List[Tuple[str, Dict]]:
+        return [(command.method, command.params) for command in batch]
+
+    def _report(self, batch: List[ControlCommand], responses: Sequence[Any]) -> None:
+        for command, response in zip(batch, responses):
+            self._count(command.name, "sent" if response.ok else "failed")
+            if not response.ok:
+                LOGGER.warning("Mopidy rejected %s: %s", command.method, response.error)
+
+    def _idle(self) -> None:
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
+
+    def _count(self, command: str, result: str) -> None:
+        if self._commands is not None:
+            self._commands.inc(command, result)
+
+
+__all__ = ["COMMANDS", "ControlCommand", "TransportControl", "parse_command"]
@@ -2,21 +2,63 @@
 
 from __future__ import annotations
 
+import hashlib
+import hmac
 import json
 import logging
+import math
 import threading
+import time
 import uuid
+from dataclasses import dataclass, field
+from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Dict
-from urllib.parse import parse_qs, urlparse
-
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import ParseResult, parse_qs, urlparse
+
+from .capture import CaptureLog
+from .control import COMMANDS, TransportControl, parse_command
+from .launcher import LaunchExecutor
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .metrics import MetricsRegistry
 from .mopidy import MopidyClient
 from .pairing import PairingCode
-from .ssdp import SSDPServer
-from .youtube import YouTubeCastApp
+from .playback import PlaybackMirror
+from .profiling import SamplingProfiler, register_process_metrics
+from .resilience import OPEN, CircuitBreaker, HealthProbe, RetryPolicy
+from .resolver import ResolutionCache, TrackResolver
+from .server import ParkingHTTPServer, PooledHTTPServer, ServerOptions
+from .session import NOW_PLAYING, Session, SessionHub
+from .ssdp import SSDPServer, SSDPStats
+from .state import ReceiverState, StateStore
+from .websocket import MopidyWebSocketClient, websocket_url
+from .youtube import COMPLETED, LaunchState, YouTubeCastApp
 
 LOGGER = logging.getLogger(__name__)
 
+_MAX_PAGE_SIZE = 100
+# Most recent launches kept in the persisted state.
+_PERSISTED_LAUNCHES = 32
+
+
+def _int_param(query: Mapping[str, List[str]], name: str, default: int, maximum: int) -> int:
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        return default
+    return max(0, min(value, maximum))
+
+
+def _session_route(path: str) -> Tuple[str, bool] | None:
+    """``(session_id, is_events)`` for ``/session/<id>`` and ``/session/<id>/events``."""
+
+    if not path.startswith("/session/"):
+        return None
+    session_id, _, rest = path[len("/session/") :].partition("/")
+    if not session_id or rest not in ("", "events"):
+        return None
+    return session_id, rest == "events"
+
 
 def _build_device_descriptor(application_url: str, friendly_name: str, udn: str) -> str:
     """Return an XML descriptor that advertises the device to DIAL clients."""
@@ -49,6 +91,80 @@ def _build_device_descriptor(application_url: str, friendly_name: str, udn: str)
 """
 
 
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _parse_params(body: str, content_type: str | None) -> Dict[str, str]:
+    if not body:
+        return {}
+
+    if content_type and "json" in content_type:
+        try:
+            data = json.loads(body)
+            return {key: str(value) for key, value in data.items()}
+        except (json.JSONDecodeError, AttributeError):
+            pass
+
+    parsed = parse_qs(body)
+    return {key: values[0] for key, values in parsed.items()}
+
+
+@dataclass(slots=True)
+class DialResponse:
+    """Status, headers and encoded body produced by a DIAL route."""
+
+    status: int
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+
+
+@dataclass(slots=True)
+class DeferredResponse:
+    """A response that is not ready yet, such as a long-poll.
+
+    The runtime calls ``start`` once with a callback that takes the final
+    :class:`DialResponse`; the callback may run on any thread, and the
+    runtime must not keep a thread waiting for it.
+    """
+
+    start: Callable[[Callable[[DialResponse], None]], None]
+    status: int = 200
+
+
+def _text_response(code: int, payload: str, content_type: str = "text/plain") -> DialResponse:
+    return _body_response(code, payload.encode(), content_type)
+
+
+def _body_response(code: int, body: bytes, content_type: str) -> DialResponse:
+    headers = [("Content-Type", content_type), ("Content-Length", str(len(body)))]
+    return DialResponse(code, headers, body)
+
+
+def _error_response(code: int, message: str | None = None) -> DialResponse:
+    phrase = HTTPStatus(code).phrase
+    return _text_response(code, f"{code} {phrase}: {message}" if message else f"{code} {phrase}")
+
+
+@dataclass(frozen=True, slots=True)
+class _CachedResponse:
+    """Pre-encoded body of a GET endpoint together with its strong ETag."""
+
+    key: Hashable
+    body: bytes
+    content_type: str
+    etag: str
+
+    @classmethod
+    def build(cls, key: Hashable, payload: str, content_type: str) -> "_CachedResponse":
+        body = payload.encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        return cls(key=key, body=body, content_type=content_type, etag=etag)
+
+
 class DialService:
     """Controller wiring SSDP discovery and HTTP DIAL endpoints."""
 
@@ -63,43 +179,253 @@ class DialService:
         ssdp_port: int = 1900,
         pairing_code: str | None = None,
         require_pairing_code: bool = False,
+        server_options: ServerOptions | None = None,
+        ssdp_interfaces: Sequence[str] | None = None,
+        mopidy_transport: str = "http",
+        state_reconcile_interval: float = 30.0,
+        mopidy_breaker: CircuitBreaker | None = None,
+        mopidy_retry: RetryPolicy | None = None,
+        resolution_cache: ResolutionCache | None = None,
+        launch_dedupe_window: float = 2.0,
+        udn: str | None = None,
+        path_prefix: str = "",
+        max_sessions: int = 32,
+        session_poll_timeout: float = 25.0,
+        capture: CaptureLog | None = None,
+        debug_token: str | None = None,
+        state_path: str | None = None,
+        started_at: float | None = None,
     ) -> None:
+        # Monotonic time the process started, for the time-to-first-cast measurement.
+        self._started_at = time.monotonic() if started_at is None else started_at
+        self._started_wall = time.time()
+        init_started = time.perf_counter()
+        self._startup_phases: Dict[str, float] = {}
+        self._startup_phases_lock = threading.Lock()
+        self.first_cast_seconds: float | None = None
+        self.state_store = StateStore(state_path, self._snapshot_state) if state_path else None
+        saved = self.state_store.load() if self.state_store is not None else None
+
         self.host = host
         self.port = port
         self.friendly_name = friendly_name
         self.app_name = app_name
-        self.application_url = f"http://{self.host}:{self.port}"
-        self.udn = str(uuid.uuid4())
+        # Set when the service is one virtual receiver mounted below a shared HTTP listener.
+        self.path_prefix = path_prefix.rstrip("/")
+        self.application_url = f"http://{self.host}:{self.port}{self.path_prefix}"
+        self.udn = udn or (saved.udn if saved else None) or str(uuid.uuid4())
         self.ssdp_port = ssdp_port
-
-        self._youtube_app = YouTubeCastApp(app_name)
-        self._mopidy = MopidyClient(mopidy_rpc_url)
+        self.ssdp_interfaces = list(ssdp_interfaces or [])
+        self.mopidy_rpc_url = mopidy_rpc_url
+        # Records requests, SSDP datagrams and Mopidy calls for offline replay when set.
+        self.capture = capture
+
+        self.metrics = MetricsRegistry()
+        self.mopidy_breaker = mopidy_breaker or CircuitBreaker()
+        self.mopidy_retry = mopidy_retry or RetryPolicy()
+        self.resolver = TrackResolver(
+            lambda uris: self._state_client.call("core.library.lookup", {"uris": uris}), resolution_cache
+        )
+        self._launcher = LaunchExecutor()
+        self.playback = PlaybackMirror()
+        self._youtube_app = YouTubeCastApp(
+            app_name,
+            self._launcher,
+            metrics=self.metrics,
+            playback=self.playback,
+            dedupe_window=launch_dedupe_window,
+        )
+        self.sessions = SessionHub(max_sessions=max_sessions, poll_timeout=session_poll_timeout)
+        self._now_playing_key: tuple | None = None
+        self._youtube_app.add_listener(self._publish_now_playing)
+        self._mopidy_events: MopidyWebSocketClient | None = None
+        if mopidy_transport == "websocket":
+            self._mopidy_events = MopidyWebSocketClient(
+                websocket_url(mopidy_rpc_url),
+                metrics=self.metrics,
+                breaker=self.mopidy_breaker,
+                retry=self.mopidy_retry,
+                resolver=self.resolver,
+                capture=capture,
+            )
+            self._mopidy = self._mopidy_events
+            self.playback.attach(self._mopidy_events)
+        elif mopidy_transport == "http":
+            self._mopidy = MopidyClient(
+                mopidy_rpc_url,
+                metrics=self.metrics,
+                breaker=self.mopidy_breaker,
+                retry=self.mopidy_retry,
+                resolver=self.resolver,
+                capture=capture,
+            )
+        else:
+            raise ValueError(f"Unknown Mopidy transport: {mopidy_transport}")
+        # Blocking client for reconciliation; the asyncio runtime points it at its loop's client instead.
+        self._state_client = self._mopidy
+        self._state_reconcile_interval = state_reconcile_interval
+        self.control = TransportControl(lambda calls: self._state_client.batch(calls), metrics=self.metrics)
+        self._health_probe = HealthProbe(self.mopidy_breaker, lambda: self._state_client.call("core.get_version"))
+        pairing_code = pairing_code or (saved.pairing_code if saved else None)
         self._pairing = PairingCode(pairing_code) if pairing_code else PairingCode.generate()
+        self._warmup: threading.Thread | None = None
         self._require_pairing_code = require_pairing_code
+        self._server_options = server_options
+        # /debug/profile is only served when a token is configured.
+        self._debug_token = debug_token
+        self.profiler = SamplingProfiler()
 
-        self._httpd: ThreadingHTTPServer | None = None
+        self._httpd: ThreadingHTTPServer | PooledHTTPServer | None = None
         self._http_thread: threading.Thread | None = None
         self._ssdp: SSDPServer | None = None
+        self._response_cache: Dict[str, _CachedResponse] = {}
+
+        self._http_requests = self.metrics.counter(
+            "http_requests_total", "DIAL HTTP requests by route and status.", ("method", "route", "status")
+        )
+        self._http_latency = self.metrics.histogram(
+            "http_request_duration_seconds", "Time spent routing DIAL HTTP requests.", ("route",)
+        )
+        self.metrics.callback(
+            "mopidy_circuit_open",
+            "1 while calls to Mopidy fail fast.",
+            lambda: {(): float(self.mopidy_breaker.state == OPEN)},
+        )
+        self.metrics.callback(
+            "mopidy_rpc_rejected_total",
+            "Mopidy calls refused by the open circuit breaker.",
+            lambda: {(): float(self.mopidy_breaker.rejected)},
+            kind="counter",
+        )
+        self.metrics.callback(
+            "resolution_cache_lookups_total",
+            "Launches that found their track already resolved (hit) or not (miss).",
+            lambda: {("hit",): self.resolver.cache.hits, ("miss",): self.resolver.cache.misses},
+            kind="counter",
+            labelnames=("result",),
+        )
+        self.metrics.callback(
+            "resolution_cache_entries",
+            "Resolved tracks currently cached.",
+            lambda: {(): float(len(self.resolver.cache))},
+        )
+        self.metrics.callback(
+            "sessions_active",
+            "Paired phones with an open session.",
+            lambda: {(): float(len(self.sessions.sessions()))},
+        )
+        self.metrics.callback(
+            "session_polls_waiting",
+            "Session long-polls parked until the next event.",
+            lambda: {(): float(self.sessions.waiting)},
+        )
+        self.metrics.callback(
+            "session_polls_answered_total",
+            "Parked session long-polls answered by an event, a timeout or shutdown.",
+            lambda: {(): float(self.sessions.delivered)},
+            kind="counter",
+        )
+        self.metrics.callback(
+            "ssdp_packets_total",
+            "SSDP datagrams by outcome.",
+            self._collect_ssdp_stats,
+            kind="counter",
+            labelnames=("result",),
+        )
+        self.metrics.callback(
+            "startup_phase_seconds",
+            "Time spent in each startup phase.",
+            lambda: {(name,): seconds for name, seconds in self.startup_phases.items()},
+            labelnames=("phase",),
+        )
+        self.metrics.callback(
+            "first_cast_seconds",
+            "Time from process start to the first launch Mopidy accepted.",
+            lambda: {} if self.first_cast_seconds is None else {(): self.first_cast_seconds},
+        )
+        register_process_metrics(self.metrics)
+        if capture is not None:
+            capture.receiver(
+                self.path_prefix, udn=self.udn, friendly_name=friendly_name, pairing_code=self._pairing.normalized
+            )
+        if saved is not None:
+            self._restore_state(saved)
+        self._youtube_app.add_listener(self._note_first_cast)
+        if self.state_store is not None:
+            self._youtube_app.add_listener(self.state_store.mark_dirty)
+            self.sessions.add_listener(self.state_store.mark_dirty)
+            if saved is None or (saved.udn, saved.pairing_code) != (self.udn, self._pairing.normalized):
+                # Save a new identity before any phone can discover it.
+                self.state_store.flush()
+        self._publish_now_playing()
+        self._record_phase("init", time.perf_counter() - init_started)
 
     def start(self) -> None:
         """Start the HTTP server and the SSDP responder."""
 
-        handler = self._build_handler()
-        self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
-        bound_port = self._httpd.server_address[1]
-        self.port = bound_port
-        self.application_url = f"http://{self.host}:{bound_port}"
+        self.warm_up_mopidy()
+        phase_started = time.perf_counter()
+        self._httpd, self._http_thread = _serve_http(
+            self.host, self.port, _build_handler(self.handle_request), self._server_options
+        )
+        self._bind_port(self._httpd.server_address[1])
+        self._record_phase("http", time.perf_counter() - phase_started)
+        self.start_background()
 
-        self._http_thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
-        self._http_thread.start()
+    def start_background(self) -> None:
+        """Start everything except the HTTP listener: SSDP and the Mopidy playback sync."""
 
-        self._ssdp = SSDPServer(
-            location=f"{self.application_url}/ssdp/device-desc.xml",
-            friendly_name=self.friendly_name,
-            udn=self.udn,
-            port=self.ssdp_port,
-        )
+        self.warm_up_mopidy()
+        phase_started = time.perf_counter()
+        self._ssdp = self._create_ssdp()
         self._ssdp.start()
+        self._record_phase("ssdp", time.perf_counter() - phase_started)
+        phase_started = time.perf_counter()
+        self.start_playback_sync()
+        self._record_phase("playback_sync", time.perf_counter() - phase_started)
+        LOGGER.info(
+            "%s ready %.1f ms after start (%s)",
+            self.friendly_name,
+            (time.monotonic() - self._started_at) * 1000,
+            ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.startup_phases.items()),
+        )
+
+    def warm_up_mopidy(self) -> None:
+        """Connect to Mopidy in the background while the listeners start, so the first cast skips the connect."""
+
+        if self._warmup is not None:
+            return
+
+        def run() -> None:
+            started = time.perf_counter()
+            response = self._state_client.call("core.get_version")
+            elapsed = time.perf_counter() - started
+            self._record_phase("mopidy_warmup", elapsed)
+            if response.ok:
+                LOGGER.info("Mopidy %s reachable after %.1f ms", response.result, elapsed * 1000)
+            else:
+                LOGGER.warning("Mopidy is not reachable yet: %s", response.error)
+
+        self._warmup = threading.Thread(target=run, name="mopidy-warmup", daemon=True)
+        self._warmup.start()
+
+    def start_playback_sync(self) -> None:
+        """Connect the Mopidy event stream (if configured) and start periodic reconciliation."""
+
+        if self._mopidy_events is not None:
+            self._mopidy_events.start()
+        self.playback.start(self._state_client, self._state_reconcile_interval)
+        self._health_probe.start()
+
+    def stop_playback_sync(self) -> None:
+        self._health_probe.stop()
+        self.control.stop()
+        self.resolver.stop()
+        self.playback.stop()
+        if self._mopidy_events is not None:
+            self._mopidy_events.close()
+        if self._state_client is not self._mopidy:
+            self._state_client.close()
 
     def stop(self) -> None:
         if self._httpd:
@@ -110,134 +436,513 @@ class DialService:
 
         if self._ssdp:
             self._ssdp.stop()
+        self.stop_backend()
 
-    def _build_handler(self):
-        service = self
+    def stop_backend(self) -> None:
+        """Answer parked session polls, stop launches and playback sync, and close the Mopidy clients."""
 
-        class DialHTTPRequestHandler(BaseHTTPRequestHandler):
-            def log_message(self, format, *args):  # noqa: A003
-                return
+        self.sessions.close()
+        self.profiler.stop()
+        self._launcher.stop()
+        if self.state_store is not None:
+            self.state_store.close()
+        self.stop_playback_sync()
+        if self._mopidy is not self._mopidy_events:
+            self._mopidy.close()
+
+    @property
+    def startup_phases(self) -> Dict[str, float]:
+        """Seconds spent in each startup phase so far, as a copy safe to iterate."""
+
+        with self._startup_phases_lock:
+            return dict(self._startup_phases)
+
+    def _record_phase(self, name: str, seconds: float) -> None:
+        # The Mopidy warm-up thread records its phase while start() may be reading the others.
+        with self._startup_phases_lock:
+            self._startup_phases[name] = seconds
+
+    @property
+    def ssdp(self) -> SSDPServer | None:
+        """The running SSDP responder, or ``None`` before :meth:`start`."""
+
+        return self._ssdp
+
+    @property
+    def ssdp_stats(self) -> SSDPStats | None:
+        """Packet counters of the running SSDP responder."""
+
+        return self._ssdp.stats if self._ssdp else None
+
+    def use_launch_backend(self, launcher, mopidy) -> None:
+        """Swap the executor and Mopidy client that drive launches (used by the asyncio runtime)."""
+
+        self._launcher = launcher
+        self._mopidy = mopidy
+        self._youtube_app._executor = launcher
+
+    def _bind_port(self, port: int) -> None:
+        self.port = port
+        self.application_url = f"http://{self.host}:{port}{self.path_prefix}"
+
+    def _create_ssdp(self) -> SSDPServer:
+        return SSDPServer(
+            location=f"{self.application_url}/ssdp/device-desc.xml",
+            friendly_name=self.friendly_name,
+            udn=self.udn,
+            port=self.ssdp_port,
+            interfaces=self.ssdp_interfaces or None,
+            capture=self.capture,
+        )
+
+    def _cached_response(self, path: str) -> Optional[_CachedResponse]:
+        """Return the cached response for a static GET route, rebuilding it if stale.
+
+        Each route is keyed by the state it renders, so a cached body is only
+        rebuilt when the friendly name, pairing code, URL or app state changes.
+        """
+
+        route = self._cacheable_route(path)
+        if route is None:
+            return None
+        key, render, content_type = route
+        cached = self._response_cache.get(path)
+        if cached is None or cached.key != key:
+            cached = _CachedResponse.build(key, render(), content_type)
+            self._response_cache[path] = cached
+        return cached
+
+    def _cacheable_route(self, path: str) -> Optional[Tuple[Hashable, Callable[[], str], str]]:
+        if path in ("/", ""):
+            return (self.friendly_name, self._pairing.value), self._render_root, "text/plain"
+        if path == "/ssdp/device-desc.xml":
+            key = (self.application_url, self.friendly_name, self.udn)
+            return key, self._render_device_descriptor, "application/xml"
+        if path == "/pairing/code":
+            return self._pairing.value, self._render_pairing_code, "application/json"
+        if path == f"/apps/{self.app_name}":
+            key = (self.application_url, self._youtube_app.version)
+            return key, self._render_app_status, "application/xml"
+        return None
+
+    def _render_root(self) -> str:
+        return "\n".join(
+            [
+                f"Mopidy YouTube Cast Receiver ({self.friendly_name})",
+                "This endpoint serves the YouTube DIAL namespace.",
+                "SSDP descriptor: /ssdp/device-desc.xml",
+                f"App status: /apps/{self.app_name}",
+                "TV code (use Link with TV code if discovery fails):",
+                f"  {self._pairing.formatted}",
+                "Pairing code API: /pairing/code",
+                "Launch history: /launches",
+                "Playback state: /playback",
+                "Remote sessions: POST /session, then long-poll /session/<id>/events?since=<version>",
+                f"Transport control: POST /control/<command> ({', '.join(COMMANDS)})",
+                "Metrics (Prometheus): /metrics",
+            ]
+        )
 
-            def do_HEAD(self):  # noqa: N802
-                response = self._resolve_response()
-                if response is None:
-                    return
-                code, payload, content_type = response
-                self._send_response(code, payload, content_type, include_body=False)
-
-            def do_GET(self):  # noqa: N802
-                response = self._resolve_response()
-                if response is None:
-                    return
-                code, payload, content_type = response
-                self._send_response(code, payload, content_type)
-
-            def _resolve_response(self):
-                parsed = urlparse(self.path)
-                if parsed.path in ("/", ""):
-                    body = "\n".join(
-                        [
-                            f"Mopidy YouTube Cast Receiver ({service.friendly_name})",
-                            "This endpoint serves the YouTube DIAL namespace.",
-                            "SSDP descriptor: /ssdp/device-desc.xml",
-                            f"App status: /apps/{service.app_name}",
-                            "TV code (use Link with TV code if discovery fails):",
-                            f"  {service._pairing.formatted}",
-                            "Pairing code API: /pairing/code",
-                        ]
-                    )
-                    return 200, body, "text/plain"
-
-                if parsed.path == "/ssdp/device-desc.xml":
-                    descriptor = _build_device_descriptor(
-                        application_url=service.application_url,
-                        friendly_name=service.friendly_name,
-                        udn=service.udn,
-                    )
-                    return 200, descriptor, "application/xml"
-
-                if parsed.path == "/pairing/code":
-                    code_payload = {
-                        "code": service._pairing.normalized,
-                        "formatted": service._pairing.formatted,
-                    }
-                    return 200, json.dumps(code_payload), "application/json"
-
-                if parsed.path == f"/apps/{service.app_name}":
-                    status = service._youtube_app.application_status(service.application_url)
-                    return 200, status, "application/xml"
-
-                self.send_error(404)
-                return None
-
-            def do_DELETE(self):  # noqa: N802
-                parsed = urlparse(self.path)
-                if parsed.path != f"/apps/{service.app_name}":
-                    self.send_error(404)
-                    return
-                service._youtube_app.stop()
-                self._send_response(200, "")
-
-            def do_POST(self):  # noqa: N802
-                parsed = urlparse(self.path)
-                if parsed.path != f"/apps/{service.app_name}":
-                    self.send_error(404)
-                    return
-
-                length = int(self.headers.get("Content-Length", 0))
-                raw_body = self.rfile.read(length) if length else b""
-                params = self._parse_params(raw_body.decode(), self.headers.get("Content-Type"))
-
-                provided_code = params.get("pairingCode") or params.get("code")
-                if (service._require_pairing_code or provided_code) and not service._pairing.matches(
-                    provided_code
-                ):
-                    LOGGER.warning("Rejected launch with invalid pairing code: %s", provided_code)
-                    self.send_error(403, "Invalid or missing pairing code")
-                    return
-
-                launch_id = service._youtube_app.launch(params, service._mopidy)
-                LOGGER.info(
-                    "Accepted launch for %s (pairing code provided=%s)",
-                    service.app_name,
-                    bool(provided_code),
-                )
-                status_url = f"{service.application_url}/apps/{service.app_name}/{launch_id}"
-                self.send_response(201)
-                self.send_header("Location", status_url)
-                self.end_headers()
-
-            def _parse_params(self, body: str, content_type: str | None) -> Dict[str, str]:
-                if not body:
-                    return {}
-
-                if content_type and "json" in content_type:
-                    try:
-                        data = json.loads(body)
-                        return {key: str(value) for key, value in data.items()}
-                    except json.JSONDecodeError:
-                        pass
-
-                parsed = parse_qs(body)
-                return {key: values[0] for key, values in parsed.items()}
-
-            def _send_response(
-                self,
-                code: int,
-                payload: str,
-                content_type: str = "text/plain",
-                *,
-                include_body: bool = True,
-            ) -> None:
-                encoded = payload.encode()
-                self.send_response(code)
-                self.send_header("Content-Type", content_type)
-                self.send_header("Content-Length", str(len(encoded)))
-                self.end_headers()
-                if include_body and encoded:
-                    self.wfile.write(encoded)
-
-        return DialHTTPRequestHandler
-
-
-__all__ = ["DialService"]
+    def _render_device_descriptor(self) -> str:
+        return _build_device_descriptor(
+            application_url=self.application_url,
+            friendly_name=self.friendly_name,
+            udn=self.udn,
+        )
+
+    def _render_pairing_code(self) -> str:
+        return json.dumps({"code": self._pairing.normalized, "formatted": self._pairing.formatted})
+
+    def _render_app_status(self) -> str:
+        return self._youtube_app.application_status(self.application_url)
+
+    def handle_request(
+        self,
+        method: str,
+        target: str,
+        headers: Mapping[str, str],
+        body: bytes = b"",
+    ) -> DialResponse | DeferredResponse:
+        """Route one DIAL request; shared by the threaded and asyncio runtimes."""
+
+        started = time.perf_counter()
+        parsed = urlparse(target)
+        if method in ("GET", "HEAD"):
+            response = self._handle_get(parsed, headers)
+        elif method == "POST":
+            response = self._handle_post(parsed, headers, body)
+        elif method == "DELETE":
+            response = self._handle_delete(parsed)
+        else:
+            response = _error_response(501, f"Unsupported method ({method})")
+
+        route = self._route_label(parsed.path)
+        self._http_latency.observe(time.perf_counter() - started, route)
+        self._http_requests.inc(method, route, str(response.status))
+        if self.capture is not None:
+            location = next((value for name, value in getattr(response, "headers", ()) if name == "Location"), None)
+            self.capture.http(method, f"{self.path_prefix}{target}", headers, body, response.status, location)
+        return response
+
+    def _route_label(self, path: str) -> str:
+        """Collapse a request path to its route template to keep metric labels bounded."""
+
+        if path in ("/", ""):
+            return "/"
+        static_routes = (
+            "/ssdp/device-desc.xml",
+            "/pairing/code",
+            "/launches",
+            "/metrics",
+            "/playback",
+            "/debug/profile",
+        )
+        if path in static_routes or path == f"/apps/{self.app_name}":
+            return path
+        if self._launch_id(path):
+            return f"/apps/{self.app_name}/{{launch_id}}"
+        if path == "/session":
+            return path
+        if path.startswith("/control/"):
+            command = path[len("/control/") :]
+            return path if command in COMMANDS else "/control/{command}"
+        session_route = _session_route(path)
+        if session_route is not None:
+            return "/session/{session_id}" + ("/events" if session_route[1] else "")
+        return "other"
+
+    def _collect_ssdp_stats(self) -> Dict[Tuple[str, ...], float]:
+        stats = self.ssdp_stats
+        return {(name,): value for name, value in stats.as_dict().items()} if stats else {}
+
+    def _handle_get(self, parsed: ParseResult, headers: Mapping[str, str]) -> DialResponse | DeferredResponse:
+        cached = self._cached_response(parsed.path)
+        if cached is not None:
+            if _etag_matches(headers.get("If-None-Match"), cached.etag):
+                return DialResponse(304, [("ETag", cached.etag)])
+            return DialResponse(
+                200,
+                [
+                    ("Content-Type", cached.content_type),
+                    ("Content-Length", str(len(cached.body))),
+                    ("ETag", cached.etag),
+                ],
+                cached.body,
+            )
+
+        launch_id = self._launch_id(parsed.path)
+        if launch_id:
+            state = self._youtube_app.get_launch(launch_id)
+            if state is not None:
+                return _text_response(200, json.dumps(state.to_dict()), "application/json")
+
+        session_route = _session_route(parsed.path)
+        if session_route is not None and session_route[1]:
+            return self._poll_session(session_route[0], parse_qs(parsed.query))
+
+        if parsed.path == "/playback":
+            return _text_response(200, json.dumps(self.playback.snapshot.to_dict()), "application/json")
+
+        if parsed.path == "/metrics":
+            return _text_response(200, self.metrics.render(), METRICS_CONTENT_TYPE)
+
+        if parsed.path == "/debug/profile":
+            return self._debug_denied(headers) or _text_response(200, self.profiler.collapsed())
+
+        if parsed.path == "/launches":
+            query = parse_qs(parsed.query)
+            offset = _int_param(query, "offset", 0, self._youtube_app.launch_count)
+            limit = _int_param(query, "limit", 20, _MAX_PAGE_SIZE)
+            page = {
+                "total": self._youtube_app.launch_count,
+                "offset": offset,
+                "limit": limit,
+                "launches": [state.to_dict() for state in self._youtube_app.launches(offset, limit)],
+            }
+            return _text_response(200, json.dumps(page), "application/json")
+
+        return _error_response(404)
+
+    def _handle_delete(self, parsed: ParseResult) -> DialResponse:
+        session_route = _session_route(parsed.path)
+        if session_route is not None and not session_route[1]:
+            return _text_response(200, "") if self.sessions.leave(session_route[0]) else _error_response(404)
+
+        app = self._youtube_app
+        launch_id = self._launch_id(parsed.path)
+        if parsed.path != f"/apps/{self.app_name}" and not launch_id:
+            return _error_response(404)
+        # Stopping the current launch stops Mopidy too, not just the status YouTube reads.
+        current = launch_id is None or (app.last_launch is not None and app.last_launch.launch_id == launch_id)
+        playing = current and app.running
+        if not app.stop(launch_id):
+            return _error_response(404)
+        if playing:
+            self.control.submit(parse_command("stop", {}))
+        return _text_response(200, "")
+
+    def _handle_post(self, parsed: ParseResult, headers: Mapping[str, str], body: bytes) -> DialResponse:
+        if parsed.path == "/session":
+            return self._open_session(_parse_params(body.decode(errors="replace"), headers.get("Content-Type")))
+        if parsed.path == "/debug/profile":
+            return self._debug_denied(headers) or self._toggle_profiler(
+                _parse_params(body.decode(errors="replace"), headers.get("Content-Type"))
+            )
+        if parsed.path.startswith("/control/"):
+            params = _parse_params(body.decode(errors="replace"), headers.get("Content-Type"))
+            params.update({name: values[0] for name, values in parse_qs(parsed.query).items()})
+            return self._control(parsed.path[len("/control/") :], params)
+        if parsed.path != f"/apps/{self.app_name}":
+            return _error_response(404)
+
+        params = _parse_params(body.decode(errors="replace"), headers.get("Content-Type"))
+
+        provided_code = params.get("pairingCode") or params.get("code")
+        if not self._pairing_accepted(provided_code):
+            LOGGER.warning("Rejected launch with invalid pairing code: %s", provided_code)
+            return _error_response(403, "Invalid or missing pairing code")
+
+        if not self._mopidy.available:
+            LOGGER.warning("Rejected launch: Mopidy is unavailable")
+            response = _error_response(503, "Mopidy is unavailable")
+            retry_after = max(1, math.ceil(self.mopidy_breaker.retry_after))
+            response.headers.append(("Retry-After", str(retry_after)))
+            return response
+
+        launch_id = self._youtube_app.launch(params, self._mopidy)
+        LOGGER.info(
+            "Accepted launch for %s (pairing code provided=%s)",
+            self.app_name,
+            bool(provided_code),
+        )
+        status_url = f"{self.application_url}/apps/{self.app_name}/{launch_id}"
+        return DialResponse(201, [("Location", status_url), ("Content-Length", "0")])
+
+    def _control(self, name: str, params: Dict[str, str]) -> DialResponse:
+        session_id = params.get("sessionId")
+        if session_id is not None:
+            if self.sessions.get(session_id) is None:
+                return _error_response(403, "Unknown or expired session")
+        elif not self._pairing_accepted(params.get("pairingCode") or params.get("code")):
+            return _error_response(403, "Invalid or missing pairing code")
+        try:
+            command = parse_command(name, params)
+        except ValueError as exc:
+            return _error_response(404 if name not in COMMANDS else 400, str(exc))
+        if not self._state_client.available:
+            response = _error_response(503, "Mopidy is unavailable")
+            response.headers.append(("Retry-After", str(max(1, math.ceil(self.mopidy_breaker.retry_after)))))
+            return response
+        coalesced = self.control.submit(command)
+        if coalesced is None:
+            return _error_response(429, "Too many pending commands")
+        return _text_response(202, json.dumps({"command": name, "coalesced": coalesced}), "application/json")
+
+    def _debug_denied(self, headers: Mapping[str, str]) -> DialResponse | None:
+        """``None`` when the request carries the debug token, else the response refusing it."""
+
+        if not self._debug_token:
+            return _error_response(404)
+        scheme, _, token = (headers.get("Authorization") or "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), self._debug_token.encode()):
+            return None
+        response = _error_response(401, "Debug token required")
+        response.headers.append(("WWW-Authenticate", 'Bearer realm="debug"'))
+        return response
+
+    def _toggle_profiler(self, params: Dict[str, str]) -> DialResponse:
+        enabled = params.get("enabled", "").lower()
+        if enabled not in ("1", "true", "on", "0", "false", "off"):
+            return _error_response(400, "enabled must be on or off")
+        if enabled in ("1", "true", "on"):
+            try:
+                interval = min(max(float(params.get("interval", self.profiler.interval)), 0.001), 1.0)
+            except ValueError:
+                return _error_response(400, "interval must be a number of seconds")
+            self.profiler.start(interval)
+        else:
+            self.profiler.stop()
+        profiler = self.profiler
+        payload = {"running": profiler.running, "interval": profiler.interval, "samples": profiler.samples}
+        return _text_response(200, json.dumps(payload), "application/json")
+
+    def _pairing_accepted(self, provided_code: str | None) -> bool:
+        return not (self._require_pairing_code or provided_code) or self._pairing.matches(provided_code)
+
+    def _open_session(self, params: Dict[str, str]) -> DialResponse:
+        provided_code = params.get("pairingCode") or params.get("code")
+        if not self._pairing_accepted(provided_code):
+            LOGGER.warning("Rejected session with invalid pairing code: %s", provided_code)
+            return _error_response(403, "Invalid or missing pairing code")
+        session = self.sessions.join(params.get("name", ""))
+        if session is None:
+            return _error_response(429, "Too many sessions")
+        events_url = f"{self.application_url}/session/{session.session_id}/events"
+        payload = json.dumps({**session.to_dict(), "version": self.sessions.version, "eventsUrl": events_url})
+        response = _text_response(201, payload, "application/json")
+        response.headers.append(("Location", f"{self.application_url}/session/{session.session_id}"))
+        return response
+
+    def _poll_session(self, session_id: str, query: Mapping[str, List[str]]) -> DialResponse | DeferredResponse:
+        if self.sessions.get(session_id) is None:
+            return _error_response(404, "Unknown or expired session")
+        try:
+            since = int(query["since"][0]) if "since" in query else None
+            timeout = float(query["timeout"][0]) if "timeout" in query else None
+        except ValueError:
+            return _error_response(400, "since and timeout must be numbers")
+
+        def start(deliver: Callable[[DialResponse], None]) -> None:
+            def answer(body: bytes) -> None:
+                deliver(_body_response(200, body, "application/json"))
+
+            if not self.sessions.poll(session_id, since, answer, timeout):
+                deliver(_error_response(404, "Unknown or expired session"))
+
+        return DeferredResponse(start)
+
+    def _snapshot_state(self) -> ReceiverState:
+        app = self._youtube_app
+        return ReceiverState(
+            udn=self.udn,
+            pairing_code=self._pairing.normalized,
+            running=app.running,
+            launches=[state.to_dict() for state in reversed(app.launches(0, _PERSISTED_LAUNCHES))],
+            sessions=[session.to_dict() for session in self.sessions.sessions()],
+            event_version=self.sessions.version,
+        )
+
+    def _restore_state(self, saved: ReceiverState) -> None:
+        launches: List[LaunchState] = []
+        sessions: List[Session] = []
+        try:
+            launches = [LaunchState.from_dict(data) for data in saved.launches]
+            sessions = [
+                Session(str(data["sessionId"]), str(data.get("name", "")), float(data.get("createdAt", 0)))
+                for data in saved.sessions
+            ]
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            LOGGER.warning("Ignoring saved launches and sessions: %s", exc)
+        self._youtube_app.restore(launches, saved.running)
+        self.sessions.restore(sessions, saved.event_version)
+        LOGGER.info("Restored %d launches and %d sessions", len(launches), len(sessions))
+
+    def _note_first_cast(self) -> None:
+        launch = self._youtube_app.last_launch
+        if (
+            self.first_cast_seconds is not None
+            or launch is None
+            or launch.status != COMPLETED
+            or launch.timestamp < self._started_wall
+        ):
+            return
+        self.first_cast_seconds = time.monotonic() - self._started_at
+        LOGGER.info("First cast playing %.2f s after start", self.first_cast_seconds)
+
+    def _publish_now_playing(self) -> None:
+        app = self._youtube_app
+        launch = app.last_launch
+        snapshot = self.playback.snapshot
+        running = app.running
+        key = (running, launch.launch_id if launch else None, snapshot.state, snapshot.tlid, snapshot.position_ms)
+        if key == self._now_playing_key:
+            return
+        self._now_playing_key = key
+        self.sessions.publish(
+            NOW_PLAYING,
+            {"running": running, "launch": launch.to_dict() if launch else None, "playback": snapshot.to_dict()},
+        )
+
+    def _launch_id(self, path: str) -> str | None:
+        prefix = f"/apps/{self.app_name}/"
+        if not path.startswith(prefix):
+            return None
+        launch_id = path[len(prefix) :]
+        return launch_id if launch_id and "/" not in launch_id else None
+
+
+def _build_handler(handle_request: Callable[..., DialResponse]):
+    """Request handler class that answers every request through ``handle_request``."""
+
+    class DialHTTPRequestHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):  # noqa: A003
+            return
+
+        def do_HEAD(self):  # noqa: N802
+            self._dispatch("HEAD")
+
+        def do_GET(self):  # noqa: N802
+            self._dispatch("GET")
+
+        def do_DELETE(self):  # noqa: N802
+            self._dispatch("DELETE")
+
+        def do_POST(self):  # noqa: N802
+            length = int(self.headers.get("Content-Length", 0))
+            self._dispatch("POST", self.rfile.read(length) if length else b"")
+
+        def _dispatch(self, method: str, body: bytes = b"") -> None:
+            response = handle_request(method, self.path, self.headers, body)
+            if isinstance(response, DeferredResponse):
+                self._defer(response, head_only=method == "HEAD")
+                return
+            self._write_response(response.status, response.headers, b"" if method == "HEAD" else response.body)
+
+        def _defer(self, deferred: DeferredResponse, head_only: bool) -> None:
+            """Park the connection on the server and answer it from whichever thread completes ``deferred``."""
+
+            server = self.server
+            if not hasattr(server, "park"):
+                answered = threading.Event()
+                responses: List[DialResponse] = []
+                deferred.start(lambda response: (responses.append(response), answered.set()))
+                answered.wait()
+                response = responses[0]
+                self._write_response(response.status, response.headers, b"" if head_only else response.body)
+                return
+            self.close_connection = True
+            request = self.connection
+            server.park(request)
+            deferred.start(lambda response: server.answer_parked(request, self._serialize(response, head_only)))
+
+        def _serialize(self, response: DialResponse, head_only: bool) -> bytes:
+            head = self._head(response.status, [("Connection", "close"), *response.headers])
+            return head if head_only else head + response.body
+
+        def _head(self, code: int, headers: List[Tuple[str, str]]) -> bytes:
+            lines = [
+                f"{self.protocol_version} {code} {HTTPStatus(code).phrase}",
+                f"Server: {self.version_string()}",
+                f"Date: {self.date_time_string()}",
+            ]
+            lines.extend(f"{name}: {value}" for name, value in headers)
+            return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        def _write_response(self, code: int, headers: List[Tuple[str, str]], body: bytes = b"") -> None:
+            """Send status line, headers and body with a single socket write."""
+
+            self.log_request(code)
+            for name, value in headers:
+                # As send_header() does, honour a Connection header on this keep-alive connection.
+                if name.lower() == "connection":
+                    self.close_connection = value.lower() == "close"
+            self.wfile.write(self._head(code, headers) + body)
+
+    return DialHTTPRequestHandler
+
+
+def _serve_http(
+    host: str, port: int, handler, options: ServerOptions | None = None
+) -> Tuple[ThreadingHTTPServer | PooledHTTPServer, threading.Thread]:
+    """Bind the DIAL HTTP server (pooled when ``options`` are given) and serve it from a thread."""
+
+    if options is not None:
+        httpd = PooledHTTPServer((host, port), handler, options)
+    else:
+        httpd = ParkingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd, thread
+
+
+__all__ = ["DeferredResponse", "DialResponse", "DialService"]
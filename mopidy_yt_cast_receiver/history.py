@@ -0,0 +1,82 @@
+"""Bounded, constant-time index of recent launches."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LaunchHistory(Generic[T]):
+    """Dict index over a fixed-size ring buffer of launch ids.
+
+    Lookups, inserts and removals are O(1). Once ``capacity`` launches have
+    been recorded, each new launch overwrites the slot of the oldest one and
+    evicts it from the index, so memory stays bounded however long the
+    receiver runs. Eviction follows launch order, not access: lookups do not
+    refresh an entry, so status polls cannot reorder :meth:`page`.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._ring: List[Optional[str]] = [None] * capacity
+        self._index: Dict[str, Tuple[int, T]] = {}
+        self._head = 0
+        self._lock = threading.Lock()
+
+    def add(self, launch_id: str, record: T) -> None:
+        """Record ``launch_id`` as the newest launch; an id already present is moved, not duplicated."""
+
+        with self._lock:
+            existing = self._index.pop(launch_id, None)
+            if existing is not None:
+                self._ring[existing[0]] = None
+            evicted = self._ring[self._head]
+            if evicted is not None:
+                del self._index[evicted]
+            self._ring[self._head] = launch_id
+            self._index[launch_id] = (self._head, record)
+            self._head = (self._head + 1) % self.capacity
+
+    def get(self, launch_id: str) -> Optional[T]:
+        entry = self._index.get(launch_id)
+        return entry[1] if entry else None
+
+    def remove(self, launch_id: str) -> Optional[T]:
+        with self._lock:
+            entry = self._index.pop(launch_id, None)
+            if entry is None:
+                return None
+            self._ring[entry[0]] = None
+            return entry[1]
+
+    def page(self, offset: int = 0, limit: int = 20) -> List[T]:
+        """Return up to ``limit`` records, newest first, skipping ``offset``."""
+
+        records: List[T] = []
+        with self._lock:
+            if offset >= len(self._index):
+                return records
+            for step in range(1, self.capacity + 1):
+                launch_id = self._ring[(self._head - step) % self.capacity]
+                if launch_id is None:
+                    continue
+                if offset:
+                    offset -= 1
+                    continue
+                if len(records) >= limit:
+                    break
+                records.append(self._index[launch_id][1])
+        return records
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, launch_id: object) -> bool:
+        return launch_id in self._index
+
+
+__all__ = ["LaunchHistory"]
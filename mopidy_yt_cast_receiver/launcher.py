@@ -0,0 +1,100 @@
+"""Background executor that drives Mopidy for accepted DIAL launches."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+LaunchTask = Callable[[], bool]
+LaunchCallback = Callable[[bool], None]
+
+
+class LaunchExecutor:
+    """Single worker thread with a latest-wins pending slot.
+
+    At most one launch is in flight and at most one is waiting. Submitting a
+    launch while another is still waiting supersedes the waiting one, which is
+    dropped without ever reaching Mopidy.
+    """
+
+    def __init__(self, name: str = "launch-executor") -> None:
+        self.name = name
+        self._cond = threading.Condition()
+        self._pending: Optional[Tuple[LaunchTask, LaunchCallback, Callable[[], None]]] = None
+        self._busy = False
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def submit(
+        self,
+        task: LaunchTask,
+        on_done: LaunchCallback,
+        on_superseded: Callable[[], None],
+    ) -> None:
+        """Queue ``task``; ``on_done`` receives its result once it has run."""
+
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            superseded = self._pending
+            self._pending = (task, on_done, on_superseded)
+            self._cond.notify_all()
+        if superseded is not None:
+            superseded[2]()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until no launch is waiting or in flight."""
+
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def discard_pending(self) -> None:
+        """Drop the launch still waiting, if any, as if a newer one had superseded it."""
+
+        with self._cond:
+            dropped, self._pending = self._pending, None
+            self._cond.notify_all()
+        if dropped is not None:
+            dropped[2]()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the worker; a launch still waiting is dropped."""
+
+        with self._cond:
+            self._stopping = True
+            dropped, self._pending = self._pending, None
+            self._cond.notify_all()
+            thread = self._thread
+        if dropped is not None:
+            dropped[2]()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._stopping)
+                if self._pending is None:
+                    return
+                task, on_done, _ = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                ok = bool(task())
+            except Exception:  # noqa: BLE001 - a failed launch must not kill the worker
+                LOGGER.exception("Launch failed")
+                ok = False
+            try:
+                on_done(ok)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+__all__ = ["LaunchExecutor"]
@@ -0,0 +1,233 @@
+"""In-memory mirror of Mopidy's playback state, fed by events and reconciliation."""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+PLAYING = "playing"
+PAUSED = "paused"
+STOPPED = "stopped"
+
+EVENTS = (
+    "playback_state_changed",
+    "track_playback_started",
+    "track_playback_paused",
+    "track_playback_resumed",
+    "track_playback_ended",
+    "seeked",
+    "tracklist_changed",
+)
+
+_RECONCILE_CALLS = [
+    ("core.playback.get_state", {}),
+    ("core.playback.get_current_tl_track", {}),
+    ("core.playback.get_time_position", {}),
+    ("core.tracklist.get_version", {}),
+]
+
+
+@dataclass(frozen=True, slots=True)
+class PlaybackSnapshot:
+    """Immutable view of Mopidy's player; ``state`` is ``None`` until first synced.
+
+    ``synced_at`` is the wall-clock time of the last event or reconciliation.
+    """
+
+    state: Optional[str] = None
+    track_uri: Optional[str] = None
+    track_name: Optional[str] = None
+    tlid: Optional[int] = None
+    position_ms: int = 0
+    anchored_at: float = 0.0
+    tracklist_version: int = 0
+    synced_at: Optional[float] = None
+
+    @property
+    def known(self) -> bool:
+        return self.state is not None
+
+    def position(self, now: Optional[float] = None) -> int:
+        """Current position in ms, extrapolated from the anchor while playing."""
+
+        if self.state != PLAYING:
+            return self.position_ms
+        elapsed = (time.monotonic() if now is None else now) - self.anchored_at
+        return self.position_ms + int(elapsed * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "trackUri": self.track_uri,
+            "trackName": self.track_name,
+            "tlid": self.tlid,
+            "positionMs": self.position(),
+            "tracklistVersion": self.tracklist_version,
+        }
+
+
+def _track_fields(tl_track: Any) -> Dict[str, Any]:
+    if not isinstance(tl_track, dict):
+        return {"tlid": None, "track_uri": None, "track_name": None}
+    track = tl_track.get("track") or {}
+    return {"tlid": tl_track.get("tlid"), "track_uri": track.get("uri"), "track_name": track.get("name")}
+
+
+def _identity(snapshot: PlaybackSnapshot) -> tuple:
+    # Fields that listeners care about; positions drift and are not compared.
+    return (snapshot.state, snapshot.tlid, snapshot.track_uri, snapshot.track_name, snapshot.tracklist_version)
+
+
+class PlaybackMirror:
+    """Keep a :class:`PlaybackSnapshot` current without calling Mopidy on reads.
+
+    Mopidy events update the snapshot incrementally; :meth:`reconcile` replaces
+    it from one JSON-RPC batch, on every (re)connect and periodically as a
+    fallback for missed events. Readers get the current immutable snapshot
+    with a plain attribute load, so status requests stay constant-time.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot = PlaybackSnapshot()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._refresh_listeners: List[Callable[[], None]] = [self._wake.set]
+        self._thread: threading.Thread | None = None
+        self._events_seen = 0
+        self.reconciliations = 0
+
+    @property
+    def snapshot(self) -> PlaybackSnapshot:
+        return self._snapshot
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` after every snapshot change."""
+
+        self._listeners.append(callback)
+
+    def attach(self, events_client) -> None:
+        """Follow a :class:`MopidyWebSocketClient` and reconcile whenever it connects."""
+
+        events_client.subscribe(self.handle_event, EVENTS)
+        events_client.on_connect(lambda: self.reconcile(events_client))
+
+    def handle_event(self, event: str, data: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            current = self._snapshot
+            if event == "tracklist_changed":
+                changes: Dict[str, Any] = {"tracklist_version": current.tracklist_version + 1}
+            elif event == "playback_state_changed":
+                changes = {"state": data.get("new_state"), "position_ms": current.position(now), "anchored_at": now}
+            elif event == "track_playback_started":
+                track = _track_fields(data.get("tl_track"))
+                changes = {"state": PLAYING, "position_ms": 0, "anchored_at": now, **track}
+            elif event in ("track_playback_paused", "track_playback_resumed"):
+                changes = {
+                    "state": PAUSED if event == "track_playback_paused" else PLAYING,
+                    "position_ms": int(data.get("time_position") or 0),
+                    "anchored_at": now,
+                    **_track_fields(data.get("tl_track")),
+                }
+            elif event == "track_playback_ended":
+                changes = {"position_ms": int(data.get("time_position") or 0), "anchored_at": now}
+            elif event == "seeked":
+                changes = {"position_ms": int(data.get("time_position") or 0), "anchored_at": now}
+            else:
+                return
+            self._snapshot = dataclasses.replace(current, synced_at=time.time(), **changes)
+            self._events_seen += 1
+        self._notify()
+
+    def reconcile(self, client) -> bool:
+        """Replace the snapshot with Mopidy's reported state; ``False`` if Mopidy did not answer."""
+
+        started = time.monotonic()
+        events_before = self._events_seen
+        return self._apply(client.batch(_RECONCILE_CALLS), started, events_before)
+
+    async def reconcile_async(self, client) -> bool:
+        """:meth:`reconcile` for a client whose ``batch`` is a coroutine, such as ``AsyncMopidyClient``."""
+
+        started = time.monotonic()
+        events_before = self._events_seen
+        return self._apply(await client.batch(_RECONCILE_CALLS), started, events_before)
+
+    def _apply(self, responses: List[Any], started: float, events_before: int) -> bool:
+        if not all(response.ok for response in responses):
+            LOGGER.debug("Playback reconciliation failed: %s", [r.error for r in responses if not r.ok])
+            return False
+        state, tl_track, position, version = (response.result for response in responses)
+        try:
+            snapshot = PlaybackSnapshot(
+                state=state,
+                position_ms=int(position or 0),
+                # Anchor halfway through the round-trip to halve the position error.
+                anchored_at=(started + time.monotonic()) / 2,
+                tracklist_version=int(version or 0),
+                synced_at=time.time(),
+                **_track_fields(tl_track),
+            )
+        except (TypeError, ValueError):
+            LOGGER.debug("Ignoring malformed playback state from Mopidy: %r", [r.result for r in responses])
+            return False
+        with self._lock:
+            if self._events_seen != events_before:
+                # An event arrived mid-flight and is newer than this reply.
+                return True
+            changed = _identity(self._snapshot) != _identity(snapshot)
+            self._snapshot = snapshot
+            self.reconciliations += 1
+        if changed:
+            self._notify()
+        return True
+
+    def start(self, client, interval: float) -> None:
+        """Reconcile against ``client`` every ``interval`` seconds in a background thread."""
+
+        if interval <= 0 or self._thread is not None:
+            return
+
+        def run() -> None:
+            while not self._stopping.is_set():
+                try:
+                    self.reconcile(client)
+                except Exception:  # noqa: BLE001 - keep the fallback loop alive
+                    LOGGER.exception("Playback reconciliation failed")
+                self._wake.wait(interval)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=run, name="playback-reconcile", daemon=True)
+        self._thread.start()
+
+    def refresh(self) -> None:
+        """Reconcile now instead of at the next interval; a no-op without a reconcile loop."""
+
+        for callback in list(self._refresh_listeners):
+            callback()
+
+    def on_refresh(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` on :meth:`refresh`, for reconcile loops that do not run on :meth:`start`'s thread."""
+
+        self._refresh_listeners.append(callback)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _notify(self) -> None:
+        for callback in list(self._listeners):
+            callback()
+
+
+__all__ = ["PAUSED", "PLAYING", "STOPPED", "PlaybackMirror", "PlaybackSnapshot"]
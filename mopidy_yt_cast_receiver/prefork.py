@@ -0,0 +1,321 @@
+"""Pre-forked HTTP worker processes in front of one coordinating DIAL service."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import secrets
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+from http.client import HTTPMessage
+from http.server import ThreadingHTTPServer
+from multiprocessing.connection import Client, Connection, Listener, wait
+from typing import Callable, Dict, List, Mapping, Tuple
+from urllib.parse import urlparse
+
+from .dial import DeferredResponse, DialResponse, DialService, _build_handler, _error_response, _etag_matches
+from .receivers import MultiReceiverService
+from .server import ParkingHTTPServer, PooledHTTPServer, ServerOptions
+
+LOGGER = logging.getLogger(__name__)
+
+# Sent by the coordinator in place of a response that will follow later (a long-poll).
+_DEFERRED = "deferred"
+
+
+class _ReusePortHTTPServer(ParkingHTTPServer):
+    allow_reuse_port = True
+
+
+class _ReusePortPooledHTTPServer(PooledHTTPServer):
+    allow_reuse_port = True
+
+
+class _WorkerRouter:
+    """``handle_request`` of a worker process: forward to the coordinator, serve cached GETs locally.
+
+    Responses that carry an ``ETag`` come from the service's response cache
+    and are kept per path together with the shared state version read before
+    forwarding. While the coordinator has not bumped that version, repeat GETs
+    (and their ``If-None-Match`` revalidations) never leave the worker.
+    """
+
+    def __init__(self, address: str, authkey: bytes, version) -> None:
+        self._address = address
+        self._authkey = authkey
+        self._version = version
+        self._idle: List[Connection] = []
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[int, DialResponse, str]] = {}
+        # Connections whose deferred response is still to come, watched by one thread.
+        self._deferred: Dict[Connection, Callable[[DialResponse], None]] = {}
+        self._wake_reader, self._wake_writer = multiprocessing.Pipe(duplex=False)
+        self._watcher: threading.Thread | None = None
+
+    def handle_request(
+        self,
+        method: str,
+        target: str,
+        headers: Mapping[str, str],
+        body: bytes = b"",
+    ) -> DialResponse:
+        version = self._version.value
+        path = urlparse(target).path
+        if method in ("GET", "HEAD"):
+            cached = self._cache.get(path)
+            if cached is not None and cached[0] == version:
+                if _etag_matches(headers.get("If-None-Match"), cached[2]):
+                    return DialResponse(304, [("ETag", cached[2])])
+                return cached[1]
+
+        try:
+            response = self._forward(method, target, list(headers.items()), body)
+        except (OSError, EOFError):
+            LOGGER.warning("Lost the connection to the coordinator process")
+            return _error_response(503, "Receiver is restarting")
+        if isinstance(response, DeferredResponse):
+            return response
+
+        etag = next((value for name, value in response.headers if name == "ETag"), None)
+        if method == "GET" and response.status == 200 and etag is not None:
+            self._cache[path] = (version, response, etag)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _forward(
+        self, method: str, target: str, headers: List[Tuple[str, str]], body: bytes
+    ) -> DialResponse | DeferredResponse:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = Client(self._address, family="AF_UNIX", authkey=self._authkey)
+        try:
+            conn.send((method, target, headers, body))
+            response = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        if response == _DEFERRED:
+            return DeferredResponse(lambda deliver: self._await_deferred(conn, deliver))
+        with self._lock:
+            self._idle.append(conn)
+        return response
+
+    def _await_deferred(self, conn: Connection, deliver: Callable[[DialResponse], None]) -> None:
+        with self._lock:
+            self._deferred[conn] = deliver
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch_deferred, name="prefork-deferred", daemon=True)
+                self._watcher.start()
+        self._wake_writer.send_bytes(b"")
+
+    def _watch_deferred(self) -> None:
+        while True:
+            with self._lock:
+                pending = list(self._deferred)
+            for ready in wait([self._wake_reader, *pending]):
+                if ready is self._wake_reader:
+                    self._wake_reader.recv_bytes()
+                    continue
+                with self._lock:
+                    deliver = self._deferred.pop(ready)
+                try:
+                    response = ready.recv()
+                except (OSError, EOFError):
+                    ready.close()
+                    response = _error_response(503, "Receiver is restarting")
+                else:
+                    with self._lock:
+                        self._idle.append(ready)
+                deliver(response)
+
+
+def _run_worker(
+    host: str, port: int, address: str, authkey: bytes, version, options: ServerOptions | None, ready
+) -> None:
+    # Ctrl-C reaches the whole process group; the coordinator decides when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    router = _WorkerRouter(address, authkey, version)
+    handler = _build_handler(router.handle_request)
+    if options is not None:
+        httpd: ThreadingHTTPServer | PooledHTTPServer = _ReusePortPooledHTTPServer((host, port), handler, options)
+    else:
+        httpd = _ReusePortHTTPServer((host, port), handler)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=httpd.shutdown, daemon=True).start())
+    ready.release()
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+        router.close()
+
+
+class PreforkServer:
+    """Serve DIAL HTTP from ``workers`` forked processes sharing the port via ``SO_REUSEPORT``.
+
+    The parent process is the single writer: it owns the service (launch and
+    pairing state, Mopidy clients, SSDP) and answers every request the workers
+    forward over a local socket, so each worker reports the same app state.
+    A version counter in shared memory, bumped whenever an app's status
+    changes, lets workers answer cached GETs without a round trip. Long-polls
+    hold neither a worker nor a coordinator thread while they wait.
+
+    Workers are forked in :meth:`start` before the service starts any thread.
+    """
+
+    def __init__(
+        self,
+        service: DialService | MultiReceiverService,
+        *,
+        workers: int = 2,
+        server_options: ServerOptions | None = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if not hasattr(socket, "SO_REUSEPORT") or "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Pre-fork mode needs fork() and SO_REUSEPORT")
+        self.service = service
+        self.workers = workers
+        self.server_options = server_options
+        self._context = multiprocessing.get_context("fork")
+        self._version = self._context.RawValue("Q", 0)
+        self._version_lock = threading.Lock()
+        self._authkey = secrets.token_bytes(32)
+        self._runtime_dir: str | None = None
+        self._reserved: socket.socket | None = None
+        self._address: str | None = None
+        self._listener: Listener | None = None
+        self._accept_thread: threading.Thread | None = None
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        self._stopping = threading.Event()
+
+    @property
+    def worker_pids(self) -> List[int]:
+        return [process.pid for process in self._processes if process.pid is not None]
+
+    def start(self) -> None:
+        service = self.service
+        # Holding the port (bound, never listening) lets port 0 resolve before the workers bind it.
+        self._reserved = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._reserved.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self._reserved.bind((service.host, service.port))
+        service._bind_port(self._reserved.getsockname()[1])
+
+        self._runtime_dir = tempfile.mkdtemp(prefix="yt-cast-")
+        address = self._address = os.path.join(self._runtime_dir, "coordinator.sock")
+        self._listener = Listener(address, family="AF_UNIX", authkey=self._authkey)
+        ready = self._context.Semaphore(0)
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=_run_worker,
+                args=(service.host, service.port, address, self._authkey, self._version, self.server_options, ready),
+                name=f"dial-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        # Return only once every worker listens, so the first connection is not refused.
+        for process in self._processes:
+            if not ready.acquire(timeout=10):
+                raise RuntimeError(f"{process.name} did not start listening")
+
+        for app in self._apps():
+            app.add_listener(self._bump_version)
+        self._accept_thread = threading.Thread(target=self._accept, name="prefork-coordinator", daemon=True)
+        self._accept_thread.start()
+        service.start_background()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+        if self._accept_thread is not None:
+            # Closing the listener does not interrupt accept(); a last connection does.
+            try:
+                Client(self._address, family="AF_UNIX", authkey=self._authkey).close()
+            except OSError:
+                pass
+            self._accept_thread.join()
+        if self._listener is not None:
+            self._listener.close()
+        if self._reserved is not None:
+            self._reserved.close()
+        if self._runtime_dir is not None:
+            shutil.rmtree(self._runtime_dir, ignore_errors=True)
+        self.service.stop()
+
+    def _apps(self):
+        service = self.service
+        receivers = service.receivers.values() if isinstance(service, MultiReceiverService) else [service]
+        return [receiver._youtube_app for receiver in receivers]
+
+    def _bump_version(self) -> None:
+        with self._version_lock:
+            self._version.value += 1
+
+    def _accept(self) -> None:
+        assert self._listener is not None
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if not self._stopping.is_set():
+                    LOGGER.exception("Coordinator stopped accepting worker connections")
+                return
+            except Exception:  # noqa: BLE001 - a failed handshake must not stop the coordinator
+                LOGGER.warning("Rejected a worker connection", exc_info=True)
+                continue
+            if self._stopping.is_set():
+                conn.close()
+                return
+            threading.Thread(target=self._serve, args=(conn,), name="prefork-worker-conn", daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        while True:
+            try:
+                method, target, header_items, body = conn.recv()
+            except (EOFError, OSError):
+                conn.close()
+                return
+            headers = HTTPMessage()
+            for name, value in header_items:
+                headers[name] = value
+            try:
+                response = self.service.handle_request(method, target, headers, body)
+            except Exception:  # noqa: BLE001 - answer the worker instead of hanging it
+                LOGGER.exception("Failed to handle forwarded %s %s", method, target)
+                response = _error_response(500)
+            try:
+                if isinstance(response, DeferredResponse):
+                    # Free this thread while the response is pending; serving resumes once it is sent.
+                    conn.send(_DEFERRED)
+                    response.start(lambda final: self._send_deferred(conn, final))
+                    return
+                conn.send(response)
+            except OSError:
+                conn.close()
+                return
+
+    def _send_deferred(self, conn: Connection, response: DialResponse) -> None:
+        try:
+            conn.send(response)
+        except OSError:
+            conn.close()
+            return
+        threading.Thread(target=self._serve, args=(conn,), name="prefork-worker-conn", daemon=True).start()
+
+
+__all__ = ["PreforkServer"]
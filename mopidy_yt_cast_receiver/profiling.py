@@ -0,0 +1,129 @@
+"""Process resource gauges and an on-demand sampling profiler for the live receiver."""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from .metrics import MetricsRegistry
+
+LOGGER = logging.getLogger(__name__)
+
+_TRUNCATED = "[other stacks]"
+
+
+def open_fds() -> Optional[int]:
+    """Open file descriptors of this process, or ``None`` where ``/proc`` is unavailable."""
+
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def resident_memory_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def register_process_metrics(metrics: MetricsRegistry) -> None:
+    """Export thread, file descriptor and memory gauges so slow leaks show up on dashboards."""
+
+    def collect(read) -> Dict[Tuple[str, ...], float]:
+        value = read()
+        return {} if value is None else {(): float(value)}
+
+    metrics.callback("process_threads", "Live Python threads.", lambda: {(): float(threading.active_count())})
+    metrics.callback("process_open_fds", "Open file descriptors.", lambda: collect(open_fds))
+    metrics.callback("process_resident_memory_bytes", "Resident set size.", lambda: collect(resident_memory_bytes))
+
+
+class SamplingProfiler:
+    """Sample the stacks of every thread and count them in collapsed-stack form.
+
+    A background thread wakes every ``interval`` seconds and records each
+    other thread's stack as ``thread;outer_function;...;inner_function``, the
+    input format of flame graph tools. Sampling costs one stack walk per
+    thread per interval while running and nothing when stopped. At most
+    ``max_stacks`` distinct stacks are kept; later new ones are counted
+    together under ``[other stacks]``.
+    """
+
+    def __init__(self, *, interval: float = 0.005, max_stacks: int = 5000) -> None:
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float | None = None) -> None:
+        """Start sampling from scratch; a running profiler is restarted."""
+
+        self.stop()
+        if interval is not None:
+            self.interval = interval
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        LOGGER.info("Sampling profiler started (every %.1f ms)", self.interval * 1000)
+
+    def stop(self) -> None:
+        """Stop sampling and keep the samples taken so far."""
+
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            thread.join()
+            LOGGER.info("Sampling profiler stopped after %d samples", self.samples)
+
+    def collapsed(self) -> str:
+        """Return ``stack count`` lines, most frequent stack first."""
+
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [
+                _collapse(names.get(ident, str(ident)), frame)
+                for ident, frame in sys._current_frames().items()
+                if ident != own
+            ]
+            with self._lock:
+                self.samples += 1
+                for stack in stacks:
+                    if stack not in self._stacks and len(self._stacks) >= self.max_stacks:
+                        stack = _TRUNCATED
+                    self._stacks[stack] += 1
+
+
+def _collapse(thread_name: str, frame) -> str:
+    functions = []
+    while frame is not None:
+        code = frame.f_code
+        functions.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    functions.append(thread_name.replace(" ", "_"))
+    return ";".join(reversed(functions)).replace(" ", "_")
+
+
+__all__ = ["SamplingProfiler", "open_fds", "register_process_metrics", "resident_memory_bytes"]
@@ -0,0 +1,46 @@
+"""Per-key token-bucket rate limiting with bounded state."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Hashable, List
+
+
+class TokenBucketLimiter:
+    """Allow ``rate`` events per second per key with bursts of up to ``burst``.
+
+    Bucket state is kept in LRU order and capped at ``max_keys`` entries, so a
+    flood of spoofed sources cannot grow memory without bound. An evicted key
+    simply starts again with a full bucket.
+    """
+
+    def __init__(self, *, rate: float, burst: float, max_keys: int = 1024) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+
+    def allow(self, key: Hashable, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.burst, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            tokens, updated = bucket
+            bucket[0] = min(self.burst, tokens + (now - updated) * self.rate)
+            bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+__all__ = ["TokenBucketLimiter"]
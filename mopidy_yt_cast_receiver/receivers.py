@@ -0,0 +1,249 @@
+"""Several virtual cast receivers behind one HTTP listener and one SSDP responder."""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import tomllib
+import uuid
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from .dial import DialResponse, DialService, _build_handler, _error_response, _serve_http, _text_response
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .metrics import MetricsRegistry
+from .profiling import register_process_metrics
+from .server import PooledHTTPServer, ServerOptions
+from .ssdp import SSDPServer, SSDPStats
+
+LOGGER = logging.getLogger(__name__)
+
+_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+_MOPIDY_TRANSPORTS = ("http", "websocket")
+
+
+@dataclass(frozen=True, slots=True)
+class ReceiverConfig:
+    """One room: the path segment it is served under and the Mopidy it drives."""
+
+    name: str
+    rpc_url: str
+    friendly_name: Optional[str] = None
+    pairing_code: Optional[str] = None
+    udn: Optional[str] = None
+    mopidy_transport: Optional[str] = None
+
+    def service_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments that make a :class:`DialService` this receiver.
+
+        Without an explicit ``udn`` one is derived from the name and RPC URL,
+        so YouTube keeps recognising the room across restarts.
+        """
+
+        kwargs: Dict[str, Any] = {
+            "friendly_name": self.friendly_name or self.name,
+            "mopidy_rpc_url": self.rpc_url,
+            "pairing_code": self.pairing_code,
+            "udn": self.udn or str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.rpc_url}#{self.name}")),
+            "path_prefix": f"/{self.name}",
+        }
+        if self.mopidy_transport is not None:
+            kwargs["mopidy_transport"] = self.mopidy_transport
+        return kwargs
+
+
+def parse_receivers(data: Mapping[str, Any]) -> List[ReceiverConfig]:
+    """Validate the ``[[receiver]]`` tables of a receivers file."""
+
+    entries = data.get("receiver")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("Receivers file must define at least one [[receiver]] table")
+    receivers: List[ReceiverConfig] = []
+    for index, entry in enumerate(entries):
+        unknown = set(entry) - set(ReceiverConfig.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"receiver #{index + 1}: unknown keys {', '.join(sorted(unknown))}")
+        name = entry.get("name")
+        if not isinstance(name, str) or not _NAME.match(name):
+            raise ValueError(f"receiver #{index + 1}: name must be letters, digits, '-' or '_'")
+        if not entry.get("rpc_url"):
+            raise ValueError(f"receiver {name!r}: rpc_url is required")
+        if entry.get("mopidy_transport") not in (None, *_MOPIDY_TRANSPORTS):
+            raise ValueError(f"receiver {name!r}: unknown Mopidy transport {entry['mopidy_transport']!r}")
+        receivers.append(ReceiverConfig(**entry))
+    names = [receiver.name for receiver in receivers]
+    if len(set(names)) != len(names):
+        raise ValueError("Receiver names must be unique")
+    return receivers
+
+
+def load_receivers(path: str) -> List[ReceiverConfig]:
+    """Read receiver definitions from a TOML file."""
+
+    with open(path, "rb") as handle:
+        return parse_receivers(tomllib.load(handle))
+
+
+class MultiReceiverService:
+    """Serve several :class:`DialService` receivers from one process.
+
+    Each receiver keeps its own friendly name, UDN, pairing code, launch state
+    and Mopidy connection and is mounted under ``/<name>/``; its
+    ``path_prefix`` must be set accordingly. HTTP requests share one listener
+    and are routed by the first path segment, and one SSDP responder
+    advertises every receiver.
+    """
+
+    def __init__(
+        self,
+        receivers: Sequence[DialService],
+        *,
+        host: str = "0.0.0.0",
+        port: int = 8009,
+        ssdp_port: int = 1900,
+        ssdp_interfaces: Sequence[str] | None = None,
+        server_options: ServerOptions | None = None,
+    ) -> None:
+        if not receivers:
+            raise ValueError("At least one receiver is required")
+        self.receivers: Dict[str, DialService] = {}
+        for receiver in receivers:
+            name = receiver.path_prefix.strip("/")
+            if not _NAME.match(name):
+                raise ValueError(f"Receiver path prefix must be a single segment: {receiver.path_prefix!r}")
+            if name in self.receivers:
+                raise ValueError(f"Duplicate receiver path prefix: {receiver.path_prefix!r}")
+            self.receivers[name] = receiver
+        if len({receiver.udn for receiver in receivers}) != len(receivers):
+            raise ValueError("Receiver UDNs must be unique")
+
+        self.host = host
+        self.port = port
+        self.ssdp_port = ssdp_port
+        self.ssdp_interfaces = list(ssdp_interfaces or [])
+        self._server_options = server_options
+        self._bind_port(port)
+
+        self._httpd: ThreadingHTTPServer | PooledHTTPServer | None = None
+        self._http_thread: threading.Thread | None = None
+        self._ssdp: SSDPServer | None = None
+
+        self.metrics = MetricsRegistry()
+        self.metrics.callback(
+            "ssdp_packets_total",
+            "SSDP datagrams by outcome.",
+            self._collect_ssdp_stats,
+            kind="counter",
+            labelnames=("result",),
+        )
+        self.metrics.callback(
+            "receivers", "Virtual receivers served by this process.", lambda: {(): float(len(self.receivers))}
+        )
+        register_process_metrics(self.metrics)
+
+    def start(self) -> None:
+        """Start the shared HTTP server and SSDP responder, then every receiver's Mopidy sync."""
+
+        for receiver in self.receivers.values():
+            receiver.warm_up_mopidy()
+        self._httpd, self._http_thread = _serve_http(
+            self.host, self.port, _build_handler(self.handle_request), self._server_options
+        )
+        self._bind_port(self._httpd.server_address[1])
+        self.start_background()
+
+    def start_background(self) -> None:
+        for receiver in self.receivers.values():
+            receiver.warm_up_mopidy()
+        self._ssdp = self._create_ssdp()
+        self._ssdp.start()
+        self.start_playback_sync()
+
+    def start_playback_sync(self) -> None:
+        for receiver in self.receivers.values():
+            receiver.start_playback_sync()
+
+    def stop_playback_sync(self) -> None:
+        for receiver in self.receivers.values():
+            receiver.stop_playback_sync()
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        if self._http_thread:
+            self._http_thread.join()
+        if self._ssdp:
+            self._ssdp.stop()
+        for receiver in self.receivers.values():
+            receiver.stop_backend()
+
+    @property
+    def ssdp(self) -> SSDPServer | None:
+        return self._ssdp
+
+    @property
+    def ssdp_stats(self) -> SSDPStats | None:
+        return self._ssdp.stats if self._ssdp else None
+
+    def handle_request(
+        self,
+        method: str,
+        target: str,
+        headers: Mapping[str, str],
+        body: bytes = b"",
+    ) -> DialResponse:
+        """Hand the request to the receiver named by its first path segment."""
+
+        path = urlparse(target).path
+        name, _, _ = path.lstrip("/").partition("/")
+        receiver = self.receivers.get(name)
+        if receiver is not None:
+            rest = target[len(name) + 1 :]
+            return receiver.handle_request(method, rest if rest.startswith("/") else f"/{rest}", headers, body)
+        if method not in ("GET", "HEAD"):
+            return _error_response(404)
+        if path in ("/", ""):
+            return _text_response(200, self._render_root())
+        if path == "/metrics":
+            return _text_response(200, self.metrics.render(), METRICS_CONTENT_TYPE)
+        return _error_response(404)
+
+    def _bind_port(self, port: int) -> None:
+        self.port = port
+        self.application_url = f"http://{self.host}:{port}"
+        for receiver in self.receivers.values():
+            receiver.host = self.host
+            receiver._bind_port(port)
+
+    def _create_ssdp(self) -> SSDPServer:
+        devices: List[Tuple[str, str]] = [
+            (f"{receiver.application_url}/ssdp/device-desc.xml", receiver.udn) for receiver in self.receivers.values()
+        ]
+        (location, udn), *others = devices
+        return SSDPServer(
+            location=location,
+            friendly_name=next(iter(self.receivers.values())).friendly_name,
+            udn=udn,
+            port=self.ssdp_port,
+            interfaces=self.ssdp_interfaces or None,
+            devices=others,
+            capture=next(iter(self.receivers.values())).capture,
+        )
+
+    def _render_root(self) -> str:
+        lines = [f"Mopidy YouTube Cast Receiver ({len(self.receivers)} receivers)"]
+        for name, receiver in self.receivers.items():
+            lines.append(f"  /{name}/: {receiver.friendly_name} -> {receiver.mopidy_rpc_url}")
+        lines.append("Metrics (Prometheus): /metrics and /<receiver>/metrics")
+        return "\n".join(lines)
+
+    def _collect_ssdp_stats(self) -> Dict[Tuple[str, ...], float]:
+        stats = self.ssdp_stats
+        return {(name,): value for name, value in stats.as_dict().items()} if stats else {}
+
+
+__all__ = ["MultiReceiverService", "ReceiverConfig", "load_receivers", "parse_receivers"]
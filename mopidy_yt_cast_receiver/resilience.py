@@ -0,0 +1,156 @@
+"""Circuit breaker, retry policy and health probe for calls to Mopidy."""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List
+
+LOGGER = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Methods that are safe to send twice: reads, lookups and the health check.
+_IDEMPOTENT_METHODS = frozenset(
+    {"core.get_version", "core.library.lookup", "core.library.search", "core.library.browse"}
+)
+
+
+def is_idempotent(payload: Any) -> bool:
+    """Whether every call in a JSON-RPC payload (single or batch) may be retried."""
+
+    calls: List[Dict] = payload if isinstance(payload, list) else [payload]
+    return all(
+        call["method"] in _IDEMPOTENT_METHODS or call["method"].rpartition(".")[2].startswith("get_")
+        for call in calls
+    )
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by every client of one Mopidy.
+
+    After ``failure_threshold`` failed calls in a row the circuit opens and
+    :meth:`allow` answers ``False`` without touching the network. Once
+    ``reset_timeout`` seconds have passed, one trial call is let through
+    (half-open); its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 5.0) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rejected = 0
+        self.opened = 0
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed (0 when not open)."""
+
+        with self._lock:
+            if self._state == CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                LOGGER.info("Mopidy is reachable again; closing circuit")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def cancel_trial(self) -> None:
+        """Give back a trial call that never reached Mopidy, so another may be admitted."""
+
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state == CLOSED:
+                    LOGGER.warning("Mopidy unreachable after %d attempts; failing fast", self._failures)
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+@dataclass
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff for idempotent calls."""
+
+    attempts: int = 3
+    base_delay: float = 0.05
+    max_delay: float = 0.5
+
+    def delays(self) -> Iterator[float]:
+        """Yield the pause before each attempt: ``0`` first, then jittered backoff."""
+
+        yield 0.0
+        for retry in range(self.attempts - 1):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+class HealthProbe:
+    """Call ``probe`` while the breaker is not closed so it can close again without traffic."""
+
+    def __init__(self, breaker: CircuitBreaker, probe: Callable[[], Any], interval: float | None = None) -> None:
+        self.breaker = breaker
+        self.probe = probe
+        self.interval = interval if interval is not None else max(0.05, breaker.reset_timeout / 2)
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mopidy-health", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            if self.breaker.state == HALF_OPEN:
+                try:
+                    self.probe()
+                except Exception:  # noqa: BLE001 - the probe must keep running
+                    LOGGER.exception("Mopidy health probe failed")
+
+
+__all__ = ["CLOSED", "HALF_OPEN", "OPEN", "CircuitBreaker", "HealthProbe", "RetryPolicy", "is_idempotent"]
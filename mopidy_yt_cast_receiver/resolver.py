@@ -0,0 +1,178 @@
+"""Cache of Mopidy tracks resolved from YouTube URIs, filled in the background."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+Track = Dict[str, Any]
+Lookup = Callable[[List[str]], Any]
+
+_PREFETCH_BATCH = 50
+
+
+def resolvable(uri: str) -> bool:
+    """Whether ``uri`` names one track; playlists expand to many and are never looked up."""
+
+    return ":playlist/" not in uri
+
+
+class ResolutionCache:
+    """Size- and TTL-bounded LRU map of URI to resolved track."""
+
+    def __init__(self, max_size: int = 512, ttl: float = 6 * 3600) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Track]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, uri: str) -> Optional[Track]:
+        """Return the cached track and count a hit or miss."""
+
+        track = self.peek(uri)
+        with self._lock:
+            if track is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return track
+
+    def peek(self, uri: str) -> Optional[Track]:
+        """Like :meth:`get` but without touching the hit/miss counters."""
+
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[uri]
+                return None
+            self._entries.move_to_end(uri)
+            return entry[1]
+
+    def put(self, uri: str, track: Track) -> None:
+        with self._lock:
+            self._entries[uri] = (time.monotonic() + self.ttl, track)
+            self._entries.move_to_end(uri)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TrackResolver:
+    """Serve resolved tracks from a :class:`ResolutionCache` and warm it in the background.
+
+    ``lookup`` receives a list of URIs and returns the ``RPCResponse`` of
+    ``core.library.lookup``. Tracks also enter the cache for free from the
+    ``core.tracklist.add`` replies of launches. Launches still add by URI
+    (``tracks=`` is deprecated since Mopidy 1.0); resolving ahead of time
+    lets the backend answer that add from its own cache, and the cache keeps
+    already resolved URIs from being looked up again.
+    """
+
+    def __init__(self, lookup: Lookup, cache: ResolutionCache | None = None) -> None:
+        self.cache = cache or ResolutionCache()
+        self._lookup = lookup
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def cached(self, uri: str) -> Optional[Track]:
+        """Return the resolved track; only URIs the resolver would look up count as a hit or miss."""
+
+        return self.cache.get(uri) if resolvable(uri) else self.cache.peek(uri)
+
+    def remember_added(self, uris: List[str], tl_tracks: Any) -> None:
+        """Cache the tracks Mopidy resolved for ``uris`` from a ``tracklist.add`` result.
+
+        Entries are only matched up when every URI produced exactly one track.
+        """
+
+        if not isinstance(tl_tracks, list) or len(tl_tracks) != len(uris):
+            return
+        for uri, tl_track in zip(uris, tl_tracks):
+            track = tl_track.get("track") if isinstance(tl_track, dict) else None
+            if isinstance(track, dict):
+                self.cache.put(uri, track)
+
+    def prefetch(self, uris: Iterable[str]) -> None:
+        """Queue URIs for background resolution; already cached ones are skipped."""
+
+        with self._wakeup:
+            if self._stopping:
+                return
+            for uri in uris:
+                if resolvable(uri) and self.cache.peek(uri) is None:
+                    self._pending[uri] = None
+            if not self._pending:
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="track-resolver", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def resolve(self, uris: List[str]) -> int:
+        """Look ``uris`` up in one call and cache the results; returns how many resolved."""
+
+        response = self._lookup(uris)
+        if not response.ok or not isinstance(response.result, dict):
+            LOGGER.debug("Track lookup failed: %s", response.error)
+            return 0
+        resolved = 0
+        for uri, tracks in response.result.items():
+            # Only single-track URIs map one-to-one onto a tracklist entry.
+            if isinstance(tracks, list) and len(tracks) == 1:
+                self.cache.put(uri, tracks[0])
+                resolved += 1
+        return resolved
+
+    def stop(self) -> None:
+        with self._wakeup:
+            self._stopping = True
+            self._pending.clear()
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._pending and not self._stopping:
+                    self._wakeup.wait()
+                if self._stopping:
+                    return
+                batch = []
+                while self._pending and len(batch) < _PREFETCH_BATCH:
+                    batch.append(self._pending.popitem(last=False)[0])
+            try:
+                self.resolve(batch)
+            except Exception:  # noqa: BLE001 - keep resolving later batches
+                LOGGER.exception("Background track resolution failed")
+
+
+__all__ = ["ResolutionCache", "TrackResolver", "resolvable"]
@@ -0,0 +1,216 @@
+"""HTTP server with a bounded worker pool for the DIAL endpoints."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import HTTPServer, ThreadingHTTPServer
+from typing import List, Set, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+REJECT = "reject"
+WAIT = "wait"
+
+# Seconds a parked client may take to accept its answer before it is dropped.
+PARKED_WRITE_TIMEOUT = 1.0
+
+
+@dataclass
+class ServerOptions:
+    """Settings for the opt-in pooled HTTP/1.1 server mode."""
+
+    workers: int = 8
+    backlog: int = 64
+    queue_size: int = 32
+    idle_timeout: float = 5.0
+    overload_policy: str = REJECT
+    retry_after: int = 1
+
+    def __post_init__(self) -> None:
+        if self.overload_policy not in (REJECT, WAIT):
+            raise ValueError(f"Unknown overload policy: {self.overload_policy}")
+        if self.workers < 1:
+            raise ValueError("workers must be at least 1")
+
+
+class ParkingMixin:
+    """Let handlers hand their connection over to be answered later (long-polls).
+
+    A handler that calls :meth:`park` may return without writing a response:
+    the socket stays open when the handler finishes, and any thread answers it
+    with :meth:`answer_parked`, which sends the bytes and closes it. No thread
+    waits on a parked connection.
+
+    Answers are written without blocking the answering thread, which is often
+    fanning one event out to many phones: whatever does not fit in the socket
+    buffer straight away is finished by a small writer pool, and a client
+    that does not read it within ``PARKED_WRITE_TIMEOUT`` is dropped.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._parked: Set[socket.socket] = set()
+        self._parked_lock = threading.Lock()
+        self._writers: ThreadPoolExecutor | None = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def parked(self) -> int:
+        return len(self._parked)
+
+    def park(self, request: socket.socket) -> None:
+        with self._parked_lock:
+            self._parked.add(request)
+
+    def answer_parked(self, request: socket.socket, data: bytes) -> None:
+        with self._parked_lock:
+            if request not in self._parked:
+                return
+            self._parked.discard(request)
+        try:
+            request.setblocking(False)
+            sent = request.send(data)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            sent = len(data)
+        if sent >= len(data):
+            super().shutdown_request(request)
+            return
+        with self._parked_lock:
+            if self._writers is None:
+                self._writers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="parked-writer")
+            writers = self._writers
+        writers.submit(self._finish_parked, request, data[sent:])
+
+    def _finish_parked(self, request: socket.socket, rest: bytes) -> None:
+        try:
+            request.settimeout(PARKED_WRITE_TIMEOUT)
+            request.sendall(rest)
+        except OSError:
+            pass
+        super().shutdown_request(request)
+
+    def shutdown_request(self, request) -> None:
+        with self._parked_lock:
+            if request in self._parked:
+                return
+        super().shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        with self._parked_lock:
+            parked, self._parked = self._parked, set()
+            writers, self._writers = self._writers, None
+        for request in parked:
+            super().shutdown_request(request)
+        if writers is not None:
+            writers.shutdown()
+
+
+class ParkingHTTPServer(ParkingMixin, ThreadingHTTPServer):
+    """Thread-per-connection server whose handlers may park long-polls."""
+
+
+class PooledHTTPServer(ParkingMixin, HTTPServer):
+    """``HTTPServer`` that hands accepted connections to a fixed set of workers.
+
+    Connections wait in a bounded queue. When it is full, the ``reject``
+    policy answers ``503`` with ``Retry-After`` and closes the socket, while
+    ``wait`` stops accepting until a slot frees up and leaves further clients
+    in the kernel accept backlog. Handlers speak HTTP/1.1 and close
+    keep-alive connections that stay idle longer than ``idle_timeout``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address: Tuple[str, int], handler_class, options: ServerOptions) -> None:
+        self.options = options
+        self.request_queue_size = options.backlog
+        handler_class.protocol_version = "HTTP/1.1"
+        handler_class.timeout = options.idle_timeout
+        super().__init__(server_address, handler_class)
+
+        self.rejected = 0
+        self._queue: "queue.Queue[Tuple[socket.socket, Tuple[str, int]] | None]" = queue.Queue(
+            options.queue_size
+        )
+        self._active: Set[socket.socket] = set()
+        self._active_lock = threading.Lock()
+        self._workers: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f"dial-http-{index}", daemon=True)
+            for index in range(options.workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address) -> None:
+        item = (request, client_address)
+        if self.options.overload_policy == WAIT:
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._reject(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self.shutdown_request(item[0])
+        with self._active_lock:
+            active = list(self._active)
+        for sock in active:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            request, client_address = item
+            with self._active_lock:
+                self._active.add(request)
+            try:
+                self.finish_request(request, client_address)
+            except Exception:  # noqa: BLE001 - mirror socketserver's error handling
+                self.handle_error(request, client_address)
+            finally:
+                with self._active_lock:
+                    self._active.discard(request)
+                self.shutdown_request(request)
+
+    def _reject(self, request: socket.socket) -> None:
+        self.rejected += 1
+        LOGGER.debug("HTTP worker queue full; rejecting connection")
+        response = (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            f"Retry-After: {self.options.retry_after}\r\n"
+            "Content-Length: 0\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        try:
+            request.settimeout(0.5)
+            request.sendall(response)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+
+__all__ = ["ParkingHTTPServer", "ParkingMixin", "PooledHTTPServer", "ServerOptions"]
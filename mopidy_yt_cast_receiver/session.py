@@ -0,0 +1,247 @@
+"""Paired phone sessions and the versioned event stream they long-poll."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+NOW_PLAYING = "nowPlaying"
+SESSIONS = "sessions"
+
+Deliver = Callable[[bytes], None]
+
+
+@dataclass(slots=True)
+class Session:
+    """A paired phone; it stays alive as long as it keeps polling."""
+
+    session_id: str
+    name: str
+    created_at: float
+    last_seen: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"sessionId": self.session_id, "name": self.name, "createdAt": self.created_at}
+
+
+@dataclass(slots=True)
+class _Waiter:
+    session_id: str
+    since: Optional[int]
+    deliver: Deliver
+    deadline: float
+
+
+class SessionHub:
+    """Fan a versioned event stream out to the long-polls of paired phones.
+
+    Every published event gets the next version and is serialized to JSON
+    once. A poll that is behind gets the missed events straight away; one that
+    is current parks a waiter until the next event or its timeout. Waiters are
+    answered through callbacks, so no thread sits on an idle phone, and
+    waiters polling from the same version share one rendered body.
+
+    Polls without ``since``, or too far behind for the retained history, get
+    a ``reset`` with the latest event of every type instead.
+    """
+
+    def __init__(
+        self,
+        *,
+        history: int = 256,
+        max_sessions: int = 32,
+        poll_timeout: float = 25.0,
+        session_ttl: float = 90.0,
+        tick: float = 0.5,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.poll_timeout = poll_timeout
+        self.session_ttl = session_ttl
+        self._tick = tick
+        self._version = 0
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=history)
+        self._latest: Dict[str, bytes] = {}
+        self._sessions: Dict[str, Session] = {}
+        self._waiters: Dict[str, _Waiter] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._listeners: List[Callable[[], None]] = []
+        self.delivered = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call ``listener`` whenever a session opens, closes or expires."""
+
+        self._listeners.append(listener)
+
+    def restore(self, sessions: List[Session], version: int = 0) -> None:
+        """Reopen sessions saved before a restart and continue numbering events after ``version``.
+
+        Phones polling from an older version get a ``reset``, as the events
+        themselves are not kept.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            self._version = max(self._version, version)
+            for session in sessions[: self.max_sessions - len(self._sessions)]:
+                session.last_seen = now
+                self._sessions[session.session_id] = session
+        self._publish_sessions()
+
+    def sessions(self) -> List[Session]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._sessions.get(session_id)
+
+    def join(self, name: str = "") -> Optional[Session]:
+        """Open a session, or return ``None`` when ``max_sessions`` are open."""
+
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                return None
+            session = Session(uuid.uuid4().hex, name[:64], time.time())
+            self._sessions[session.session_id] = session
+        self._publish_sessions()
+        return session
+
+    def leave(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            waiter = self._waiters.pop(session_id, None)
+        if session is None:
+            return False
+        if waiter is not None:
+            waiter.deliver(self._render(waiter.since))
+        self._publish_sessions()
+        return True
+
+    def publish(self, event_type: str, data: Any) -> int:
+        """Append an event, wake every parked poll, and return the event's version."""
+
+        with self._lock:
+            self._version += 1
+            version = self._version
+            encoded = json.dumps({"version": version, "type": event_type, "data": data}).encode()
+            self._events.append((version, encoded))
+            self._latest[event_type] = encoded
+            waiters = list(self._waiters.values())
+            self._waiters.clear()
+        self._answer(waiters)
+        return version
+
+    def poll(self, session_id: str, since: Optional[int], deliver: Deliver, timeout: Optional[float] = None) -> bool:
+        """Call ``deliver`` with the events after ``since``, now or once one arrives.
+
+        Returns ``False`` for an unknown session. A newer poll of the same
+        session answers the older one, so each phone parks at most one waiter.
+        """
+
+        timeout = self.poll_timeout if timeout is None else max(0.0, min(timeout, self.poll_timeout))
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            session.last_seen = time.monotonic()
+            ready = since is None or since != self._version or timeout == 0
+            if not ready:
+                previous = self._waiters.pop(session_id, None)
+                self._waiters[session_id] = _Waiter(session_id, since, deliver, session.last_seen + timeout)
+                self._ensure_thread()
+        if ready:
+            deliver(self._render(since))
+        elif previous is not None:
+            previous.deliver(self._render(previous.since))
+        return True
+
+    def close(self) -> None:
+        """Answer every parked poll and stop the timeout thread."""
+
+        self._stopping.set()
+        with self._lock:
+            waiters = list(self._waiters.values())
+            self._waiters.clear()
+        self._answer(waiters)
+        if self._thread is not None:
+            self._thread.join()
+
+    def _render(self, since: Optional[int]) -> bytes:
+        with self._lock:
+            version = self._version
+            oldest = self._events[0][0] if self._events else version + 1
+            if since is not None and oldest - 1 <= since <= version:
+                events = [encoded for event_version, encoded in self._events if event_version > since]
+                reset = False
+            else:
+                events = list(self._latest.values())
+                reset = True
+        return b'{"version": %d, "reset": %s, "events": [%s]}' % (
+            version,
+            b"true" if reset else b"false",
+            b", ".join(events),
+        )
+
+    def _answer(self, waiters: List[_Waiter]) -> None:
+        bodies: Dict[Optional[int], bytes] = {}
+        for waiter in waiters:
+            body = bodies.get(waiter.since)
+            if body is None:
+                body = bodies[waiter.since] = self._render(waiter.since)
+            try:
+                waiter.deliver(body)
+            except Exception:  # noqa: BLE001 - one broken phone must not starve the others
+                LOGGER.exception("Failed to deliver session events")
+        self.delivered += len(waiters)
+
+    def _publish_sessions(self) -> None:
+        with self._lock:
+            names = [session.name for session in self._sessions.values()]
+        self.publish(SESSIONS, {"count": len(names), "names": names})
+        for listener in self._listeners:
+            listener()
+
+    def _ensure_thread(self) -> None:
+        # Called with the lock held.
+        if self._thread is None and not self._stopping.is_set():
+            self._thread = threading.Thread(target=self._expire, name="session-timeouts", daemon=True)
+            self._thread.start()
+
+    def _expire(self) -> None:
+        while not self._stopping.wait(self._tick):
+            now = time.monotonic()
+            with self._lock:
+                expired = [waiter for waiter in self._waiters.values() if waiter.deadline <= now]
+                for waiter in expired:
+                    del self._waiters[waiter.session_id]
+                stale = [
+                    session_id
+                    for session_id, session in self._sessions.items()
+                    if session_id not in self._waiters and now - session.last_seen > self.session_ttl
+                ]
+                for session_id in stale:
+                    del self._sessions[session_id]
+            self._answer(expired)
+            if stale:
+                LOGGER.info("Expired %d idle session(s)", len(stale))
+                self._publish_sessions()
+
+
+__all__ = ["NOW_PLAYING", "SESSIONS", "Session", "SessionHub"]
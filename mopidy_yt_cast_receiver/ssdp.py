@@ -2,42 +2,273 @@
 
 from __future__ import annotations
 
+import logging
+import math
+import random
+import re
+import select
 import socket
 import threading
-from dataclasses import dataclass
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Generic, Hashable, List, Sequence, Tuple, TypeVar
+
+from .capture import CaptureLog
+from .ratelimit import TokenBucketLimiter
+
+LOGGER = logging.getLogger(__name__)
 
 DIAL_ST = "urn:dial-multiscreen-org:service:dial:1"
+DEVICE_TYPE = "urn:schemas-upnp-org:device:dial:1"
+SSDP_ADDR = "239.255.255.250"
+SSDP_MULTICAST_PORT = 1900
+SERVER = "Mopidy/1.0 UPnP/1.0 yt-cast-receiver/0.1"
+MAX_MX = 5
+# The first ssdp:alive round is repeated this many seconds later in case it was lost.
+ALIVE_REPEAT_DELAY = 1.0
+
+T = TypeVar("T")
+
+
+# Header patterns run directly over the receive buffer, so only the matched
+# values are copied out of it.
+_SEARCH_START = re.compile(rb"M-SEARCH ")
+_SEARCH_ST = re.compile(rb"^ST[ \t]*:[ \t]*([^\r\n]*?)[ \t]*\r?$", re.IGNORECASE | re.MULTILINE)
+_SEARCH_MX = re.compile(rb"^MX[ \t]*:[ \t]*([0-9]+)", re.IGNORECASE | re.MULTILINE)
 
 
-def _build_response(location: str, udn: str) -> bytes:
+def _build_response(
+    location: str,
+    udn: str,
+    max_age: int = 1800,
+    st: str = DIAL_ST,
+    usn: str | None = None,
+) -> bytes:
     return (
         "HTTP/1.1 200 OK\r\n"
-        "CACHE-CONTROL: max-age=1800\r\n"
+        f"CACHE-CONTROL: max-age={max_age}\r\n"
         "EXT:\r\n"
         f"LOCATION: {location}\r\n"
-        "SERVER: Mopidy/1.0 UPnP/1.0 yt-cast-receiver/0.1\r\n"
-        f"ST: {DIAL_ST}\r\n"
-        f"USN: uuid:{udn}::{DIAL_ST}\r\n\r\n"
+        f"SERVER: {SERVER}\r\n"
+        f"ST: {st}\r\n"
+        f"USN: {usn or f'uuid:{udn}::{st}'}\r\n\r\n"
     ).encode()
 
 
+def parse_search(buffer: bytes | bytearray | memoryview, length: int | None = None) -> Tuple[bytes, int] | None:
+    """Return ``(ST, MX)`` for an M-SEARCH datagram, or ``None`` for anything else.
+
+    Works on the raw bytes (the first ``length`` bytes of ``buffer``) without
+    decoding the packet. A missing or invalid MX is reported as ``0``.
+    """
+
+    end = len(buffer) if length is None else length
+    if _SEARCH_START.match(buffer, 0, end) is None:
+        return None
+    st = _SEARCH_ST.search(buffer, 0, end)
+    if st is None:
+        return None
+    mx = _SEARCH_MX.search(buffer, 0, end)
+    return st.group(1), min(int(mx.group(1)), MAX_MX) if mx else 0
+
+
+def _notify_targets(udn: str) -> List[Tuple[str, str]]:
+    """Return ``(NT, USN)`` pairs announced for the root device and DIAL service."""
+
+    return [
+        ("upnp:rootdevice", f"uuid:{udn}::upnp:rootdevice"),
+        (f"uuid:{udn}", f"uuid:{udn}"),
+        (DEVICE_TYPE, f"uuid:{udn}::{DEVICE_TYPE}"),
+        (DIAL_ST, f"uuid:{udn}::{DIAL_ST}"),
+    ]
+
+
+def _build_search_responses(devices: Sequence[Tuple[str, str]], max_age: int) -> Dict[bytes, List[bytes]]:
+    """Map every search target we answer to its pre-encoded response datagrams.
+
+    ``devices`` holds ``(location, udn)`` pairs; targets shared by several
+    devices (such as the DIAL service type) are answered once per device.
+    """
+
+    responses: Dict[bytes, List[bytes]] = {}
+    for location, udn in devices:
+        for nt, usn in _notify_targets(udn):
+            responses.setdefault(nt.encode(), []).append(_build_response(location, udn, max_age, st=nt, usn=usn))
+    responses[b"ssdp:all"] = [datagram for datagrams in list(responses.values()) for datagram in datagrams]
+    return responses
+
+
+def _build_notify(nts: str, devices: Sequence[Tuple[str, str]], max_age: int) -> List[bytes]:
+    datagrams = []
+    for location, udn in devices:
+        for nt, usn in _notify_targets(udn):
+            lines = [
+                "NOTIFY * HTTP/1.1",
+                f"HOST: {SSDP_ADDR}:{SSDP_MULTICAST_PORT}",
+                f"NT: {nt}",
+                f"NTS: {nts}",
+                f"USN: {usn}",
+            ]
+            if nts == "ssdp:alive":
+                lines[2:2] = [f"CACHE-CONTROL: max-age={max_age}", f"LOCATION: {location}", f"SERVER: {SERVER}"]
+            datagrams.append(("\r\n".join(lines) + "\r\n\r\n").encode())
+    return datagrams
+
+
+class TimerWheel(Generic[T]):
+    """Hashed timing wheel for short-lived deadlines such as delayed SSDP replies.
+
+    Scheduling and expiry are O(1) per item. Delays longer than the wheel's
+    span (``resolution * slots``) are clamped to the last slot.
+    """
+
+    def __init__(self, *, resolution: float = 0.05, slots: int = 128) -> None:
+        self.resolution = resolution
+        self.slots = slots
+        self._wheel: List[List[T]] = [[] for _ in range(slots)]
+        self._cursor = self._tick(time.monotonic())
+        self._count = 0
+
+    def schedule(self, delay: float, item: T, *, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        if not self._count:
+            self._cursor = self._tick(now)
+        ticks = min(max(math.ceil(delay / self.resolution), 1), self.slots - 1)
+        due = max(self._tick(now), self._cursor) + ticks
+        self._wheel[due % self.slots].append(item)
+        self._count += 1
+
+    def pop_due(self, now: float | None = None) -> List[T]:
+        """Remove and return every item whose deadline has passed."""
+
+        target = self._tick(time.monotonic() if now is None else now)
+        due: List[T] = []
+        steps = 0
+        while self._cursor < target and steps < self.slots:
+            self._cursor += 1
+            steps += 1
+            bucket = self._wheel[self._cursor % self.slots]
+            if bucket:
+                due.extend(bucket)
+                bucket.clear()
+        self._cursor = max(self._cursor, target)
+        self._count -= len(due)
+        return due
+
+    def poll_timeout(self) -> float | None:
+        """Time until the next tick if anything is scheduled, else ``None``."""
+
+        return self.resolution if self._count else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _tick(self, now: float) -> int:
+        return int(now / self.resolution)
+
+
+@dataclass(slots=True)
+class SearchReply:
+    """Datagrams answering an M-SEARCH and how long to wait before sending them."""
+
+    datagrams: Sequence[bytes]
+    delay: float = 0.0
+
+
+@dataclass
+class SSDPStats:
+    """Datagram counters, updated only from the thread or loop serving SSDP."""
+
+    received: int = 0
+    ignored: int = 0
+    answered: int = 0
+    rate_limited: int = 0
+    duplicates: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.rate_limited + self.duplicates
+
+    def as_dict(self) -> Dict[str, int]:
+        return {**asdict(self), "dropped": self.dropped}
+
+
 @dataclass
 class _SSDPConfig:
     location: str
     udn: str
     port: int
+    max_age: int = 1800
+    interfaces: Sequence[str] = field(default_factory=lambda: ["0.0.0.0"])
 
 
 class SSDPServer:
-    """Minimal SSDP responder that announces the DIAL service."""
+    """SSDP responder that joins the multicast group and announces the DIAL service.
+
+    ``ssdp:alive`` NOTIFYs are sent as soon as the socket is bound, repeated
+    once a second later and then periodically (three times per ``max_age``),
+    and ``ssdp:byebye`` on stop. Replies to multicast
+    M-SEARCH requests are delayed by a random time within the request's MX and
+    sent from the serving thread via a :class:`TimerWheel`.
 
-    def __init__(self, *, location: str, friendly_name: str, udn: str, port: int = 1900) -> None:
-        self.config = _SSDPConfig(location=location, udn=udn, port=port)
+    Searches are rate limited per source address with a token bucket, and a
+    repeat of the same search from the same address inside its MX window is
+    dropped because the pending reply already answers it.
+
+    ``devices`` lists further ``(location, udn)`` pairs advertised from the
+    same socket, so several virtual receivers share one responder. With a
+    ``capture`` log, every inbound datagram is recorded with its outcome.
+    """
+
+    def __init__(
+        self,
+        *,
+        location: str,
+        friendly_name: str,
+        udn: str,
+        port: int = 1900,
+        max_age: int = 1800,
+        interfaces: Sequence[str] | None = None,
+        search_rate: float = 2.0,
+        search_burst: float = 10.0,
+        max_sources: int = 1024,
+        devices: Sequence[Tuple[str, str]] = (),
+        capture: CaptureLog | None = None,
+    ) -> None:
+        self.config = _SSDPConfig(
+            location=location, udn=udn, port=port, max_age=max_age, interfaces=list(interfaces or ["0.0.0.0"])
+        )
         self._socket: socket.socket | None = None
         self._thread: threading.Thread | None = None
         self._running = threading.Event()
+        self._wheel: TimerWheel[Tuple[Sequence[bytes], Tuple[str, int]]] = TimerWheel()
+        self._limiter = TokenBucketLimiter(rate=search_rate, burst=search_burst, max_keys=max_sources)
+        self._recent_searches: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._max_sources = max_sources
+        self.stats = SSDPStats()
+        self.capture = capture
+
+        self.devices = [(location, udn), *devices]
+        self._responses = _build_search_responses(self.devices, max_age)
+        self._buffer = bytearray(2048)
+        self._alive = _build_notify("ssdp:alive", self.devices, max_age)
+        self._byebye = _build_notify("ssdp:byebye", self.devices, max_age)
+
+    @property
+    def announce_interval(self) -> float:
+        """Seconds between ``ssdp:alive`` rounds, well inside ``max_age``."""
+
+        return self.config.max_age / 3
+
+    def next_announce_delay(self, rounds: int) -> float:
+        """Seconds from the ``rounds``-th ``ssdp:alive`` round to the next one."""
+
+        return min(ALIVE_REPEAT_DELAY, self.announce_interval) if rounds == 1 else self.announce_interval
+
+    def open_socket(self) -> socket.socket:
+        """Create the UDP socket bound to the SSDP port and join the multicast group."""
 
-    def start(self) -> None:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         try:
@@ -45,7 +276,76 @@ class SSDPServer:
         except OSError:
             pass
         sock.bind(("", self.config.port))
-        self._socket = sock
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+        for interface in self.config.interfaces:
+            membership = socket.inet_aton(SSDP_ADDR) + socket.inet_aton(interface)
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+            except OSError as exc:
+                LOGGER.warning("Could not join SSDP multicast group on %s: %s", interface, exc)
+        return sock
+
+    def handle_datagram(
+        self,
+        data: bytes | bytearray | memoryview,
+        addr: Tuple[str, int] | None = None,
+        length: int | None = None,
+    ) -> SearchReply | None:
+        """Return the reply for an inbound datagram, or ``None`` if it needs none."""
+
+        reply, outcome = self.classify(data, addr, length)
+        if self.capture is not None:
+            self.capture.ssdp(bytes(data[: length if length is not None else len(data)]), addr, outcome)
+        return reply
+
+    def classify(
+        self,
+        data: bytes | bytearray | memoryview,
+        addr: Tuple[str, int] | None = None,
+        length: int | None = None,
+    ) -> Tuple[SearchReply | None, str]:
+        """Like :meth:`handle_datagram`, but also name the outcome and skip the capture log.
+
+        The outcome is ``ignored``, ``rate_limited``, ``duplicate`` or
+        ``answered``; rate limits, duplicate suppression and counters apply.
+        """
+
+        self.stats.received += 1
+        search = parse_search(data, length)
+        datagrams = self._responses.get(search[0]) if search else None
+        if datagrams is None:
+            self.stats.ignored += 1
+            return None, "ignored"
+        st, mx = search
+
+        now = time.monotonic()
+        if addr is not None and not self._limiter.allow(addr[0], now):
+            self.stats.rate_limited += 1
+            return None, "rate_limited"
+        if addr is not None and self._is_duplicate((addr, st), now, max(mx, 1)):
+            self.stats.duplicates += 1
+            return None, "duplicate"
+
+        self.stats.answered += 1
+        # Unicast searches carry no MX and must be answered straight away.
+        return SearchReply(datagrams, random.uniform(0, mx) if mx else 0.0), "answered"
+
+    def announce(self, sock: socket.socket, *, alive: bool = True) -> None:
+        """Multicast ``ssdp:alive`` (or ``ssdp:byebye``) on every configured interface."""
+
+        datagrams = self._alive if alive else self._byebye
+        for interface in self.config.interfaces:
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+                for datagram in datagrams:
+                    sock.sendto(datagram, (SSDP_ADDR, SSDP_MULTICAST_PORT))
+            except OSError as exc:
+                LOGGER.debug("Could not send SSDP NOTIFY on %s: %s", interface, exc)
+
+    def start(self) -> None:
+        self._socket = self.open_socket()
+        # Announce before returning so restarted receivers reappear on phones straight away.
+        self.announce(self._socket)
         self._running.set()
         self._thread = threading.Thread(target=self._serve, daemon=True)
         self._thread.start()
@@ -53,6 +353,7 @@ class SSDPServer:
     def stop(self) -> None:
         self._running.clear()
         if self._socket:
+            self.announce(self._socket, alive=False)
             try:
                 self._socket.shutdown(socket.SHUT_RDWR)
             except OSError:
@@ -61,17 +362,51 @@ class SSDPServer:
         if self._thread:
             self._thread.join()
 
+    def _is_duplicate(self, key: Hashable, now: float, window: float) -> bool:
+        expires = self._recent_searches.get(key)
+        if expires is not None and expires > now:
+            return True
+        self._recent_searches[key] = now + window
+        self._recent_searches.move_to_end(key)
+        if len(self._recent_searches) > self._max_sources:
+            self._recent_searches.popitem(last=False)
+        return False
+
     def _serve(self) -> None:
         assert self._socket is not None
-        response = _build_response(self.config.location, self.config.udn)
+        sock = self._socket
+        rounds = 1
+        next_alive = time.monotonic() + self.next_announce_delay(rounds)
         while self._running.is_set():
+            now = time.monotonic()
+            timeout = min(self._wheel.poll_timeout() or 1.0, max(next_alive - now, 0.0), 1.0)
             try:
-                data, addr = self._socket.recvfrom(1024)
-            except OSError:
+                readable, _, _ = select.select([sock], [], [], timeout)
+                if readable:
+                    length, addr = sock.recvfrom_into(self._buffer)
+                    if not length and not self._running.is_set():
+                        break
+                    reply = self.handle_datagram(self._buffer, addr, length)
+                    if reply is not None:
+                        if reply.delay:
+                            self._wheel.schedule(reply.delay, (reply.datagrams, addr))
+                        else:
+                            self._send(reply.datagrams, addr)
+            except (OSError, ValueError):
                 break
-            message = data.decode(errors="ignore")
-            if "M-SEARCH" in message and DIAL_ST in message:
-                try:
-                    self._socket.sendto(response, addr)
-                except OSError:
-                    continue
+
+            now = time.monotonic()
+            for datagrams, addr in self._wheel.pop_due(now):
+                self._send(datagrams, addr)
+            if now >= next_alive:
+                self.announce(sock)
+                rounds += 1
+                next_alive = now + self.next_announce_delay(rounds)
+
+    def _send(self, datagrams: Sequence[bytes], addr: Tuple[str, int]) -> None:
+        assert self._socket is not None
+        for datagram in datagrams:
+            try:
+                self._socket.sendto(datagram, addr)
+            except OSError:
+                continue
@@ -0,0 +1,151 @@
+"""Receiver state persisted across restarts: identity, TV code, recent launches and sessions."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+@dataclass(slots=True)
+class ReceiverState:
+    """What a restarted receiver needs so phones see the same device, paired and mid-session."""
+
+    udn: Optional[str] = None
+    pairing_code: Optional[str] = None
+    running: bool = False
+    launches: List[Dict[str, Any]] = field(default_factory=list)
+    sessions: List[Dict[str, Any]] = field(default_factory=list)
+    event_version: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": FORMAT_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReceiverState":
+        if not isinstance(data, dict):
+            raise ValueError("state must be a JSON object")
+        if data.get("version", FORMAT_VERSION) > FORMAT_VERSION:
+            raise ValueError("state was written by a newer version")
+        state = cls(
+            udn=data.get("udn"),
+            pairing_code=data.get("pairing_code"),
+            running=bool(data.get("running", False)),
+            launches=list(data.get("launches") or []),
+            sessions=list(data.get("sessions") or []),
+            event_version=int(data.get("event_version") or 0),
+        )
+        if not all(isinstance(value, (str, type(None))) for value in (state.udn, state.pairing_code)):
+            raise ValueError("udn and pairing_code must be strings")
+        return state
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers see the old or the new file, never a torn one."""
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(prefix=".state-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+    try:
+        # Persist the rename itself; not every platform can open a directory.
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class StateStore:
+    """Load a receiver's state at start and snapshot it shortly after it changes.
+
+    :meth:`mark_dirty` is cheap and may be called on every change; a
+    background thread waits ``delay`` seconds to batch a burst of changes into
+    one snapshot, built by ``snapshot`` and written atomically. :meth:`close`
+    writes the final state.
+    """
+
+    def __init__(self, path: str, snapshot: Callable[[], ReceiverState], *, delay: float = 2.0) -> None:
+        self.path = path
+        self.delay = delay
+        self.writes = 0
+        self._snapshot = snapshot
+        self._dirty = threading.Event()
+        self._stopping = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+
+    def load(self) -> Optional[ReceiverState]:
+        """Return the saved state, or ``None`` when there is none or it cannot be read."""
+
+        try:
+            with open(self.path, "rb") as handle:
+                return ReceiverState.from_dict(json.load(handle))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as exc:
+            LOGGER.warning("Ignoring unreadable receiver state %s: %s", self.path, exc)
+            return None
+
+    def mark_dirty(self) -> None:
+        if self._stopping.is_set():
+            return
+        self._dirty.set()
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="state-snapshots", daemon=True)
+                    self._thread.start()
+
+    def flush(self) -> None:
+        """Write a snapshot now."""
+
+        self._dirty.clear()
+        with self._write_lock:
+            try:
+                state = self._snapshot()
+                write_atomic(self.path, json.dumps(state.to_dict(), separators=(",", ":")).encode())
+            except Exception:  # noqa: BLE001 - a failed snapshot must not take the receiver down
+                LOGGER.exception("Failed to save receiver state to %s", self.path)
+                return
+            self.writes += 1
+
+    def close(self) -> None:
+        self._stopping.set()
+        self._dirty.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            self._dirty.wait()
+            if self._stopping.wait(self.delay):
+                return
+            self.flush()
+
+
+__all__ = ["ReceiverState", "StateStore", "write_atomic"]
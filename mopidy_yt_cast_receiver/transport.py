@@ -0,0 +1,175 @@
+"""Keep-alive HTTP transport used for Mopidy JSON-RPC calls."""
+
+from __future__ import annotations
+
+import http.client
+import select
+import socket
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Errors that indicate a pooled socket was closed by the peer while idle.
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionError)
+
+
+class PoolExhausted(TimeoutError):
+    """No pooled connection became free within the timeout; nothing was sent."""
+
+
+class HTTPConnectionPool:
+    """Thread-safe pool of persistent ``http.client`` connections to one URL.
+
+    Idle connections are reused in LIFO order and health-checked before use.
+    A request that fails on a reused socket is retried once on a fresh one
+    if it never went out, or if the caller marks it ``idempotent``: once sent,
+    the server may have acted on it before the socket died.
+    A ``max_size`` of zero disables pooling so every request opens and closes
+    its own connection.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_size: int = 4,
+        timeout: float = 2.0,
+        idle_timeout: float = 30.0,
+    ) -> None:
+        parts = urlsplit(url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.opened = 0
+
+        self._idle: Deque[Tuple[http.client.HTTPConnection, float]] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size) if max_size > 0 else None
+        self._closed = False
+
+    def request(
+        self,
+        method: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        *,
+        idempotent: bool = False,
+    ) -> Tuple[int, bytes]:
+        """Send a request and return the status code and the full response body."""
+
+        if self._slots is not None and not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted("No pooled connection became available")
+        try:
+            return self._request(method, body, headers or {}, idempotent)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def close(self) -> None:
+        """Close all idle connections and stop retaining new ones."""
+
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            conn.close()
+
+    @property
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def _request(
+        self, method: str, body: Optional[bytes], headers: Dict[str, str], idempotent: bool
+    ) -> Tuple[int, bytes]:
+        conn, reused = self._checkout()
+        sent = False
+        try:
+            conn.request(method, self.path, body=body, headers=headers)
+            sent = True
+            status, data, will_close = self._receive(conn)
+        except _STALE_ERRORS:
+            conn.close()
+            if not reused or (sent and not idempotent):
+                raise
+            conn = self._connect()
+            try:
+                status, data, will_close = self._send(conn, method, body, headers)
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if will_close:
+            conn.close()
+        else:
+            self._checkin(conn)
+        return status, data
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        method: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> Tuple[int, bytes, bool]:
+        conn.request(method, self.path, body=body, headers=headers)
+        return self._receive(conn)
+
+    def _receive(self, conn: http.client.HTTPConnection) -> Tuple[int, bytes, bool]:
+        response = conn.getresponse()
+        data = response.read()
+        return response.status, data, response.will_close or self.max_size <= 0
+
+    def _checkout(self) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            if now - released_at <= self.idle_timeout and self._is_alive(conn):
+                return conn, True
+            conn.close()
+        return self._connect(), False
+
+    def _checkin(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = factory(self.host, self.port, timeout=self.timeout)
+        conn.connect()
+        # Small JSON-RPC requests must not wait on Nagle/delayed-ACK interaction.
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    @staticmethod
+    def _is_alive(conn: http.client.HTTPConnection) -> bool:
+        """Return ``False`` if an idle socket is closed or has unexpected data."""
+
+        sock = conn.sock
+        if sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+
+__all__ = ["HTTPConnectionPool", "PoolExhausted"]
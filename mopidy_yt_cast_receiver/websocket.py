@@ -0,0 +1,383 @@
+"""JSON-RPC and event client for Mopidy's ``/mopidy/ws`` WebSocket endpoint."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from .capture import CaptureLog
+from .metrics import MetricsRegistry
+from .mopidy import _BlockingClient
+from .resilience import CircuitBreaker, RetryPolicy
+from .resolver import TrackResolver
+
+LOGGER = logging.getLogger(__name__)
+
+_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+EventListener = Callable[[str, Dict[str, Any]], None]
+
+
+class WebSocketError(ConnectionError):
+    """The peer broke the WebSocket protocol or refused the upgrade."""
+
+
+def websocket_url(rpc_url: str) -> str:
+    """Derive Mopidy's WebSocket URL from its HTTP JSON-RPC URL."""
+
+    parts = urlsplit(rpc_url)
+    scheme = "wss" if parts.scheme == "https" else "ws"
+    path = parts.path[: -len("/rpc")] + "/ws" if parts.path.endswith("/rpc") else parts.path
+    return urlunsplit((scheme, parts.netloc, path or "/mopidy/ws", "", ""))
+
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1(key.encode() + _GUID).digest()).decode()
+
+
+def encode_frame(opcode: int, payload: bytes, *, mask: bool = True) -> bytes:
+    """Encode one final frame; clients must mask, servers must not."""
+
+    head = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        head.append(mask_bit | length)
+    elif length < 1 << 16:
+        head.append(mask_bit | 126)
+        head += struct.pack("!H", length)
+    else:
+        head.append(mask_bit | 127)
+        head += struct.pack("!Q", length)
+    if not mask:
+        return bytes(head) + payload
+    key = os.urandom(4)
+    return bytes(head) + key + _apply_mask(payload, key)
+
+
+def read_frame(stream: BinaryIO) -> Tuple[bool, int, bytes]:
+    """Read one frame as ``(fin, opcode, payload)``, unmasking it if needed."""
+
+    first, second = _read_exactly(stream, 2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", _read_exactly(stream, 2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", _read_exactly(stream, 8))
+    if length > _MAX_MESSAGE_BYTES:
+        raise WebSocketError(f"Frame of {length} bytes exceeds the limit")
+    key = _read_exactly(stream, 4) if second & 0x80 else None
+    payload = _read_exactly(stream, length)
+    return bool(first & 0x80), first & 0x0F, _apply_mask(payload, key) if key else payload
+
+
+def _apply_mask(payload: bytes, key: bytes) -> bytes:
+    # XOR with the key repeated to the payload length, done as one big integer.
+    repeated = (key * (len(payload) // 4 + 1))[: len(payload)]
+    masked = int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")
+    return masked.to_bytes(len(payload), "big")
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if data is None or len(data) < size:
+        raise ConnectionError("WebSocket closed mid-frame")
+    return data
+
+
+class _Waiter:
+    __slots__ = ("event", "reply")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.reply: Any = None
+
+
+class MopidyWebSocketClient(_BlockingClient):
+    """Multiplex JSON-RPC calls and Mopidy events over one persistent WebSocket.
+
+    A background thread owns the connection: it reconnects with jittered
+    exponential backoff, answers pings, matches replies to waiting callers by
+    id and hands ``{"event": ...}`` messages to subscribed listeners. Listeners
+    run on that thread and must not block. Calls made while disconnected wait
+    up to ``timeout`` for the connection and then fail as unreachable.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        *,
+        timeout: float = 2.0,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 30.0,
+        metrics: MetricsRegistry | None = None,
+        breaker: CircuitBreaker | None = None,
+        retry: RetryPolicy | None = None,
+        resolver: TrackResolver | None = None,
+        capture: CaptureLog | None = None,
+    ) -> None:
+        super().__init__(ws_url, metrics, breaker, retry, resolver, capture)
+        parts = urlsplit(self.rpc_url)
+        if parts.scheme != "ws":
+            raise ValueError(f"Unsupported WebSocket URL: {ws_url}")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.reconnects = 0
+
+        self._sock: socket.socket | None = None
+        self._send_lock = threading.Lock()
+        self._waiters: Dict[Any, _Waiter] = {}
+        self._waiters_lock = threading.Lock()
+        self._listeners: List[Tuple[Optional[Set[str]], EventListener]] = []
+        self._connect_listeners: List[Callable[[], None]] = []
+        self._connected = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._events = self._reconnect_count = None
+        if metrics is not None:
+            self._events = metrics.counter("mopidy_events_total", "Mopidy events received.", ("event",))
+            self._reconnect_count = metrics.counter(
+                "mopidy_ws_reconnects_total", "WebSocket connections to Mopidy after the first."
+            )
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self) -> "MopidyWebSocketClient":
+        """Start the background connection; safe to call more than once."""
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mopidy-ws", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_connected(self, timeout: float | None = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def subscribe(self, listener: EventListener, events: Iterable[str] | None = None) -> Callable[[], None]:
+        """Call ``listener(event, data)`` for Mopidy events; returns an unsubscribe function."""
+
+        entry = (set(events) if events is not None else None, listener)
+        self._listeners = self._listeners + [entry]
+
+        def unsubscribe() -> None:
+            self._listeners = [item for item in self._listeners if item is not entry]
+
+        return unsubscribe
+
+    def on_connect(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` after every (re)connect, off the connection thread so it may call Mopidy."""
+
+        self._connect_listeners.append(callback)
+
+    def close(self) -> None:
+        self._stopping.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                with self._send_lock:
+                    sock.sendall(encode_frame(OP_CLOSE, struct.pack("!H", 1000)))
+            except OSError:
+                pass
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(self.timeout + 1)
+        self._fail_waiters()
+
+    def _post(self, payload: Any) -> Any:
+        """Send ``payload`` and wait for its reply, or return ``None`` if Mopidy is unreachable."""
+
+        if not self._admit():
+            return None
+        reply = None
+        for delay in self._attempt_delays(payload):
+            if delay:
+                time.sleep(delay)
+            reply = self._exchange(payload)
+            if reply is not None:
+                break
+        self._record(reply)
+        return reply
+
+    def _exchange(self, payload: Any) -> Any:
+        if not self._connected.wait(self.timeout):
+            return None
+        first = payload[0] if isinstance(payload, list) else payload
+        waiter = _Waiter()
+        with self._waiters_lock:
+            self._waiters[first["id"]] = waiter
+        started = time.perf_counter()
+        try:
+            self._send(OP_TEXT, json.dumps(payload).encode())
+            if not waiter.event.wait(self.timeout):
+                LOGGER.debug("Mopidy WebSocket call timed out")
+        except OSError as exc:
+            LOGGER.debug("Mopidy WebSocket send failed: %s", exc)
+        finally:
+            with self._waiters_lock:
+                self._waiters.pop(first["id"], None)
+            self._observe(payload, started)
+        return waiter.reply
+
+    def _send(self, opcode: int, payload: bytes) -> None:
+        sock = self._sock
+        if sock is None:
+            raise ConnectionError("Not connected to Mopidy")
+        frame = encode_frame(opcode, payload)
+        with self._send_lock:
+            sock.sendall(frame)
+
+    def _run(self) -> None:
+        delay = self.backoff_initial
+        first = True
+        while not self._stopping.is_set():
+            try:
+                stream = self._connect()
+            except OSError as exc:
+                LOGGER.debug("Mopidy WebSocket connect failed: %s", exc)
+            else:
+                if not first:
+                    self.reconnects += 1
+                    if self._reconnect_count is not None:
+                        self._reconnect_count.inc()
+                first = False
+                delay = self.backoff_initial
+                LOGGER.info("Connected to Mopidy events at %s", self.rpc_url)
+                self._connected.set()
+                if self._connect_listeners:
+                    threading.Thread(target=self._notify_connected, name="mopidy-ws-connect", daemon=True).start()
+                try:
+                    self._read_messages(stream)
+                except (OSError, ValueError) as exc:
+                    if not self._stopping.is_set():
+                        LOGGER.info("Mopidy WebSocket disconnected: %s", exc)
+                finally:
+                    self._disconnect()
+            # Full jitter keeps many receivers from reconnecting in lockstep.
+            self._stopping.wait(random.uniform(0, delay))
+            delay = min(self.backoff_max, delay * 2)
+
+    def _connect(self) -> BinaryIO:
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            key = base64.b64encode(os.urandom(16)).decode()
+            sock.sendall(
+                (
+                    f"GET {self.path} HTTP/1.1\r\n"
+                    f"Host: {self.host}:{self.port}\r\n"
+                    "Upgrade: websocket\r\n"
+                    "Connection: Upgrade\r\n"
+                    f"Sec-WebSocket-Key: {key}\r\n"
+                    "Sec-WebSocket-Version: 13\r\n\r\n"
+                ).encode()
+            )
+            stream = sock.makefile("rb")
+            status = stream.readline(1024).split()
+            headers: Dict[str, str] = {}
+            while True:
+                line = stream.readline(8192)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(status) < 2 or status[1] != b"101":
+                raise WebSocketError(f"Upgrade refused: {b' '.join(status).decode('latin-1')}")
+            if headers.get("sec-websocket-accept") != accept_key(key):
+                raise WebSocketError("Invalid Sec-WebSocket-Accept")
+            sock.settimeout(None)
+        except BaseException:
+            sock.close()
+            raise
+        self._sock = sock
+        return stream
+
+    def _read_messages(self, stream: BinaryIO) -> None:
+        fragments: List[bytes] = []
+        while True:
+            fin, opcode, payload = read_frame(stream)
+            if opcode == OP_PING:
+                self._send(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                raise ConnectionError("Mopidy closed the WebSocket")
+            fragments.append(payload)
+            if not fin:
+                continue
+            message, fragments = b"".join(fragments), []
+            self._dispatch(json.loads(message))
+
+    def _dispatch(self, message: Any) -> None:
+        if isinstance(message, dict) and "event" in message:
+            event = message["event"]
+            if self._events is not None:
+                self._events.inc(event)
+            for events, listener in self._listeners:
+                if events is None or event in events:
+                    try:
+                        listener(event, message)
+                    except Exception:  # noqa: BLE001 - a listener must not kill the connection
+                        LOGGER.exception("Mopidy event listener failed for %s", event)
+            return
+
+        items = message if isinstance(message, list) else [message]
+        with self._waiters_lock:
+            for item in items:
+                waiter = self._waiters.pop(item.get("id"), None) if isinstance(item, dict) else None
+                if waiter is not None:
+                    waiter.reply = message
+                    waiter.event.set()
+                    return
+
+    def _notify_connected(self) -> None:
+        for callback in list(self._connect_listeners):
+            try:
+                callback()
+            except Exception:  # noqa: BLE001
+                LOGGER.exception("Mopidy connect listener failed")
+
+    def _disconnect(self) -> None:
+        self._connected.clear()
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+        self._fail_waiters()
+
+    def _fail_waiters(self) -> None:
+        with self._waiters_lock:
+            waiters, self._waiters = list(self._waiters.values()), {}
+        for waiter in waiters:
+            waiter.event.set()
+
+
+__all__ = ["MopidyWebSocketClient", "WebSocketError", "websocket_url"]
@@ -2,46 +2,223 @@
 
 from __future__ import annotations
 
+import itertools
+import threading
 import time
 import uuid
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
+from .history import LaunchHistory
+from .launcher import LaunchExecutor
+from .metrics import MetricsRegistry
 from .mopidy import MopidyClient
+from .playback import PAUSED, PLAYING, PlaybackMirror
 
+PENDING = "pending"
+LAUNCHING = "launching"
+COMPLETED = "completed"
+FAILED = "failed"
+SUPERSEDED = "superseded"
+STOPPED = "stopped"
 
-@dataclass
+# Launch parameters that must never be echoed back to clients.
+_PRIVATE_PARAMETERS = frozenset({"pairingCode", "code"})
+# Parameters that decide what a launch plays; retries that agree on these are duplicates.
+_DEDUPE_PARAMETERS = ("v", "videoId", "url", "videoIds", "list", "index", "t", "mode")
+
+
+def dedupe_key(params: Dict[str, str]) -> tuple:
+    """Normalized identity of a launch: what it plays, from where and how."""
+
+    return tuple((params.get(name) or "").strip() for name in _DEDUPE_PARAMETERS)
+
+
+@dataclass(slots=True)
 class LaunchState:
-    """Track the most recent launch request."""
+    """Track a single launch request."""
 
     launch_id: str
     timestamp: float
     parameters: Dict[str, str] = field(default_factory=dict)
+    status: str = PENDING
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED, SUPERSEDED, STOPPED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "launchId": self.launch_id,
+            "status": self.status,
+            "timestamp": self.timestamp,
+            "finishedAt": self.finished_at,
+            "parameters": {
+                key: value for key, value in self.parameters.items() if key not in _PRIVATE_PARAMETERS
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LaunchState":
+        """Rebuild a launch saved with :meth:`to_dict`."""
+
+        return cls(
+            launch_id=str(data["launchId"]),
+            timestamp=float(data["timestamp"]),
+            parameters={str(key): str(value) for key, value in (data.get("parameters") or {}).items()},
+            status=str(data.get("status", FAILED)),
+            finished_at=data.get("finishedAt"),
+        )
 
 
 class YouTubeCastApp:
     """Minimal DIAL application facade for the YouTube app."""
 
-    def __init__(self, app_name: str) -> None:
+    def __init__(
+        self,
+        app_name: str,
+        executor: Optional[LaunchExecutor] = None,
+        *,
+        history_size: int = 256,
+        metrics: MetricsRegistry | None = None,
+        playback: PlaybackMirror | None = None,
+        dedupe_window: float = 2.0,
+    ) -> None:
         self.app_name = app_name
+        self.dedupe_window = dedupe_window
+        self._last_key: Optional[tuple] = None
+        self._last_accepted = 0.0
+        # Serialises the dedupe check with recording the launch, so concurrent repeats reach Mopidy once.
+        self._launch_lock = threading.Lock()
         self._is_running = False
         self._launch_state: Optional[LaunchState] = None
+        self._executor = executor
+        self._history: LaunchHistory[LaunchState] = LaunchHistory(history_size)
+        self._versions = itertools.count(1)
+        self._version = 0
+        self._listeners: List[Callable[[], None]] = []
+        self._launch_duration = (
+            metrics.histogram(
+                "launch_duration_seconds",
+                "Time from accepting a launch to Mopidy finishing (or dropping) it.",
+                ("outcome",),
+            )
+            if metrics is not None
+            else None
+        )
+        self._deduplicated = (
+            metrics.counter("launch_deduplicated_total", "Repeated launches answered with the existing launch id.")
+            if metrics is not None
+            else None
+        )
+        self._playback = playback
+        if playback is not None:
+            playback.add_listener(self._touch)
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call ``listener`` after every change to :attr:`version`."""
+
+        self._listeners.append(listener)
 
     def launch(self, params: Dict[str, str], mopidy: MopidyClient) -> str:
-        """Handle a DIAL launch request and instruct Mopidy to play."""
+        """Handle a DIAL launch request and instruct Mopidy to play.
 
-        launch_id = uuid.uuid4().hex
-        self._is_running = True
-        self._launch_state = LaunchState(launch_id=launch_id, timestamp=time.time(), parameters=params)
+        With an executor the Mopidy commands run in the background and the
+        launch id is returned immediately; otherwise they run inline. A launch
+        identical to the previous one within ``dedupe_window`` seconds returns
+        that launch's id and never reaches Mopidy.
+        """
 
-        mopidy.handle_launch(params)
+        key = dedupe_key(params)
+        with self._launch_lock:
+            now = time.monotonic()
+            previous = self._launch_state
+            if (
+                previous is not None
+                and key == self._last_key
+                and now - self._last_accepted < self.dedupe_window
+                and previous.status not in (FAILED, STOPPED)
+            ):
+                if self._deduplicated is not None:
+                    self._deduplicated.inc()
+                return previous.launch_id
+            self._last_key = key
+            self._last_accepted = now
+
+            launch_id = uuid.uuid4().hex
+            state = LaunchState(launch_id=launch_id, timestamp=time.time(), parameters=params)
+            self._is_running = True
+            self._launch_state = state
+            self._history.add(launch_id, state)
+        self._touch()
+
+        def task() -> bool:
+            with self._launch_lock:
+                if state.status == STOPPED:
+                    return False
+                state.status = LAUNCHING
+            return mopidy.handle_launch(params)
+
+        if self._executor is None:
+            self._finish(state, bool(task()))
+        else:
+            self._executor.submit(
+                task,
+                lambda ok: self._finish(state, ok),
+                lambda: self._finish(state, False, status=SUPERSEDED),
+            )
         return launch_id
 
-    def stop(self) -> None:
-        self._is_running = False
+    def restore(self, launches: List[LaunchState], running: bool = False) -> None:
+        """Reload launches saved before a restart, oldest first; the last becomes the current launch.
+
+        Launches that had not finished never will, so they are marked stopped.
+        With ``running`` the playback mirror decides whether the app is still
+        running, as Mopidy may have kept playing while the receiver restarted.
+        """
+
+        for state in launches:
+            if not state.done:
+                state.status = STOPPED
+                state.finished_at = state.finished_at or time.time()
+            self._history.add(state.launch_id, state)
+        if launches:
+            self._launch_state = launches[-1]
+            self._is_running = running
+            self._touch()
+
+    def stop(self, launch_id: Optional[str] = None) -> bool:
+        """Stop the app, or a specific launch; return ``False`` for unknown launches."""
+
+        state = self._launch_state if launch_id is None else self._history.get(launch_id)
+        if launch_id is not None and state is None:
+            return False
+        if state is self._launch_state:
+            with self._launch_lock:
+                self._is_running = False
+                if state is not None and state.status in (COMPLETED, LAUNCHING, PENDING):
+                    state.status = STOPPED
+            if self._executor is not None:
+                # A launch still waiting for the executor never reaches Mopidy.
+                self._executor.discard_pending()
+            self._touch()
+        return True
+
+    def get_launch(self, launch_id: str) -> Optional[LaunchState]:
+        return self._history.get(launch_id)
+
+    def launches(self, offset: int = 0, limit: int = 20) -> List[LaunchState]:
+        """Return recorded launches, newest first."""
+
+        return self._history.page(offset, limit)
+
+    @property
+    def launch_count(self) -> int:
+        return len(self._history)
 
     def application_status(self, base_url: str) -> str:
-        state = "running" if self._is_running else "stopped"
+        state = "running" if self.running else "stopped"
         launch_path = (
             f"<link rel=\"run\" href=\"{base_url}/apps/{self.app_name}/{self._launch_state.launch_id}\"/>"
             if self._launch_state
@@ -56,6 +233,54 @@ class YouTubeCastApp:
             f"</service>"
         )
 
+    @property
+    def running(self) -> bool:
+        """Whether our launch is in progress or Mopidy is still playing it.
+
+        Once a launch has finished, the playback mirror decides if it has
+        heard from Mopidy since: if Mopidy stopped, the app reports ``stopped``
+        without asking Mopidy. An older snapshot predates the launch's own
+        commands and is ignored.
+        """
+
+        if not self._is_running:
+            return False
+        state = self._launch_state
+        snapshot = self._playback.snapshot if self._playback is not None else None
+        if snapshot is None or not snapshot.known or state is None or not state.done:
+            return True
+        if snapshot.synced_at is None or state.finished_at is None or snapshot.synced_at < state.finished_at:
+            return True
+        return snapshot.state in (PLAYING, PAUSED)
+
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever the rendered application status may change."""
+
+        return self._version
+
     @property
     def last_launch(self) -> Optional[LaunchState]:
         return self._launch_state
+
+    def _finish(self, state: LaunchState, ok: bool, *, status: Optional[str] = None) -> None:
+        if state.status == STOPPED:
+            state.finished_at = state.finished_at or time.time()
+            return
+        state.status = status or (COMPLETED if ok else FAILED)
+        state.finished_at = time.time()
+        if self._launch_duration is not None:
+            self._launch_duration.observe(state.finished_at - state.timestamp, state.status)
+        if state is self._launch_state:
+            # A finished launch hands the running state over to the playback mirror.
+            if state.status == FAILED:
+                self._is_running = False
+            elif state.status == COMPLETED and self._playback is not None:
+                self._playback.refresh()
+            self._touch()
+
+    def _touch(self) -> None:
+        # Bump after mutating so a cache keyed on the old version is rebuilt.
+        self._version = next(self._versions)
+        for listener in self._listeners:
+            listener()
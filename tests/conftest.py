@@ -0,0 +1,13 @@
+import pytest
+
+from .helpers import start_rpc_stub, stop_rpc_stub
+
+
+@pytest.fixture
+def rpc_stub():
+    """A running Mopidy JSON-RPC stub; its URL is ``rpc_stub.url``."""
+
+    httpd, url = start_rpc_stub()
+    httpd.url = url
+    yield httpd
+    stop_rpc_stub(httpd)
@@ -0,0 +1,98 @@
+"""Stubs and HTTP helpers shared by the test modules."""
+
+import json
+import threading
+import time
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _RPCHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A003
+        return
+
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        self.server.posts += 1
+        time.sleep(self.server.latency)
+        if isinstance(request, list) and self.server.batch_outages:
+            self.server.batch_outages -= 1
+            body = b"<html><body>502 Bad Gateway</body></html>"
+            self.send_response(502)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if isinstance(request, list) and self.server.reject_batches:
+            reply = {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+        elif isinstance(request, list):
+            reply = [self._reply(call) for call in reversed(request)]
+        else:
+            reply = self._reply(request)
+        body = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reply(self, call):
+        self.server.calls.append(call)
+        if call["method"] == "core.tracklist.add" and call["params"].get("uris") == ["bad:uri"]:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": 1, "message": "bad uri"}}
+        if call["method"] == "core.tracklist.add" and any(":playlist/" in uri for uri in call["params"]["uris"]):
+            # Every playlist holds the videos p0, p1 and p2.
+            tracks = [{"tlid": 10 + index, "track": {"uri": f"ytmusic:video/p{index}"}} for index in range(3)]
+            return {"jsonrpc": "2.0", "id": call["id"], "result": tracks}
+        if call["method"] == "core.tracklist.index":
+            return {"jsonrpc": "2.0", "id": call["id"], "result": 2}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": call["method"]}
+
+
+def start_rpc_stub(reject_batches=False, batch_outages=0, latency=0.0):
+    """Serve a recording Mopidy JSON-RPC stub on loopback; returns the server and its RPC URL.
+
+    ``reject_batches`` answers batches like an old Mopidy does; each of the
+    first ``batch_outages`` batches gets a 502 HTML page instead. Every reply
+    is delayed by ``latency`` seconds.
+    """
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _RPCHandler)
+    httpd.daemon_threads = True
+    httpd.calls = []
+    httpd.posts = 0
+    httpd.reject_batches = reject_batches
+    httpd.batch_outages = batch_outages
+    httpd.latency = latency
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+    return httpd, f"http://{host}:{port}/mopidy/rpc"
+
+
+def stop_rpc_stub(httpd):
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def rpc_reply(payload):
+    """Successful JSON-RPC reply to ``payload``, to stand in for a client's ``_post``."""
+
+    if isinstance(payload, list):
+        return [rpc_reply(call) for call in payload]
+    return {"jsonrpc": "2.0", "id": payload["id"], "result": None}
+
+
+def http_request(port, method, path, body=None, headers=None):
+    """Send one request on a fresh connection and return the response and its body."""
+
+    conn = HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response, response.read()
+    finally:
+        conn.close()
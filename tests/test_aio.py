@@ -0,0 +1,190 @@
+import asyncio
+import json
+import threading
+
+from mopidy_yt_cast_receiver.aio import AsyncDialRuntime, AsyncTransportControl, _follow_playback
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.resilience import CLOSED, CircuitBreaker
+
+from .helpers import http_request
+
+
+def test_asyncio_runtime_serves_routes_and_drives_mopidy(rpc_stub):
+    async def scenario():
+        service = DialService(
+            host="127.0.0.1", port=0, ssdp_port=0, mopidy_rpc_url=rpc_stub.url, state_reconcile_interval=0
+        )
+        runtime = AsyncDialRuntime(service)
+        await runtime.start()
+        try:
+            port = service.port
+            root, body = await asyncio.to_thread(http_request, port, "GET", "/")
+            assert root.status == 200
+            assert b"DIAL namespace" in body
+            assert root.getheader("Connection") == "keep-alive"
+
+            launch, _ = await asyncio.to_thread(http_request, port, "POST", f"/apps/{service.app_name}", "v=abc")
+            assert launch.status == 201
+            await service._launcher.wait_idle()
+
+            status, body = await asyncio.to_thread(http_request, port, "GET", f"/apps/{service.app_name}")
+            assert b"running" in body
+            assert service._youtube_app.last_launch.status == "completed"
+
+            missing, _ = await asyncio.to_thread(http_request, port, "GET", "/nope")
+            assert missing.status == 404
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+    assert rpc_stub.posts == 1
+    assert {call["method"] for call in rpc_stub.calls} == {
+        "core.tracklist.clear",
+        "core.tracklist.add",
+        "core.playback.play",
+    }
+
+
+def test_asyncio_runtime_answers_session_long_polls():
+    async def scenario():
+        service = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0)
+        runtime = AsyncDialRuntime(service)
+        await runtime.start()
+        try:
+            joined, body = await asyncio.to_thread(http_request, service.port, "POST", "/session", "name=phone")
+            session = json.loads(body)
+            path = f"/session/{session['sessionId']}/events?since={session['version']}"
+            poll = asyncio.create_task(asyncio.to_thread(http_request, service.port, "GET", path))
+            while service.sessions.waiting == 0:
+                await asyncio.sleep(0.01)
+            service.sessions.publish("nowPlaying", {"running": True})
+            response, body = await asyncio.wait_for(poll, 2)
+            assert response.status == 200
+            assert json.loads(body)["events"][0]["data"] == {"running": True}
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+
+
+
+
+def test_stop_from_another_thread_returns_after_serve_forever_has_shut_down():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0)
+    runtime = AsyncDialRuntime(service)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    served = []
+
+    def run():
+        loop.run_until_complete(runtime.start())
+        started.set()
+        loop.run_until_complete(runtime.serve_forever())
+        served.append(runtime._shutdown.done())
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        assert started.wait(2)
+        asyncio.run_coroutine_threadsafe(runtime.stop(), loop).result(5)
+        thread.join(5)
+        assert not thread.is_alive()
+        assert served == [True]
+    finally:
+        loop.close()
+
+def _runtime(rpc_stub, **kwargs):
+    kwargs.setdefault("state_reconcile_interval", 0)
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, mopidy_rpc_url=rpc_stub.url, **kwargs)
+    return service, AsyncDialRuntime(service)
+
+
+def _methods(rpc_stub):
+    return [call["method"] for call in rpc_stub.calls]
+
+
+def test_asyncio_runtime_sends_transport_control_through_the_async_client(rpc_stub):
+    async def scenario():
+        service, runtime = _runtime(rpc_stub)
+        await runtime.start()
+        try:
+            accepted, _ = await asyncio.to_thread(http_request, service.port, "POST", "/control/pause")
+            assert accepted.status == 202
+            assert isinstance(service.control, AsyncTransportControl)
+            await service.control.wait_idle()
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+    assert _methods(rpc_stub) == ["core.playback.pause"]
+
+
+def test_asyncio_runtime_reconciles_from_a_loop_task(rpc_stub):
+    async def scenario():
+        service, runtime = _runtime(rpc_stub, state_reconcile_interval=60)
+        await runtime.start()
+        try:
+            while _methods(rpc_stub).count("core.playback.get_state") < 1:
+                await asyncio.sleep(0.01)
+            service.playback.refresh()
+            while _methods(rpc_stub).count("core.playback.get_state") < 2:
+                await asyncio.sleep(0.01)
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+
+
+def test_asyncio_runtime_probes_mopidy_health_from_a_loop_task(rpc_stub):
+    async def scenario():
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        service, runtime = _runtime(rpc_stub, mopidy_breaker=breaker)
+        breaker.record_failure()
+        await runtime.start()
+        try:
+            while breaker.state != CLOSED:
+                await asyncio.sleep(0.01)
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+    assert _methods(rpc_stub) == ["core.get_version"]
+
+
+
+def test_asyncio_runtime_starts_no_playback_sync_threads(rpc_stub):
+    async def scenario():
+        service, runtime = _runtime(rpc_stub, state_reconcile_interval=60)
+        await runtime.start()
+        try:
+            names = {thread.name for thread in threading.enumerate()}
+            assert not names & {"mopidy-health", "playback-reconcile", "transport-control"}
+            # Lookups from the resolver thread go through the async client too.
+            response = await asyncio.to_thread(service._state_client.call, "core.get_version")
+            assert response.ok
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+    assert "core.get_version" in _methods(rpc_stub)
+
+
+def test_follow_playback_stops_when_cancelled_as_a_refresh_wakes_it():
+    class Mirror:
+        def on_refresh(self, callback):
+            self.refresh = callback
+
+        async def reconcile_async(self, client):
+            pass
+
+    async def scenario():
+        mirror = Mirror()
+        task = asyncio.get_running_loop().create_task(_follow_playback(mirror, None, 60))
+        await asyncio.sleep(0.01)
+        mirror.refresh()
+        await asyncio.sleep(0)
+        task.cancel()
+        done, _ = await asyncio.wait([task], timeout=1)
+        assert done
+
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+import json
+import time
+from http.client import HTTPConnection
+from unittest.mock import MagicMock
+
+from mopidy_yt_cast_receiver.capture import HTTP, RECEIVER, RPC, SSDP, START, CaptureLog, read_capture
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.ssdp import DIAL_ST
+
+from .helpers import rpc_reply
+
+
+def test_capture_records_requests_datagrams_and_mopidy_calls(tmp_path):
+    path = str(tmp_path / "capture.jsonl")
+    capture = CaptureLog(path)
+    service = DialService(
+        host="127.0.0.1",
+        port=0,
+        ssdp_port=0,
+        pairing_code="123412341234",
+        state_reconcile_interval=0,
+        capture=capture,
+    )
+    service._mopidy._post = MagicMock(side_effect=rpc_reply)
+    service.start()
+    try:
+        conn = HTTPConnection("127.0.0.1", service.port)
+        conn.request(
+            "POST", "/apps/YouTube", body="v=abc", headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        launch = conn.getresponse()
+        launch.read()
+        conn.request("GET", "/apps/YouTube")
+        conn.getresponse().read()
+        search = f"M-SEARCH * HTTP/1.1\r\nST: {DIAL_ST}\r\n\r\n".encode()
+        service._ssdp.handle_datagram(search, ("192.0.2.7", 50000))
+        deadline = time.monotonic() + 2
+        while service._youtube_app.last_launch.status not in ("completed", "failed"):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        service.stop()
+        capture.close()
+
+    records = list(read_capture(path))
+    assert records[0]["k"] == START
+    assert records[1] == {
+        "k": RECEIVER,
+        "prefix": "",
+        "udn": service.udn,
+        "name": service.friendly_name,
+        "pairing": "123412341234",
+        "t": records[1]["t"],
+    }
+    http = [record for record in records if record["k"] == HTTP]
+    assert [(record["m"], record["p"], record["s"]) for record in http] == [
+        ("POST", "/apps/YouTube", 201),
+        ("GET", "/apps/YouTube", 200),
+    ]
+    assert http[0]["b"] == "v=abc" and http[0]["l"] == launch.getheader("Location")
+    assert http[0]["h"] == {"Content-Type": "application/x-www-form-urlencoded"}
+    ssdp = [record for record in records if record["k"] == SSDP]
+    assert ssdp == [{"k": SSDP, "d": search.decode(), "o": "answered", "a": ["192.0.2.7", 50000], "t": ssdp[0]["t"]}]
+    assert "core.tracklist.add" in [record["m"] for record in records if record["k"] == RPC]
+    times = [record["t"] for record in records]
+    assert times == sorted(times)
+
+
+def test_read_capture_skips_a_torn_last_line(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    path.write_text(json.dumps({"k": START, "version": 1, "t": 0}) + "\n" + '{"k": "http", "m": "GE')
+    assert [record["k"] for record in read_capture(str(path))] == [START]
+
+
+def test_capture_log_is_private_to_its_owner(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    path.write_bytes(b"")
+    path.chmod(0o644)
+
+    CaptureLog(str(path)).close()
+    assert path.stat().st_mode & 0o777 == 0o600
+    fresh = tmp_path / "fresh.jsonl"
+    CaptureLog(str(fresh)).close()
+    assert fresh.stat().st_mode & 0o777 == 0o600
@@ -0,0 +1,114 @@
+import json
+import threading
+from http.client import HTTPConnection
+from unittest.mock import MagicMock
+
+import pytest
+
+from mopidy_yt_cast_receiver.control import TransportControl, parse_command
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.mopidy import RPCResponse
+
+
+def test_rapid_commands_collapse_into_one_pipelined_batch():
+    release = threading.Event()
+    batches = []
+
+    def send(calls):
+        batches.append(list(calls))
+        release.wait(2)
+        return [RPCResponse(method, None) for method, _ in calls]
+
+    control = TransportControl(send, max_pending=4)
+    try:
+        control.submit(parse_command("pause", {}))
+        while not batches:
+            pass
+        # While the first batch is in flight, a slider drag and two skips queue up.
+        results = [control.submit(parse_command("volume", {"volume": str(level)})) for level in range(0, 60, 10)]
+        assert results == [False, True, True, True, True, True]
+        control.submit(parse_command("next", {}))
+        assert control.submit(parse_command("next", {})) is False
+        control.submit(parse_command("seek", {"position": "1500"}))
+        assert control.submit(parse_command("previous", {})) is None
+        release.set()
+        assert control.wait_idle(2)
+    finally:
+        control.stop()
+
+    assert batches[1] == [
+        ("core.mixer.set_volume", {"volume": 50}),
+        ("core.playback.next", {}),
+        ("core.playback.next", {}),
+        ("core.playback.seek", {"time_position": 1500}),
+    ]
+
+
+def test_parse_command_validates_and_clamps():
+    assert parse_command("volume", {"volume": "250"}).params == {"volume": 100}
+    assert parse_command("seek", {"position": "-5"}).params == {"time_position": 0}
+    with pytest.raises(ValueError):
+        parse_command("seek", {})
+    with pytest.raises(ValueError):
+        parse_command("rewind", {})
+    for params in ({"position": "inf"}, {"position": "nan"}, {"position": "1e400"}):
+        with pytest.raises(ValueError):
+            parse_command("seek", params)
+
+
+def test_non_finite_control_values_are_rejected_with_400():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0)
+    try:
+        assert service.handle_request("POST", "/control/seek?position=inf", {}, b"").status == 400
+        assert service.handle_request("POST", "/control/volume", {}, b"volume=1e400").status == 400
+    finally:
+        service.stop_backend()
+
+
+def test_control_endpoints_send_to_mopidy_and_delete_stops_playback():
+    service = DialService(
+        host="127.0.0.1",
+        port=0,
+        ssdp_port=0,
+        state_reconcile_interval=0,
+        pairing_code="1234",
+        require_pairing_code=True,
+    )
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+    service._state_client.batch = MagicMock(side_effect=lambda calls: [RPCResponse(m, None) for m, _ in calls])
+    service.start()
+    try:
+        conn = HTTPConnection("127.0.0.1", service.port)
+        conn.request("POST", "/control/pause")
+        rejected = conn.getresponse()
+        rejected.read()
+        assert rejected.status == 403
+
+        conn.request("POST", "/session", body="code=1234")
+        session_id = json.loads(conn.getresponse().read())["sessionId"]
+        conn.request("POST", f"/control/volume?sessionId={session_id}", body="volume=30")
+        accepted = conn.getresponse()
+        assert accepted.status == 202
+        assert json.loads(accepted.read()) == {"command": "volume", "coalesced": False}
+        assert service.control.wait_idle(2)
+        service._state_client.batch.assert_called_with([("core.mixer.set_volume", {"volume": 30})])
+
+        conn.request("POST", f"/control/rewind?sessionId={session_id}")
+        unknown = conn.getresponse()
+        unknown.read()
+        assert unknown.status == 404
+
+        conn.request("POST", f"/apps/{service.app_name}", body="v=abc&code=1234")
+        conn.getresponse().read()
+        conn.request("DELETE", f"/apps/{service.app_name}")
+        stopped = conn.getresponse()
+        stopped.read()
+        assert stopped.status == 200
+        assert service.control.wait_idle(2)
+        service._state_client.batch.assert_called_with([("core.playback.stop", {})])
+
+        conn.request("GET", "/metrics")
+        metrics = conn.getresponse().read().decode()
+        assert 'control_commands_total{command="stop",result="sent"} 1' in metrics
+    finally:
+        service.stop()
@@ -1,5 +1,7 @@
+import json
 from http.client import HTTPConnection
 from unittest.mock import MagicMock
+from urllib.parse import urlparse
 
 from mopidy_yt_cast_receiver.dial import DialService
 
@@ -43,11 +45,54 @@ def test_dial_endpoints_support_launch_and_status():
         status_xml = status.read().decode()
         assert "running" in status_xml
 
+        assert service._launcher.wait_idle(timeout=2)
         service._mopidy.handle_launch.assert_called_with({"v": "99"})
     finally:
         service.stop()
 
 
+def test_launch_resource_and_history_listing():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0)
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+
+    service.start()
+    try:
+        conn = HTTPConnection(service.host, service.port)
+        locations = []
+        for video in ("a", "b", "c"):
+            conn.request("POST", f"/apps/{service.app_name}", body=f"v={video}&pairingCode={service._pairing.value}")
+            launch = conn.getresponse()
+            launch.read()
+            locations.append(urlparse(launch.getheader("Location")).path)
+        assert service._launcher.wait_idle(timeout=2)
+
+        conn.request("GET", locations[-1])
+        resource = conn.getresponse()
+        record = json.loads(resource.read())
+        assert resource.status == 200
+        assert record["parameters"] == {"v": "c"}
+
+        conn.request("GET", "/launches?offset=1&limit=1")
+        listing = json.loads(conn.getresponse().read())
+        assert listing["total"] == 3
+        assert [item["parameters"]["v"] for item in listing["launches"]] == ["b"]
+
+        conn.request("DELETE", locations[-1])
+        deleted = conn.getresponse()
+        deleted.read()
+        assert deleted.status == 200
+
+        conn.request("GET", f"/apps/{service.app_name}")
+        assert "stopped" in conn.getresponse().read().decode()
+
+        conn.request("DELETE", f"/apps/{service.app_name}/unknown")
+        missing = conn.getresponse()
+        missing.read()
+        assert missing.status == 404
+    finally:
+        service.stop()
+
+
 def test_pairing_code_required_blocks_unknown_clients():
     service = DialService(
         host="127.0.0.1", port=0, ssdp_port=0, pairing_code="123456789012", require_pairing_code=True
@@ -81,3 +126,70 @@ def test_pairing_code_required_blocks_unknown_clients():
         assert launch.status == 201
     finally:
         service.stop()
+
+
+def test_static_endpoints_are_cached_with_etags():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0)
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+
+    service.start()
+    try:
+        conn = HTTPConnection(service.host, service.port)
+
+        conn.request("GET", "/ssdp/device-desc.xml")
+        first = conn.getresponse()
+        first.read()
+        etag = first.getheader("ETag")
+        assert etag
+
+        conn.request("GET", "/ssdp/device-desc.xml", headers={"If-None-Match": etag})
+        not_modified = conn.getresponse()
+        assert not_modified.status == 304
+        assert not_modified.read() == b""
+
+        service.friendly_name = "Kitchen"
+        conn.request("GET", "/ssdp/device-desc.xml", headers={"If-None-Match": etag})
+        renamed = conn.getresponse()
+        assert renamed.status == 200
+        assert "Kitchen" in renamed.read().decode()
+
+        conn.request("GET", f"/apps/{service.app_name}")
+        status = conn.getresponse()
+        status.read()
+        status_etag = status.getheader("ETag")
+
+        conn.request("POST", f"/apps/{service.app_name}", body="v=1")
+        conn.getresponse().read()
+        conn.request("GET", f"/apps/{service.app_name}", headers={"If-None-Match": status_etag})
+        launched = conn.getresponse()
+        assert launched.status == 200
+        assert "running" in launched.read().decode()
+    finally:
+        service.stop()
+
+
+def test_metrics_endpoint_reports_routes_and_launches():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0)
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+
+    service.start()
+    try:
+        conn = HTTPConnection(service.host, service.port)
+        conn.request("POST", f"/apps/{service.app_name}", body="v=1")
+        conn.getresponse().read()
+        assert service._launcher.wait_idle(timeout=2)
+        conn.request("GET", "/nowhere")
+        conn.getresponse().read()
+
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        text = response.read().decode()
+
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/plain; version=0.0.4")
+        assert 'yt_cast_receiver_http_requests_total{method="POST",route="/apps/YouTube",status="201"} 1' in text
+        assert 'route="other",status="404"' in text
+        assert 'yt_cast_receiver_launch_duration_seconds_count{outcome="completed"} 1' in text
+        assert 'yt_cast_receiver_ssdp_packets_total{result="received"}' in text
+    finally:
+        service.stop()
@@ -0,0 +1,38 @@
+from mopidy_yt_cast_receiver.history import LaunchHistory
+
+
+def test_history_evicts_oldest_and_pages_newest_first():
+    history = LaunchHistory(capacity=3)
+    for index in range(5):
+        history.add(f"id{index}", index)
+
+    assert len(history) == 3
+    assert history.get("id0") is None
+    assert history.get("id4") == 4
+    assert history.page(0, 2) == [4, 3]
+    assert history.page(2, 2) == [2]
+    assert history.page(0, 0) == []
+
+    assert history.remove("id3") == 3
+    assert history.page(0, 10) == [4, 2]
+    history.add("id5", 5)
+    assert history.page(0, 10) == [5, 4]
+    history.add("id6", 6)
+    assert history.page(0, 10) == [6, 5, 4]
+
+
+def test_adding_an_existing_id_replaces_its_entry():
+    history = LaunchHistory(capacity=3)
+    history.add("a", 1)
+    history.add("b", 2)
+    history.add("a", 3)
+
+    assert len(history) == 2
+    assert history.page(0, 10) == [3, 2]
+    history.add("c", 4)
+    history.add("d", 5)
+    assert history.get("a") == 3
+    assert history.page(0, 10) == [5, 4, 3]
+    history.add("e", 6)
+    assert history.page(0, 10) == [6, 5, 4]
+    assert "a" not in history and len(history) == 3
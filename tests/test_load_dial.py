@@ -0,0 +1,21 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("runtime", ["threads", "asyncio"])
+def test_load_benchmark_runs_and_reports_with_each_runtime(runtime):
+    command = [sys.executable, "-m", "benchmarks.load_dial", "--runtime", runtime, "--seconds", "1", "--clients", "2"]
+    result = subprocess.run(command, cwd=_ROOT, capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report["runtime"] == runtime
+    assert report["requests"] > 0
+    assert "Task was destroyed" not in result.stderr
+    assert "Traceback" not in result.stderr
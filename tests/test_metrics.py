@@ -0,0 +1,23 @@
+from mopidy_yt_cast_receiver.metrics import MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry(prefix="test_")
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    registry.callback("queue_depth", "Depth.", lambda: {(): 3})
+
+    requests.inc('/a"b')
+    latency.observe(0.05, "/")
+    latency.observe(0.5, "/")
+    latency.observe(5.0, "/")
+
+    text = registry.render()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{route="/a\\"b"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/"} 3' in text
+    assert "test_queue_depth 3" in text
+    assert registry.counter("requests_total", "Requests.", ("route",)) is requests
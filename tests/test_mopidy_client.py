@@ -0,0 +1,228 @@
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+
+from mopidy_yt_cast_receiver.mopidy import ENQUEUE, PLAY_NEXT, REPLACE, MopidyClient, QueueRequest, launch_request
+
+from mopidy_yt_cast_receiver.transport import HTTPConnectionPool
+
+from .helpers import start_rpc_stub, stop_rpc_stub
+
+
+def test_play_uri_reuses_one_pooled_connection(rpc_stub):
+    client = MopidyClient(rpc_stub.url)
+    try:
+        client.play_uri("ytmusic:video/abc")
+        client.play_uri("ytmusic:video/def")
+
+        methods = [call["method"] for call in rpc_stub.calls]
+        assert methods.count("core.playback.play") == 2
+        assert client._transport.opened == 1
+    finally:
+        client.close()
+
+
+def test_stale_pooled_connection_is_replaced(rpc_stub):
+    client = MopidyClient(rpc_stub.url)
+    try:
+        client.play_uri("ytmusic:video/abc")
+        conn, _ = client._transport._idle[0]
+        conn.sock.close()
+
+        client.play_uri("ytmusic:video/def")
+
+        assert len(rpc_stub.calls) == 6
+        assert client._transport.opened == 2
+    finally:
+        client.close()
+
+
+def _start_one_reply_server(received):
+    """Answer the first request on each connection; read the second, then drop the connection unanswered."""
+
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def handle(conn):
+        with conn, conn.makefile("rb") as stream:
+            for index in range(2):
+                if not stream.readline():
+                    return
+                length = 0
+                while (header := stream.readline()) not in (b"\r\n", b""):
+                    name, _, value = header.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                received.append(stream.read(length))
+                if index == 0:
+                    conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def test_request_lost_after_sending_is_only_resent_when_idempotent():
+    received = []
+    server = _start_one_reply_server(received)
+    pool = HTTPConnectionPool(f"http://127.0.0.1:{server.getsockname()[1]}/")
+    try:
+        assert pool.request("POST", b"add") == (200, b"{}")
+        with pytest.raises(http.client.RemoteDisconnected):
+            pool.request("POST", b"play")
+        assert received == [b"add", b"play"]
+
+        pool.request("POST", b"first")
+        assert pool.request("POST", b"get_state", idempotent=True) == (200, b"{}")
+        assert received == [b"add", b"play", b"first", b"get_state", b"get_state"]
+    finally:
+        pool.close()
+        server.close()
+
+
+def test_play_uri_is_sent_as_one_batch_with_correlated_replies(rpc_stub):
+    client = MopidyClient(rpc_stub.url)
+    try:
+        assert client.play_uri("ytmusic:video/abc")
+        assert rpc_stub.posts == 1
+        assert len({call["id"] for call in rpc_stub.calls}) == 3
+
+        responses = client.batch([("core.tracklist.add", {"uris": ["bad:uri"]}), ("core.get_version", {})])
+        assert not responses[0].ok
+        assert responses[0].error["message"] == "bad uri"
+        assert responses[1].result == "core.get_version"
+    finally:
+        client.close()
+
+
+def test_batch_falls_back_to_sequential_calls_when_rejected():
+    httpd, url = start_rpc_stub(reject_batches=True)
+    client = MopidyClient(url)
+    try:
+        assert client.play_uri("ytmusic:video/abc")
+        assert client.play_uri("ytmusic:video/def")
+
+        # One rejected batch, then three sequential calls per launch.
+        assert httpd.posts == 1 + 3 + 3
+        assert [call["method"] for call in httpd.calls[:3]] == [
+            "core.tracklist.clear",
+            "core.tracklist.add",
+            "core.playback.play",
+        ]
+    finally:
+        client.close()
+        stop_rpc_stub(httpd)
+
+
+def test_transient_batch_failure_keeps_batching_enabled():
+    httpd, url = start_rpc_stub(batch_outages=1)
+    client = MopidyClient(url)
+    try:
+        responses = client.batch([("core.get_version", {}), ("core.get_uri_schemes", {})])
+        assert [response.ok for response in responses] == [False, False]
+        assert responses[0].error["code"] == -32700
+
+        assert client.play_uri("ytmusic:video/abc")
+        assert httpd.posts == 2
+        assert client._batch_supported
+    finally:
+        client.close()
+        stop_rpc_stub(httpd)
+
+
+def test_unreachable_mopidy_is_ignored():
+    client = MopidyClient("http://127.0.0.1:9/mopidy/rpc", timeout=0.2)
+    assert not client.play_uri("ytmusic:video/abc")
+    client.close()
+
+
+def _added(httpd, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        adds = [call["params"] for call in httpd.calls if call["method"] == "core.tracklist.add"]
+        if len(adds) >= count or time.monotonic() > deadline:
+            return adds
+        time.sleep(0.01)
+
+
+def test_launch_request_parses_queues_playlists_and_modes():
+    assert launch_request({}) is None
+    assert launch_request({"v": "b", "videoIds": "a,b,c"}) == QueueRequest(
+        ["ytmusic:video/b", "ytmusic:video/c"], REPLACE
+    )
+    assert launch_request({"v": "a", "list": "PL1", "mode": "enqueue"}) == QueueRequest(
+        ["ytmusic:video/a", "ytmusic:playlist/PL1"], ENQUEUE, skip_to="ytmusic:video/a"
+    )
+    assert launch_request({"v": "a", "mode": "bogus"}).mode == REPLACE
+
+
+def test_queue_starts_playing_after_first_chunk_and_streams_the_rest(rpc_stub):
+    client = MopidyClient(rpc_stub.url)
+    client.queue_chunk_size = 2
+    try:
+        assert client.handle_launch({"videoIds": "a,b,c,d,e"})
+        first_batch = {call["method"] for call in rpc_stub.calls[:3]}
+        assert first_batch == {"core.tracklist.clear", "core.tracklist.add", "core.playback.play"}
+
+        adds = _added(rpc_stub, 3)
+        assert [params["uris"] for params in adds] == [
+            ["ytmusic:video/a"],
+            ["ytmusic:video/b", "ytmusic:video/c"],
+            ["ytmusic:video/d", "ytmusic:video/e"],
+        ]
+    finally:
+        client.close()
+
+
+def test_play_next_inserts_after_the_current_track(rpc_stub):
+    client = MopidyClient(rpc_stub.url)
+    client.queue_chunk_size = 1
+    try:
+        assert client.play_queue(QueueRequest(["ytmusic:video/a", "ytmusic:video/b"], PLAY_NEXT))
+        adds = _added(rpc_stub, 2)
+        assert [(params["uris"], params["at_position"]) for params in adds] == [
+            (["ytmusic:video/a"], 3),
+            (["ytmusic:video/b"], 4),
+        ]
+        assert "core.tracklist.clear" not in [call["method"] for call in rpc_stub.calls]
+    finally:
+        client.close()
+
+
+def test_replacing_launch_stops_an_older_queue_from_streaming(rpc_stub):
+    client = MopidyClient(rpc_stub.url)
+    try:
+        client._queue_generation = 5
+        client._stream_chunks(4, [["ytmusic:video/stale"]], None)
+        assert rpc_stub.calls == []
+    finally:
+        client.close()
+
+
+def test_playlist_continues_after_the_launched_video_instead_of_repeating_it(rpc_stub):
+    client = MopidyClient(rpc_stub.url)
+    try:
+        assert client.handle_launch({"v": "p1", "list": "PL1"})
+        deadline = time.monotonic() + 2
+        while "core.tracklist.remove" not in [call["method"] for call in rpc_stub.calls]:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        removes = [call["params"] for call in rpc_stub.calls if call["method"] == "core.tracklist.remove"]
+        assert removes == [{"criteria": {"tlid": [10, 11]}}]
+
+        rpc_stub.calls.clear()
+        assert client.handle_launch({"v": "other", "list": "PL1"})
+        _added(rpc_stub, 2)
+        time.sleep(0.05)
+        assert "core.tracklist.remove" not in [call["method"] for call in rpc_stub.calls]
+    finally:
+        client.close()
@@ -0,0 +1,152 @@
+import time
+from unittest.mock import MagicMock
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.mopidy import RPCResponse
+from mopidy_yt_cast_receiver.playback import PAUSED, PLAYING, STOPPED, PlaybackMirror
+from mopidy_yt_cast_receiver.youtube import YouTubeCastApp
+
+_TL_TRACK = {"tlid": 7, "track": {"uri": "ytmusic:video/abc", "name": "Song"}}
+
+
+def _state_client(state, tl_track=_TL_TRACK, position=1500, version=3):
+    client = MagicMock()
+    client.batch.return_value = [
+        RPCResponse("core.playback.get_state", result=state),
+        RPCResponse("core.playback.get_current_tl_track", result=tl_track),
+        RPCResponse("core.playback.get_time_position", result=position),
+        RPCResponse("core.tracklist.get_version", result=version),
+    ]
+    return client
+
+
+def test_events_update_snapshot_incrementally():
+    mirror = PlaybackMirror()
+    assert not mirror.snapshot.known
+
+    mirror.handle_event("track_playback_started", {"tl_track": _TL_TRACK})
+    mirror.handle_event("tracklist_changed", {})
+    snapshot = mirror.snapshot
+    assert (snapshot.state, snapshot.tlid, snapshot.track_uri) == (PLAYING, 7, "ytmusic:video/abc")
+    assert snapshot.tracklist_version == 1
+    assert snapshot.position(snapshot.anchored_at + 2) == 2000
+
+    mirror.handle_event("track_playback_paused", {"tl_track": _TL_TRACK, "time_position": 4200})
+    assert mirror.snapshot.state == PAUSED
+    assert mirror.snapshot.position() == 4200
+
+    mirror.handle_event("seeked", {"time_position": 100})
+    assert mirror.snapshot.position() == 100
+
+
+def test_reconcile_replaces_snapshot_from_one_batch():
+    mirror = PlaybackMirror()
+    changes = []
+    mirror.add_listener(lambda: changes.append(True))
+
+    assert mirror.reconcile(_state_client(PAUSED))
+    assert mirror.snapshot.to_dict() == {
+        "state": PAUSED,
+        "trackUri": "ytmusic:video/abc",
+        "trackName": "Song",
+        "tlid": 7,
+        "positionMs": 1500,
+        "tracklistVersion": 3,
+    }
+    assert mirror.reconcile(_state_client(PAUSED))
+    assert len(changes) == 1
+
+    failing = MagicMock()
+    failing.batch.return_value = [RPCResponse("core.playback.get_state", error={"code": -32000})] * 4
+    assert not mirror.reconcile(failing)
+    assert mirror.snapshot.state == PAUSED
+
+
+def test_reconcile_does_not_overwrite_newer_events():
+    mirror = PlaybackMirror()
+    client = _state_client(PLAYING)
+    replies = client.batch.return_value
+
+    def batch(calls):
+        mirror.handle_event("playback_state_changed", {"old_state": PLAYING, "new_state": STOPPED})
+        return replies
+
+    client.batch.side_effect = batch
+    mirror.reconcile(client)
+    assert mirror.snapshot.state == STOPPED
+
+
+def test_app_status_follows_mopidy_after_launch_completes():
+    mirror = PlaybackMirror()
+    app = YouTubeCastApp("YouTube", playback=mirror)
+    mopidy = MagicMock()
+    mopidy.handle_launch.return_value = True
+
+    app.launch({"v": "abc"}, mopidy)
+    assert app.running
+
+    mirror.handle_event("track_playback_started", {"tl_track": _TL_TRACK})
+    assert app.running
+    version = app.version
+    mirror.handle_event("playback_state_changed", {"old_state": PLAYING, "new_state": STOPPED})
+    assert app.version != version
+    assert not app.running
+    assert "<state>stopped</state>" in app.application_status("http://localhost:8009")
+
+
+def test_playback_endpoint_and_cached_status_use_the_mirror():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0)
+    service._youtube_app._executor = None
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+    try:
+        service.handle_request("POST", f"/apps/{service.app_name}", {}, b"v=abc")
+        assert b"running" in service.handle_request("GET", f"/apps/{service.app_name}", {}, b"").body
+
+        service.playback.handle_event("playback_state_changed", {"old_state": PLAYING, "new_state": STOPPED})
+        assert b"stopped" in service.handle_request("GET", f"/apps/{service.app_name}", {}, b"").body
+
+        response = service.handle_request("GET", "/playback", {}, b"")
+        assert response.status == 200
+        assert b'"state": "stopped"' in response.body
+    finally:
+        service._mopidy.close()
+
+
+def test_launch_over_a_known_stopped_mirror_reports_running_until_mopidy_answers():
+    mirror = PlaybackMirror()
+    assert mirror.reconcile(_state_client(STOPPED))
+    app = YouTubeCastApp("YouTube", playback=mirror)
+    mopidy = MagicMock()
+    mopidy.handle_launch.return_value = True
+
+    app.launch({"v": "abc"}, mopidy)
+    assert app.last_launch.status == "completed"
+    assert app.running
+    assert "<state>running</state>" in app.application_status("http://localhost:8009")
+
+    assert mirror.reconcile(_state_client(PLAYING))
+    assert app.running
+    assert mirror.reconcile(_state_client(STOPPED))
+    assert not app.running
+
+
+def test_completed_launch_reconciles_the_mirror_straight_away():
+    mirror = PlaybackMirror()
+    client = _state_client(STOPPED)
+    mirror.start(client, interval=60)
+    try:
+        deadline = time.monotonic() + 2
+        while mirror.reconciliations < 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        client.batch.return_value = _state_client(PLAYING).batch.return_value
+        app = YouTubeCastApp("YouTube", playback=mirror)
+        mopidy = MagicMock()
+        mopidy.handle_launch.return_value = True
+        app.launch({"v": "abc"}, mopidy)
+        while mirror.snapshot.state != PLAYING:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert app.running
+    finally:
+        mirror.stop()
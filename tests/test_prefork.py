@@ -0,0 +1,74 @@
+import json
+import multiprocessing
+import socket
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.prefork import PreforkServer
+
+from .helpers import http_request
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "SO_REUSEPORT") or "fork" not in multiprocessing.get_all_start_methods(),
+    reason="needs fork() and SO_REUSEPORT",
+)
+
+
+def test_workers_share_launch_state_through_the_coordinator():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0)
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+    server = PreforkServer(service, workers=2)
+    server.start()
+    try:
+        assert len(server.worker_pids) == 2
+        response, body = http_request(service.port, "GET", "/apps/YouTube")
+        assert b"<state>stopped</state>" in body
+        stale_etag = response.getheader("ETag")
+
+        launch, _ = http_request(service.port, "POST", "/apps/YouTube", body="v=abc")
+        assert launch.status == 201
+        assert launch.getheader("Location").startswith(f"http://127.0.0.1:{service.port}/apps/YouTube/")
+
+        # Whichever worker answers, it reflects the launch accepted by the other.
+        for _ in range(6):
+            response, body = http_request(service.port, "GET", "/apps/YouTube", headers={"If-None-Match": stale_etag})
+            assert response.status == 200
+            assert b"<state>running</state>" in body
+        etag = response.getheader("ETag")
+        revalidated, _ = http_request(service.port, "GET", "/apps/YouTube", headers={"If-None-Match": etag})
+        assert revalidated.status == 304
+        assert service._youtube_app.launch_count == 1
+    finally:
+        server.stop()
+    assert all(not process.is_alive() for process in server._processes)
+
+
+def test_long_polls_are_deferred_across_the_coordinator():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0)
+    server = PreforkServer(service, workers=1)
+    server.start()
+    try:
+        joined, body = http_request(service.port, "POST", "/session", body="name=phone")
+        session = json.loads(body)
+        path = f"/session/{session['sessionId']}/events?since={session['version']}"
+        results = []
+        poll = threading.Thread(target=lambda: results.append(http_request(service.port, "GET", path)))
+        poll.start()
+        deadline = time.monotonic() + 5
+        while service.sessions.waiting == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        # The coordinator keeps serving other requests while the poll waits.
+        assert http_request(service.port, "GET", "/launches")[0].status == 200
+
+        service.sessions.publish("nowPlaying", {"running": True})
+        poll.join(timeout=5)
+        response, body = results[0]
+        assert response.status == 200
+        assert json.loads(body)["events"][0]["data"] == {"running": True}
+    finally:
+        server.stop()
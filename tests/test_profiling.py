@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.profiling import SamplingProfiler
+
+from .helpers import http_request
+
+
+def _busy_wait(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_counts_collapsed_stacks_per_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_wait, args=(stop,), name="busy worker")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    try:
+        profiler.start()
+        deadline = time.monotonic() + 2
+        while profiler.samples < 20:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not profiler.running
+    lines = profiler.collapsed().splitlines()
+    _, _, count = lines[0].rpartition(" ")
+    assert int(count) >= 1
+    busy = [line for line in lines if line.startswith("busy_worker;")]
+    assert busy and all("test_profiling.py:_busy_wait" in line for line in busy)
+    assert not any("sampling-profiler" in line for line in lines)
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_debug_profile_endpoint_requires_the_token():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0, debug_token="s3cret")
+    service.start()
+    try:
+        port = service.port
+        response, _ = http_request(port, "GET", "/debug/profile")
+        assert response.status == 401
+        assert response.getheader("WWW-Authenticate").startswith("Bearer")
+        assert http_request(port, "POST", "/debug/profile", "enabled=on", headers=_bearer("wrong"))[0].status == 401
+
+        body = "enabled=on&interval=0.002"
+        response, body = http_request(port, "POST", "/debug/profile", body, headers=_bearer("s3cret"))
+        assert response.status == 200
+        assert json.loads(body)["running"] is True
+        time.sleep(0.05)
+        response, body = http_request(port, "POST", "/debug/profile", "enabled=off", headers=_bearer("s3cret"))
+        assert json.loads(body)["running"] is False and json.loads(body)["samples"] > 0
+
+        response, body = http_request(port, "GET", "/debug/profile", headers=_bearer("s3cret"))
+        assert response.status == 200
+        assert b"serve_forever" in body
+
+        _, metrics = http_request(port, "GET", "/metrics")
+        assert b"yt_cast_receiver_process_threads " in metrics
+    finally:
+        service.stop()
+
+    unprotected = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0)
+    assert unprotected.handle_request("GET", "/debug/profile", {}).status == 404
+    unprotected.stop_backend()
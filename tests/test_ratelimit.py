@@ -0,0 +1,14 @@
+from mopidy_yt_cast_receiver.ratelimit import TokenBucketLimiter
+
+
+def test_token_bucket_refills_and_bounds_keys():
+    limiter = TokenBucketLimiter(rate=1.0, burst=2, max_keys=2)
+
+    assert limiter.allow("a", now=0.0)
+    assert limiter.allow("a", now=0.0)
+    assert not limiter.allow("a", now=0.5)
+    assert limiter.allow("a", now=1.6)
+
+    limiter.allow("b", now=2.0)
+    limiter.allow("c", now=2.0)
+    assert len(limiter) == 2
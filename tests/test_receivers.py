@@ -0,0 +1,104 @@
+from http.client import HTTPConnection
+from unittest.mock import MagicMock
+
+import pytest
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.receivers import MultiReceiverService, load_receivers, parse_receivers
+
+_CONFIG = """
+[[receiver]]
+name = "kitchen"
+friendly_name = "Kitchen"
+rpc_url = "http://kitchen.local:6680/mopidy/rpc"
+pairing_code = "111122223333"
+
+[[receiver]]
+name = "office"
+rpc_url = "http://office.local:6680/mopidy/rpc"
+mopidy_transport = "websocket"
+"""
+
+
+def _host(*configs):
+    receivers = [
+        DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0, **config.service_kwargs())
+        for config in configs
+    ]
+    return MultiReceiverService(receivers, host="127.0.0.1", port=0, ssdp_port=0)
+
+
+def test_load_receivers_from_toml(tmp_path):
+    path = tmp_path / "receivers.toml"
+    path.write_text(_CONFIG)
+
+    kitchen, office = load_receivers(str(path))
+    assert kitchen.service_kwargs()["friendly_name"] == "Kitchen"
+    assert office.service_kwargs()["friendly_name"] == "office"
+    assert office.service_kwargs()["mopidy_transport"] == "websocket"
+    assert office.service_kwargs()["udn"] == load_receivers(str(path))[1].service_kwargs()["udn"]
+    assert kitchen.service_kwargs()["udn"] != office.service_kwargs()["udn"]
+
+
+def test_invalid_receiver_configs_are_rejected():
+    with pytest.raises(ValueError, match="at least one"):
+        parse_receivers({})
+    with pytest.raises(ValueError, match="rpc_url"):
+        parse_receivers({"receiver": [{"name": "kitchen"}]})
+    with pytest.raises(ValueError, match="name"):
+        parse_receivers({"receiver": [{"name": "a/b", "rpc_url": "x"}]})
+    with pytest.raises(ValueError, match="unique"):
+        parse_receivers({"receiver": [{"name": "a", "rpc_url": "x"}, {"name": "a", "rpc_url": "y"}]})
+
+
+def test_requests_are_routed_by_path_prefix():
+    kitchen, office = parse_receivers(
+        {
+            "receiver": [
+                {"name": "kitchen", "rpc_url": "http://127.0.0.1:1/mopidy/rpc", "pairing_code": "111122223333"},
+                {"name": "office", "rpc_url": "http://127.0.0.1:2/mopidy/rpc"},
+            ]
+        }
+    )
+    host = _host(kitchen, office)
+    for receiver in host.receivers.values():
+        receiver._mopidy.handle_launch = MagicMock(return_value=True)
+
+    host.start()
+    try:
+        conn = HTTPConnection("127.0.0.1", host.port)
+        conn.request("GET", "/")
+        assert b"/kitchen/" in conn.getresponse().read()
+
+        conn.request("GET", "/office/ssdp/device-desc.xml")
+        descriptor = conn.getresponse().read().decode()
+        assert f"<URLBase>http://127.0.0.1:{host.port}/office</URLBase>" in descriptor
+
+        conn.request("GET", "/kitchen/pairing/code")
+        assert b"111122223333" in conn.getresponse().read()
+
+        conn.request("POST", "/office/apps/YouTube", body="v=abc")
+        launch = conn.getresponse()
+        launch.read()
+        assert launch.status == 201
+        assert launch.getheader("Location").startswith(f"http://127.0.0.1:{host.port}/office/apps/YouTube/")
+
+        assert host.receivers["office"]._launcher.wait_idle(timeout=2)
+        host.receivers["office"]._mopidy.handle_launch.assert_called_once_with({"v": "abc"})
+        host.receivers["kitchen"]._mopidy.handle_launch.assert_not_called()
+
+        conn.request("GET", "/attic/apps/YouTube")
+        missing = conn.getresponse()
+        missing.read()
+        assert missing.status == 404
+        assert len(host._ssdp.devices) == 2
+    finally:
+        host.stop()
+
+
+def test_receivers_need_distinct_prefixes():
+    config = parse_receivers({"receiver": [{"name": "kitchen", "rpc_url": "x"}]})[0]
+    with pytest.raises(ValueError, match="Duplicate"):
+        _host(config, config)
+    with pytest.raises(ValueError, match="single segment"):
+        MultiReceiverService([DialService(host="127.0.0.1", port=0, ssdp_port=0)])
@@ -0,0 +1,65 @@
+import argparse
+import json
+
+from benchmarks.replay import Replayer, build_receiver
+from mopidy_yt_cast_receiver.capture import CaptureLog, read_capture
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.ssdp import DIAL_ST
+
+from .helpers import http_request
+
+
+def _form(body):
+    return {"Content-Type": "application/x-www-form-urlencoded"}, body
+
+
+def test_replayed_capture_matches_with_rewritten_ids(tmp_path, rpc_stub):
+    path = str(tmp_path / "capture.jsonl")
+    capture = CaptureLog(path)
+    service = DialService(
+        host="127.0.0.1",
+        port=0,
+        ssdp_port=0,
+        mopidy_rpc_url=rpc_stub.url,
+        state_reconcile_interval=0,
+        capture=capture,
+    )
+    service.start()
+    try:
+        port = service.port
+        headers, body = _form("v=abc")
+        launch, _ = http_request(port, "POST", "/apps/YouTube", body, headers)
+        launch_id = launch.getheader("Location").rsplit("/", 1)[-1]
+        headers, body = _form("name=phone")
+        session = json.loads(http_request(port, "POST", "/session", body, headers)[1])["sessionId"]
+        http_request(port, "GET", f"/session/{session}/events?timeout=0")
+        http_request(port, "GET", f"/apps/YouTube/{launch_id}")
+        http_request(port, "DELETE", f"/apps/YouTube/{launch_id}")
+        http_request(port, "DELETE", f"/session/{session}")
+        service.ssdp.handle_datagram(f"M-SEARCH * HTTP/1.1\r\nST: {DIAL_ST}\r\n\r\n".encode(), ("192.0.2.7", 5000))
+    finally:
+        service.stop()
+        capture.close()
+
+    records = list(read_capture(path))
+    recorded = [record["s"] for record in records if record["k"] == "http"]
+    assert recorded == [201, 201, 200, 200, 200, 200]
+
+    replayed = build_receiver(records, rpc_stub.url, 0)
+    assert replayed.udn == service.udn
+    replayed.start()
+    try:
+        replayer = Replayer(replayed, records, argparse.Namespace(speed=0, concurrency=1))
+        replayer.run()
+        report = replayer.report()
+    finally:
+        replayed.stop()
+
+    assert report["http"]["requests"] == 6
+    assert report["http"]["status_mismatches"] == 0, report["http"]["examples"]
+    assert report["ssdp"] == {
+        "datagrams": 1,
+        "outcome_mismatches": 0,
+        "recorded": {"answered": 1},
+        "replayed": {"answered": 1},
+    }
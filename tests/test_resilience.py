@@ -0,0 +1,131 @@
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.mopidy import MopidyClient
+from mopidy_yt_cast_receiver.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    HealthProbe,
+    RetryPolicy,
+    is_idempotent,
+)
+
+from .helpers import start_rpc_stub, stop_rpc_stub
+
+
+def _closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_breaker_opens_after_threshold_and_admits_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_only_idempotent_payloads_are_retried():
+    read = {"method": "core.playback.get_state"}
+    write = {"method": "core.tracklist.add"}
+    assert is_idempotent(read)
+    assert is_idempotent([read, {"method": "core.library.lookup"}])
+    assert not is_idempotent([read, write])
+    assert list(RetryPolicy(attempts=1).delays()) == [0.0]
+
+
+def test_client_fails_fast_once_circuit_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = MopidyClient(
+        f"http://127.0.0.1:{_closed_port()}/mopidy/rpc",
+        breaker=breaker,
+        retry=RetryPolicy(attempts=3, base_delay=0.001),
+    )
+    sent = []
+    send = client._send
+    client._send = lambda payload, data: sent.append(payload) or send(payload, data)
+    try:
+        assert not client.call("core.playback.get_state").ok
+        assert len(sent) == 3
+        assert not client.play_uri("ytmusic:video/abc")
+        assert len(sent) == 4
+        assert not client.available
+
+        started = time.perf_counter()
+        response = client.call("core.playback.get_state")
+        assert time.perf_counter() - started < 0.01
+        assert response.error["code"] == -32000
+        assert len(sent) == 4
+    finally:
+        client.close()
+
+
+def test_waiting_for_a_pooled_connection_does_not_trip_the_breaker():
+    httpd, url = start_rpc_stub(latency=0.15)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    client = MopidyClient(url, pool_size=1, timeout=0.2, breaker=breaker)
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            responses = list(pool.map(lambda _: client.call("core.playback.get_state"), range(4)))
+        assert any(response.ok for response in responses)
+        assert any(not response.ok for response in responses)
+        assert breaker.state == CLOSED
+        assert breaker.opened == 0
+    finally:
+        client.close()
+        stop_rpc_stub(httpd)
+
+
+def test_health_probe_closes_circuit_when_mopidy_returns(rpc_stub):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    client = MopidyClient(rpc_stub.url, breaker=breaker)
+    probe = HealthProbe(breaker, lambda: client.call("core.get_version"), interval=0.02)
+    breaker.record_failure()
+    probe.start()
+    try:
+        deadline = time.monotonic() + 2
+        while breaker.state != CLOSED:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert [call["method"] for call in rpc_stub.calls] == ["core.get_version"]
+    finally:
+        probe.stop()
+        client.close()
+
+
+def test_launch_is_rejected_with_503_while_circuit_is_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, mopidy_breaker=breaker)
+    breaker.record_failure()
+    try:
+        response = service.handle_request("POST", f"/apps/{service.app_name}", {}, b"v=abc")
+        assert response.status == 503
+        assert b"Mopidy is unavailable" in response.body
+        assert ("Retry-After", "30") in response.headers
+        assert service._youtube_app.launch_count == 0
+        assert b"yt_cast_receiver_mopidy_circuit_open 1" in service.handle_request("GET", "/metrics", {}).body
+    finally:
+        service._mopidy.close()
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from mopidy_yt_cast_receiver.mopidy import MopidyClient, RPCResponse
+from mopidy_yt_cast_receiver.resolver import ResolutionCache, TrackResolver
+
+
+_TRACK = {"__model__": "Track", "uri": "ytmusic:video/abc", "name": "Song"}
+
+
+def test_cache_is_lru_and_ttl_bounded():
+    cache = ResolutionCache(max_size=2, ttl=0.05)
+    cache.put("a", {"uri": "a"})
+    cache.put("b", {"uri": "b"})
+    assert cache.get("a") == {"uri": "a"}
+    cache.put("c", {"uri": "c"})
+
+    assert cache.get("b") is None
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 1, "evictions": 1, "hit_ratio": 0.5}
+
+    time.sleep(0.06)
+    assert cache.peek("a") is None
+    assert len(cache) == 1
+
+
+def test_prefetch_resolves_in_background_batches():
+    looked_up = []
+    done = threading.Event()
+
+    def lookup(uris):
+        looked_up.append(list(uris))
+        done.set()
+        return RPCResponse("core.library.lookup", result={uri: [{"uri": uri}] for uri in uris})
+
+    resolver = TrackResolver(lookup)
+    resolver.cache.put("cached", {"uri": "cached"})
+    try:
+        resolver.prefetch(["cached", "x", "y", "x"])
+        assert done.wait(2)
+        deadline = time.monotonic() + 2
+        while resolver.cache.peek("y") is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert looked_up == [["x", "y"]]
+        assert resolver.cache.stats()["hits"] == 0
+    finally:
+        resolver.stop()
+
+
+def test_repeat_cast_counts_a_cache_hit_and_still_adds_by_uri(rpc_stub):
+    resolver = TrackResolver(lambda uris: RPCResponse("core.library.lookup", error={"code": 1}))
+    client = MopidyClient(rpc_stub.url, resolver=resolver)
+    try:
+        client.play_uri("ytmusic:video/abc")
+        resolver.remember_added(["ytmusic:video/abc"], [{"tlid": 1, "track": _TRACK}])
+        client.play_uri("ytmusic:video/abc")
+
+        adds = [call["params"] for call in rpc_stub.calls if call["method"] == "core.tracklist.add"]
+        assert adds == [{"uris": ["ytmusic:video/abc"]}, {"uris": ["ytmusic:video/abc"]}]
+        assert resolver.cache.stats()["hit_ratio"] == 0.5
+
+        client.play_uri("ytmusic:playlist/PL1")
+        assert (resolver.cache.hits, resolver.cache.misses) == (1, 1)
+    finally:
+        client.close()
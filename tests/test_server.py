@@ -0,0 +1,81 @@
+import socket
+import threading
+import time
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler
+from unittest.mock import MagicMock
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.server import PARKED_WRITE_TIMEOUT, ParkingHTTPServer, ServerOptions
+
+
+def test_pooled_server_keeps_connections_alive():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, server_options=ServerOptions(workers=2))
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+
+    service.start()
+    try:
+        conn = HTTPConnection(service.host, service.port)
+        conn.request("GET", "/")
+        first = conn.getresponse()
+        first.read()
+        sock = conn.sock
+
+        conn.request("POST", f"/apps/{service.app_name}", body="v=1")
+        launch = conn.getresponse()
+        launch.read()
+
+        assert first.version == 11
+        assert launch.status == 201
+        assert conn.sock is sock
+    finally:
+        service.stop()
+
+
+def test_pooled_server_rejects_with_retry_after_when_saturated():
+    options = ServerOptions(workers=1, queue_size=1, idle_timeout=2.0, retry_after=7)
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, server_options=options)
+
+    service.start()
+    try:
+        # One idle keep-alive connection occupies the only worker, one waits in the queue.
+        busy = HTTPConnection(service.host, service.port)
+        busy.request("GET", "/")
+        busy.getresponse().read()
+        queued = socket.create_connection((service.host, service.port))
+
+        rejected = HTTPConnection(service.host, service.port)
+        rejected.request("GET", "/")
+        response = rejected.getresponse()
+
+        assert response.status == 503
+        assert response.getheader("Retry-After") == "7"
+        assert service._httpd.rejected == 1
+        queued.close()
+    finally:
+        stopped = threading.Thread(target=service.stop)
+        stopped.start()
+        stopped.join(timeout=2)
+        assert not stopped.is_alive()
+
+
+def test_a_slow_parked_client_does_not_hold_up_the_others():
+    server = ParkingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    slow, slow_peer = socket.socketpair()
+    fast, fast_peer = socket.socketpair()
+    try:
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        server.park(slow)
+        server.park(fast)
+
+        started = time.monotonic()
+        server.answer_parked(slow, b"x" * (4 << 20))
+        server.answer_parked(fast, b"done")
+        assert time.monotonic() - started < PARKED_WRITE_TIMEOUT / 2
+        fast_peer.settimeout(2)
+        assert fast_peer.recv(16) == b"done"
+        assert server.parked == 0
+    finally:
+        server.server_close()
+        for sock in (slow_peer, fast_peer):
+            sock.close()
@@ -0,0 +1,130 @@
+import json
+import socket
+import threading
+import time
+from http.client import HTTPConnection
+from unittest.mock import MagicMock
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.session import NOW_PLAYING, SESSIONS, SessionHub
+
+
+def _collect():
+    bodies = []
+    return bodies, lambda body: bodies.append(json.loads(body))
+
+
+def test_polls_catch_up_or_wait_for_the_next_event():
+    hub = SessionHub(tick=0.01)
+    session = hub.join("phone")
+    version = hub.version
+    try:
+        catch_up, deliver = _collect()
+        assert hub.poll(session.session_id, version - 1, deliver)
+        assert [event["type"] for event in catch_up[0]["events"]] == [SESSIONS]
+
+        parked, deliver = _collect()
+        hub.poll(session.session_id, version, deliver)
+        assert parked == [] and hub.waiting == 1
+        hub.publish(NOW_PLAYING, {"running": True})
+        assert parked[0]["version"] == version + 1
+        assert parked[0]["events"][0]["data"] == {"running": True}
+        assert not parked[0]["reset"]
+
+        timed_out, deliver = _collect()
+        hub.poll(session.session_id, hub.version, deliver, timeout=0.02)
+        deadline = time.monotonic() + 2
+        while not timed_out:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert timed_out[0]["events"] == []
+        assert not hub.poll("unknown", None, deliver)
+    finally:
+        hub.close()
+
+
+def test_waiters_at_the_same_version_share_one_body():
+    hub = SessionHub()
+    bodies = []
+    sessions = [hub.join(f"phone-{index}") for index in range(5)]
+    for session in sessions:
+        hub.poll(session.session_id, hub.version, bodies.append)
+    hub.publish(NOW_PLAYING, {"running": False})
+
+    assert len(bodies) == 5
+    assert all(body is bodies[0] for body in bodies)
+    hub.close()
+
+
+def test_reset_returns_latest_state_and_limits_apply():
+    hub = SessionHub(history=2, max_sessions=1)
+    session = hub.join("phone")
+    assert hub.join("another") is None
+    for index in range(3):
+        hub.publish(NOW_PLAYING, {"index": index})
+
+    reset, deliver = _collect()
+    hub.poll(session.session_id, 0, deliver)
+    assert reset[0]["reset"]
+    assert [event["data"] for event in reset[0]["events"]] == [{"count": 1, "names": ["phone"]}, {"index": 2}]
+
+    first, deliver_first = _collect()
+    hub.poll(session.session_id, hub.version, deliver_first)
+    hub.poll(session.session_id, hub.version, lambda body: None)
+    assert first and first[0]["events"] == []
+    assert hub.leave(session.session_id)
+    hub.close()
+
+
+def _join(conn):
+    conn.request("POST", "/session", body="name=phone")
+    joined = conn.getresponse()
+    assert joined.status == 201
+    return json.loads(joined.read())
+
+
+def test_long_polls_park_without_threads_and_wake_on_launch():
+    service = DialService(host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0)
+    service._mopidy.handle_launch = MagicMock(return_value=True)
+    service.start()
+    clients = []
+    try:
+        conn = HTTPConnection("127.0.0.1", service.port)
+        sessions = [_join(conn) for _ in range(10)]
+
+        baseline = threading.active_count()
+        for session in sessions:
+            client = socket.create_connection(("127.0.0.1", service.port))
+            path = f"/session/{session['sessionId']}/events?since={service.sessions.version}"
+            client.sendall(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            clients.append(client)
+        deadline = time.monotonic() + 2
+        while service.sessions.waiting < 10:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert service._httpd.parked == 10
+        # Only the hub's timeout thread is added, however many phones wait.
+        assert threading.active_count() <= baseline + 1
+
+        conn.request("POST", f"/apps/{service.app_name}", body="v=abc")
+        conn.getresponse().read()
+        for client in clients:
+            client.settimeout(2)
+            answer = b""
+            while not answer.endswith(b"]}"):
+                answer += client.recv(65536)
+            head, _, body = answer.partition(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.0 200")
+            event = json.loads(body)["events"][0]
+            assert event["type"] == NOW_PLAYING
+            assert event["data"]["launch"]["parameters"] == {"v": "abc"}
+        assert service._httpd.parked == 0
+
+        conn.request("DELETE", f"/session/{sessions[0]['sessionId']}")
+        assert conn.getresponse().status == 200
+        conn.request("GET", f"/session/{sessions[0]['sessionId']}/events")
+        assert conn.getresponse().status == 404
+    finally:
+        for client in clients:
+            client.close()
+        service.stop()
@@ -0,0 +1,140 @@
+import socket
+
+from mopidy_yt_cast_receiver.ssdp import DIAL_ST, SSDPServer, TimerWheel, parse_search
+
+
+def _search(mx=None, st=DIAL_ST):
+    lines = ["M-SEARCH * HTTP/1.1", "HOST: 239.255.255.250:1900", 'MAN: "ssdp:discover"', f"ST: {st}"]
+    if mx is not None:
+        lines.append(f"MX: {mx}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+def test_timer_wheel_releases_items_in_deadline_order():
+    wheel = TimerWheel(resolution=0.1, slots=16)
+    wheel.schedule(0.5, "late", now=10.0)
+    wheel.schedule(0.1, "early", now=10.0)
+
+    assert wheel.pop_due(10.05) == []
+    assert wheel.pop_due(10.25) == ["early"]
+    assert wheel.pop_due(10.65) == ["late"]
+    assert len(wheel) == 0
+
+
+def test_search_reply_is_delayed_within_mx():
+    ssdp = SSDPServer(location="http://127.0.0.1:8009/ssdp/device-desc.xml", friendly_name="x", udn="abc")
+
+    delayed = ssdp.handle_datagram(_search(mx=2))
+    immediate = ssdp.handle_datagram(_search())
+    capped = ssdp.handle_datagram(_search(mx=120))
+
+    assert 0 <= delayed.delay <= 2
+    assert immediate.delay == 0
+    assert capped.delay <= 5
+    assert ssdp.handle_datagram(_search(st="urn:other")) is None
+
+
+def test_notify_announcements_cover_device_and_service():
+    ssdp = SSDPServer(location="http://127.0.0.1:8009/ssdp/device-desc.xml", friendly_name="x", udn="abc")
+
+    alive = b"".join(ssdp._alive).decode()
+    byebye = b"".join(ssdp._byebye).decode()
+
+    assert alive.count("NTS: ssdp:alive") == 4
+    assert "CACHE-CONTROL: max-age=1800" in alive
+    assert f"NT: {DIAL_ST}" in alive
+    assert "NT: upnp:rootdevice" in byebye
+    assert "LOCATION" not in byebye
+
+
+def test_alive_is_sent_on_start_and_repeated_soon_after():
+    ssdp = SSDPServer(location="http://127.0.0.1:8009/ssdp/device-desc.xml", friendly_name="x", udn="abc", port=0)
+    sent = []
+    ssdp.announce = lambda sock, alive=True: sent.append(alive)
+    ssdp.start()
+    try:
+        assert sent == [True]
+    finally:
+        ssdp.stop()
+
+    assert ssdp.next_announce_delay(1) == 1.0
+    assert ssdp.next_announce_delay(2) == ssdp.announce_interval
+
+
+def test_responder_answers_unicast_search():
+    ssdp = SSDPServer(location="http://127.0.0.1:8009/ssdp/device-desc.xml", friendly_name="x", udn="abc", port=0)
+    ssdp.start()
+    try:
+        port = ssdp._socket.getsockname()[1]
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client.settimeout(2)
+        client.sendto(_search(mx=1), ("127.0.0.1", port))
+        data, _ = client.recvfrom(2048)
+        client.close()
+        assert b"USN: uuid:abc::" in data
+    finally:
+        ssdp.stop()
+
+
+def test_search_storms_are_rate_limited_and_deduplicated():
+    ssdp = SSDPServer(
+        location="http://127.0.0.1:8009/ssdp/device-desc.xml",
+        friendly_name="x",
+        udn="abc",
+        search_rate=0.001,
+        search_burst=3,
+    )
+    phone = ("192.168.1.20", 50000)
+
+    assert ssdp.handle_datagram(_search(mx=3), phone) is not None
+    assert ssdp.handle_datagram(_search(mx=3), phone) is None
+    assert ssdp.handle_datagram(_search(mx=3), ("192.168.1.20", 50001)) is not None
+    assert ssdp.handle_datagram(_search(mx=3), ("192.168.1.20", 50002)) is None
+    assert ssdp.handle_datagram(_search(mx=3), ("192.168.1.30", 50000)) is not None
+    ssdp.handle_datagram(b"NOTIFY * HTTP/1.1\r\n\r\n", phone)
+
+    stats = ssdp.stats.as_dict()
+    assert stats["received"] == 6
+    assert stats["answered"] == 3
+    assert stats["duplicates"] == 1
+    assert stats["rate_limited"] == 1
+    assert stats["dropped"] == 2
+    assert stats["ignored"] == 1
+
+
+def test_parse_search_reads_st_and_mx_from_raw_buffer():
+    buffer = bytearray(256)
+    packet = b"M-SEARCH * HTTP/1.1\r\nst:  ssdp:all \r\nMx: 9\r\n\r\n"
+    buffer[: len(packet)] = packet
+
+    assert parse_search(memoryview(buffer), len(packet)) == (b"ssdp:all", 5)
+    assert parse_search(b"M-SEARCH * HTTP/1.1\r\nST: upnp:rootdevice\r\n\r\n") == (b"upnp:rootdevice", 0)
+    assert parse_search(b"NOTIFY * HTTP/1.1\r\nNT: upnp:rootdevice\r\n\r\n") is None
+
+
+def test_standard_search_targets_are_answered():
+    ssdp = SSDPServer(location="http://127.0.0.1:8009/ssdp/device-desc.xml", friendly_name="x", udn="abc")
+
+    everything = ssdp.handle_datagram(_search(st="ssdp:all"))
+    root = ssdp.handle_datagram(_search(st="upnp:rootdevice"))
+    device = ssdp.handle_datagram(_search(st="uuid:abc"))
+
+    assert len(everything.datagrams) == 4
+    assert b"USN: uuid:abc::upnp:rootdevice" in root.datagrams[0]
+    assert b"USN: uuid:abc\r\n" in device.datagrams[0]
+    assert ssdp.handle_datagram(_search(st="uuid:other")) is None
+
+
+def test_extra_devices_share_one_responder():
+    ssdp = SSDPServer(
+        location="http://127.0.0.1:8009/kitchen/ssdp/device-desc.xml",
+        friendly_name="x",
+        udn="abc",
+        devices=[("http://127.0.0.1:8009/office/ssdp/device-desc.xml", "def")],
+    )
+
+    dial = b"".join(ssdp.handle_datagram(_search(st=DIAL_ST)).datagrams)
+    assert b"/kitchen/" in dial and b"/office/" in dial
+    only_office = b"".join(ssdp.handle_datagram(_search(st="uuid:def")).datagrams)
+    assert b"/office/" in only_office and b"/kitchen/" not in only_office
+    assert len(ssdp._alive) == 8
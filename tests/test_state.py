@@ -0,0 +1,68 @@
+import json
+import time
+from unittest.mock import MagicMock
+
+from mopidy_yt_cast_receiver.dial import DialService
+from mopidy_yt_cast_receiver.state import ReceiverState, StateStore, write_atomic
+
+from .helpers import rpc_reply
+
+
+def test_state_store_writes_atomically_and_ignores_corrupt_files(tmp_path):
+    path = tmp_path / "receiver.json"
+    store = StateStore(str(path), lambda: ReceiverState(udn="uuid:1", pairing_code="123412341234"))
+    assert store.load() is None
+
+    store.flush()
+    assert store.load() == ReceiverState(udn="uuid:1", pairing_code="123412341234")
+    assert [entry.name for entry in tmp_path.iterdir()] == ["receiver.json"]
+
+    write_atomic(str(path), b'{"udn": "uuid:1", "pairing_co')
+    assert store.load() is None
+    path.write_text(json.dumps({"version": 99, "udn": "uuid:1"}))
+    assert store.load() is None
+
+
+def _service(path, **kwargs):
+    service = DialService(
+        host="127.0.0.1", port=0, ssdp_port=0, state_reconcile_interval=0, state_path=str(path), **kwargs
+    )
+    service._mopidy._post = MagicMock(side_effect=rpc_reply)
+    return service
+
+
+def test_restarted_receiver_keeps_identity_launches_and_sessions(tmp_path):
+    path = tmp_path / "receiver.json"
+    first = _service(path)
+    assert json.loads(path.read_text())["udn"] == first.udn
+
+    assert first.handle_request("POST", "/apps/YouTube", {}, b"v=abc").status == 201
+    deadline = time.monotonic() + 2
+    while first._youtube_app.last_launch.status != "completed":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    session = json.loads(first.handle_request("POST", "/session", {}, b"name=phone").body)
+    launch = first._youtube_app.last_launch
+    assert first.first_cast_seconds is not None
+    first.stop_backend()
+
+    second = _service(path)
+    try:
+        assert second.udn == first.udn
+        assert second._pairing.normalized == first._pairing.normalized
+        restored = second._youtube_app.last_launch
+        assert (restored.launch_id, restored.parameters, restored.status) == (
+            launch.launch_id,
+            launch.parameters,
+            "completed",
+        )
+        assert [item.session_id for item in second.sessions.sessions()] == [session["sessionId"]]
+        assert second.sessions.version >= first.sessions.version
+        assert second.first_cast_seconds is None
+    finally:
+        second.stop_backend()
+
+    # An explicit identity still wins over the saved one.
+    third = _service(path, udn="uuid:override", pairing_code="999988887777")
+    third.stop_backend()
+    assert json.loads(path.read_text())["udn"] == "uuid:override"
@@ -0,0 +1,136 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+
+from mopidy_yt_cast_receiver.websocket import (
+    OP_CLOSE,
+    OP_PING,
+    OP_PONG,
+    OP_TEXT,
+    MopidyWebSocketClient,
+    accept_key,
+    encode_frame,
+    read_frame,
+    websocket_url,
+)
+
+
+class _WSHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        key = None
+        self.rfile.readline()
+        while True:
+            line = self.rfile.readline().decode()
+            if line in ("\r\n", ""):
+                break
+            name, _, value = line.partition(":")
+            if name.lower() == "sec-websocket-key":
+                key = value.strip()
+        self.server.connections.append(self)
+        self.wfile.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+            ).encode()
+        )
+        self.send(OP_PING, b"hi")
+        try:
+            while True:
+                _, opcode, payload = read_frame(self.rfile)
+                if opcode == OP_CLOSE:
+                    return
+                if opcode == OP_PONG:
+                    self.server.pongs.append(payload)
+                    continue
+                request = json.loads(payload)
+                calls = request if isinstance(request, list) else [request]
+                self.server.calls.extend(calls)
+                replies = [{"jsonrpc": "2.0", "id": call["id"], "result": call["method"]} for call in calls]
+                reply = list(reversed(replies)) if isinstance(request, list) else replies[0]
+                self.send(OP_TEXT, json.dumps(reply).encode())
+        except ConnectionError:
+            return
+
+    def send(self, opcode, payload):
+        self.wfile.write(encode_frame(opcode, payload, mask=False))
+
+    def push_event(self, event, **data):
+        self.send(OP_TEXT, json.dumps({"event": event, **data}).encode())
+
+
+def _start_ws_stub():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _WSHandler)
+    server.daemon_threads = True
+    server.connections = []
+    server.calls = []
+    server.pongs = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"ws://{host}:{port}/mopidy/ws"
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_websocket_url_is_derived_from_rpc_url():
+    assert websocket_url("http://127.0.0.1:6680/mopidy/rpc") == "ws://127.0.0.1:6680/mopidy/ws"
+
+
+def test_calls_and_batches_are_multiplexed_over_one_socket():
+    server, url = _start_ws_stub()
+    client = MopidyWebSocketClient(url).start()
+    try:
+        assert client.call("core.get_version").result == "core.get_version"
+        assert client.play_uri("ytmusic:video/abc")
+        assert [call["method"] for call in server.calls][-3:] == [
+            "core.tracklist.clear",
+            "core.tracklist.add",
+            "core.playback.play",
+        ]
+        assert len(server.connections) == 1
+        _wait_for(lambda: server.pongs == [b"hi"])
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_events_reach_subscribers_and_connection_is_restored():
+    server, url = _start_ws_stub()
+    client = MopidyWebSocketClient(url, backoff_initial=0.01)
+    received = []
+    connects = []
+    client.subscribe(lambda event, data: received.append((event, data.get("new_state"))), {"playback_state_changed"})
+    client.on_connect(lambda: connects.append(True))
+    client.start()
+    try:
+        assert client.wait_connected(2)
+        server.connections[0].push_event("tracklist_changed")
+        server.connections[0].push_event("playback_state_changed", old_state="stopped", new_state="playing")
+        _wait_for(lambda: received == [("playback_state_changed", "playing")])
+
+        server.connections[0].connection.shutdown(socket.SHUT_RDWR)
+        _wait_for(lambda: len(server.connections) == 2)
+        assert client.call("core.playback.get_state").ok
+        assert client.reconnects == 1
+        _wait_for(lambda: len(connects) == 2)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_calls_fail_fast_when_mopidy_is_unreachable():
+    client = MopidyWebSocketClient("ws://127.0.0.1:9/mopidy/ws", timeout=0.1).start()
+    try:
+        response = client.call("core.get_version")
+        assert not response.ok
+        assert response.error["code"] == -32000
+    finally:
+        client.close()
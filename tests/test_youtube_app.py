@@ -1,5 +1,8 @@
+import threading
 from unittest.mock import MagicMock
 
+from mopidy_yt_cast_receiver.launcher import LaunchExecutor
+from mopidy_yt_cast_receiver.metrics import MetricsRegistry
 from mopidy_yt_cast_receiver.youtube import YouTubeCastApp
 
 
@@ -26,3 +29,129 @@ def test_stop_updates_state():
 
     status = app.application_status("http://localhost:8009")
     assert "stopped" in status
+
+
+def test_background_launches_coalesce_to_latest():
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def handle_launch(params):
+        calls.append(params["v"])
+        started.set()
+        release.wait(timeout=2)
+        return True
+
+    mopidy = MagicMock()
+    mopidy.handle_launch.side_effect = handle_launch
+    executor = LaunchExecutor()
+    app = YouTubeCastApp("YouTube", executor)
+    try:
+        app.launch({"v": "first"}, mopidy)
+        assert started.wait(timeout=2)
+        app.launch({"v": "second"}, mopidy)
+        second = app.last_launch
+        app.launch({"v": "third"}, mopidy)
+        release.set()
+
+        assert executor.wait_idle(timeout=2)
+        assert calls == ["first", "third"]
+        assert second.status == "superseded"
+        assert app.last_launch.status == "completed"
+    finally:
+        executor.stop()
+
+
+def test_launch_stopped_while_waiting_never_reaches_mopidy():
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def handle_launch(params):
+        calls.append(params["v"])
+        started.set()
+        release.wait(timeout=2)
+        return True
+
+    mopidy = MagicMock()
+    mopidy.handle_launch.side_effect = handle_launch
+    executor = LaunchExecutor()
+    app = YouTubeCastApp("YouTube", executor)
+    try:
+        app.launch({"v": "first"}, mopidy)
+        assert started.wait(timeout=2)
+        second_id = app.launch({"v": "second"}, mopidy)
+        assert app.stop(second_id)
+        release.set()
+
+        assert executor.wait_idle(timeout=2)
+        assert calls == ["first"]
+        assert app.get_launch(second_id).status == "stopped"
+        assert "stopped" in app.application_status("http://localhost:8009")
+    finally:
+        executor.stop()
+
+
+def test_failed_background_launch_reports_stopped():
+    mopidy = MagicMock()
+    mopidy.handle_launch.return_value = False
+    executor = LaunchExecutor()
+    app = YouTubeCastApp("YouTube", executor)
+    try:
+        app.launch({"v": "abc123"}, mopidy)
+        assert executor.wait_idle(timeout=2)
+
+        assert app.last_launch.status == "failed"
+        assert "stopped" in app.application_status("http://localhost:8009")
+    finally:
+        executor.stop()
+
+
+def test_repeated_launch_within_window_reuses_launch_id():
+    mopidy = MagicMock()
+    metrics = MetricsRegistry()
+    app = YouTubeCastApp("YouTube", metrics=metrics, dedupe_window=60)
+
+    first = app.launch({"v": "abc123", "pairingCode": "1"}, mopidy)
+    assert app.launch({"v": " abc123", "pairingCode": "2"}, mopidy) == first
+    assert mopidy.handle_launch.call_count == 1
+    assert app.launch_count == 1
+    assert "launch_deduplicated_total 1" in metrics.render()
+
+    assert app.launch({"v": "abc123", "t": "30"}, mopidy) != first
+    assert mopidy.handle_launch.call_count == 2
+
+
+def test_concurrent_repeated_launches_reach_mopidy_once():
+    mopidy = MagicMock()
+    app = YouTubeCastApp("YouTube", dedupe_window=60)
+    barrier = threading.Barrier(8)
+    launch_ids = []
+
+    def tap():
+        barrier.wait()
+        launch_ids.append(app.launch({"v": "abc123"}, mopidy))
+
+    threads = [threading.Thread(target=tap) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(launch_ids)) == 1
+    assert mopidy.handle_launch.call_count == 1
+    assert app.launch_count == 1
+
+
+def test_launch_after_window_or_stop_reaches_mopidy():
+    mopidy = MagicMock()
+    app = YouTubeCastApp("YouTube", dedupe_window=0)
+    app.launch({"v": "abc123"}, mopidy)
+    app.launch({"v": "abc123"}, mopidy)
+    assert mopidy.handle_launch.call_count == 2
+
+    app = YouTubeCastApp("YouTube", dedupe_window=60)
+    app.launch({"v": "abc123"}, mopidy)
+    app.stop()
+    app.launch({"v": "abc123"}, mopidy)
+    assert mopidy.handle_launch.call_count == 4